@@ -0,0 +1,200 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import threading
+import time
+
+# --- Logowanie bez blokowania wątków scrapujących: kolejka, zapis w tle, deduplikacja i rotacja ---
+# Wątek wołający logging.* tylko filtruje rekord i wkłada go do kolejki; formatowanie (także tracebacków)
+# i zapis do pliku robi QueueListener w tle. Powtarzające się ostrzeżenia (np. błąd każdego wiersza
+# zepsutej strony) przechodzą w liczbie burst na okno, a resztę zastępuje okresowe podsumowanie.
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(processName)s/%(threadName)s - %(message)s'
+_DIGITS = re.compile(r'\d+')
+
+_listeners = []
+_summary_stop = None
+_queue_handler = None
+_dedup_filter = None
+
+
+class DedupFilter(logging.Filter):
+    """
+    Przepuszcza najwyżej burst rekordów o tej samej treści (z cyframi zastąpionymi '#') w oknie window sekund.
+    Dotyczy poziomów od min_level; pominięte rekordy są liczone i zgłaszane przez summaries().
+    """
+
+    def __init__(self, window=60.0, burst=5, min_level=logging.WARNING):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.min_level = min_level
+        self._lock = threading.Lock()
+        # klucz -> [początek okna, liczba w oknie, pominięte, przykładowa treść]
+        self._entries = {}
+        # Podsumowania okien zamkniętych przez kolejny rekord, czekające na summaries()
+        self._pending = []
+
+    def filter(self, record):
+        if record.levelno < self.min_level or getattr(record, 'dedup_summary', False):
+            return True
+        message = record.getMessage()
+        key = (record.name, record.levelno, _DIGITS.sub('#', message[:300]))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] >= self.window:
+                if entry is not None and entry[2]:
+                    self._pending.append(self._summary(key, entry))
+                self._entries[key] = [now, 1, 0, message]
+                return True
+            entry[1] += 1
+            if entry[1] <= self.burst:
+                return True
+            entry[2] += 1
+            return False
+
+    def summaries(self, final=False):
+        """Zwraca [(poziom, tekst)] podsumowań pominiętych rekordów z zakończonych okien (final - ze wszystkich)."""
+        now = time.monotonic()
+        with self._lock:
+            result, self._pending = self._pending, []
+            for key, entry in list(self._entries.items()):
+                expired = now - entry[0] >= self.window
+                if entry[2] and (expired or final):
+                    result.append(self._summary(key, entry))
+                    entry[2] = 0
+                if expired:
+                    del self._entries[key]
+        return result
+
+    def _summary(self, key, entry):
+        return key[1], f"Pominięto {entry[2]} powtórzeń komunikatu (okno {self.window:g} s): {entry[3]}"
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, który przy pełnej kolejce odrzuca rekord (i liczy odrzucone) zamiast blokować wątek.
+    W obrębie procesu rekord trafia do kolejki bez wstępnego formatowania - robi to wątek zapisu.
+    """
+
+    def __init__(self, log_queue, format_in_caller=False):
+        super().__init__(log_queue)
+        self.format_in_caller = format_in_caller
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Kolejka między procesami wymaga rekordu gotowego do pickle (standardowe prepare)
+        return super().prepare(record) if self.format_in_caller else record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """Jeden obiekt JSON na linię: czas, poziom, proces, wątek, logger, treść i ewentualny traceback."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'process': record.processName,
+            'thread': record.threadName,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _file_handler(filename, max_bytes, backup_count, json_format):
+    handler = logging.handlers.RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count,
+                                                   encoding='utf-8', delay=True)
+    handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT))
+    return handler
+
+
+def _install(log_queue, level, dedup_window, dedup_burst, format_in_caller):
+    global _queue_handler, _dedup_filter, _summary_stop
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    _dedup_filter = DedupFilter(dedup_window, dedup_burst)
+    _queue_handler = DroppingQueueHandler(log_queue, format_in_caller)
+    _queue_handler.addFilter(_dedup_filter)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+    _summary_stop = threading.Event()
+    threading.Thread(target=_summary_loop, args=(_summary_stop, dedup_window), name='log-summary',
+                     daemon=True).start()
+    atexit.register(shutdown_logging)
+
+
+def setup_logging(filename, level=logging.INFO, max_bytes=10 * 1024 * 1024, backup_count=5, json_format=False,
+                  dedup_window=60.0, dedup_burst=5, queue_size=10000):
+    """Kieruje logi głównego procesu przez kolejkę do pliku rotowanego po max_bytes (backup_count kopii)."""
+    shutdown_logging()
+    log_queue = queue.Queue(maxsize=queue_size)
+    listener = logging.handlers.QueueListener(
+        log_queue, _file_handler(filename, max_bytes, backup_count, json_format), respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    _install(log_queue, level, dedup_window, dedup_burst, format_in_caller=False)
+
+
+def start_relay(log_queue):
+    """
+    Zapisuje do pliku głównego procesu rekordy procesów roboczych z kolejki multiprocessing.
+    Zwraca QueueListener, który wywołujący zatrzymuje (stop()) po zakończeniu procesów roboczych.
+    """
+    listener = logging.handlers.QueueListener(log_queue, *_listeners[0].handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def setup_worker_logging(log_queue, level=logging.INFO, dedup_window=60.0, dedup_burst=5):
+    """Proces roboczy: rekordy (już sformatowane) trafiają do kolejki multiprocessing procesu głównego."""
+    # Przy starcie przez fork proces dziedziczy wątki zapisu rodzica tylko jako obiekty - nie są jego
+    _listeners.clear()
+    _install(log_queue, level, dedup_window, dedup_burst, format_in_caller=True)
+
+
+def _emit_summaries(final=False):
+    logger = logging.getLogger()
+    for level, text in _dedup_filter.summaries(final):
+        logger.log(level, text, extra={'dedup_summary': True})
+    dropped, _queue_handler.dropped = _queue_handler.dropped, 0
+    if dropped:
+        logger.warning(f"Kolejka logów była pełna - odrzucono {dropped} komunikatów.", extra={'dedup_summary': True})
+
+
+def _summary_loop(stop_event, interval):
+    while not stop_event.wait(interval):
+        _emit_summaries()
+
+
+def shutdown_logging():
+    """
+    Wysyła ostatnie podsumowania i opróżnia kolejkę (atexit w procesie głównym; procesy multiprocessing
+    nie wykonują atexit, więc proces roboczy woła ją sam). Bezpieczna przy wielokrotnym wywołaniu.
+    """
+    global _queue_handler
+    if _queue_handler is None:
+        return
+    _summary_stop.set()
+    _emit_summaries(final=True)
+    logging.getLogger().removeHandler(_queue_handler)
+    _queue_handler = None
+    while _listeners:
+        listener = _listeners.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.flush()
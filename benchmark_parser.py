@@ -0,0 +1,46 @@
+import glob
+import os
+import sys
+import time
+
+from market_parser import parse_items_html
+
+# --- Benchmark parsera HTML na zapisanych stronach (bez przeglądarki) ---
+# Użycie: python benchmark_parser.py [liczba_powtórzeń] [katalog_z_plikami_html]
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def benchmark_file(path, repeats):
+    """Parsuje plik `repeats` razy i zwraca (liczba wierszy, niekompletne wiersze, sekundy)."""
+    with open(path, encoding='utf-8') as f:
+        page_source = f.read()
+
+    rows = parse_items_html(page_source)
+    incomplete = sum(1 for row in rows if any(value is None for value in row))
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        parse_items_html(page_source)
+    elapsed = time.perf_counter() - start
+    return len(rows), incomplete, elapsed
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    fixtures_dir = sys.argv[2] if len(sys.argv) > 2 else FIXTURES_DIR
+
+    paths = sorted(glob.glob(os.path.join(fixtures_dir, '*.html')))
+    if not paths:
+        print(f"Brak plików HTML w katalogu: {fixtures_dir}")
+        return 1
+
+    for path in paths:
+        rows, incomplete, elapsed = benchmark_file(path, repeats)
+        rows_per_sec = rows * repeats / elapsed if elapsed and rows else 0.0
+        print(f"{os.path.basename(path)}: {rows} wierszy ({incomplete} niekompletnych), "
+              f"{elapsed / repeats * 1000:.3f} ms/stronę, {rows_per_sec:,.0f} wierszy/s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
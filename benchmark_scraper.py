@@ -0,0 +1,215 @@
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_market import MockMarket
+from sinks import DuckDbSink, ParquetSink, SqliteSink
+
+# --- Benchmark end-to-end: prawdziwe funkcje scrapujące nbv2.py na lokalnej atrapie bazaru ---
+# Bez sieci, Cloudflare i SQL Server: wiersze trafiają do SQLite (plik albo :memory:), DuckDB, Parquet
+# lub do listy w pamięci.
+# Użycie: python benchmark_scraper.py --mode bulk --workers 2 --pages 20 --rows 50 --latency 0.05 --churn 0.1
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BENCHMARK_CONFIG = """[Website]
+base_url = {base_url}
+server_name = 1
+language = pl
+
+[Scraper]
+extraction_mode = {mode}
+workers = {workers}
+worker_drivers_dir = {work_dir}/drivers
+
+[Browser]
+profile = {browser_profile}
+
+[Pacing]
+hover = 0, 0
+click = 0, 0
+select = 0, 0
+page = 0, 0
+cloudflare = 0, 0
+retry = 0.05, 0.05
+cloudflare_timeout = 30
+
+[RateLimit]
+requests_per_second = 1000
+burst = 1000
+
+[Session]
+enabled = false
+
+[Checkpoint]
+enabled = false
+
+[Logging]
+path = {work_dir}/nostale_scraper.log
+
+[Aggregates]
+path = {work_dir}/aggregates.sqlite
+
+[Writer]
+dead_letter_path = {work_dir}/dead_letter.jsonl
+
+[Metrics]
+json_path = {work_dir}/metrics.json
+
+[Catalog]
+cache_path = {work_dir}/catalog_cache.json
+
+[Startup]
+cache_path = {work_dir}/startup_cache.json
+"""
+
+
+class MemorySink:
+    """Zapis paczek do listy w pamięci (mierzy sam narzut scrapera i kolejki zapisu)."""
+
+    def __init__(self, columns):
+        self.stored = []
+        self.rows = 0
+        self.seconds = 0.0
+
+    def load(self, batch):
+        started = time.perf_counter()
+        self.stored.extend(batch.rows())
+        self.seconds += time.perf_counter() - started
+        self.rows += len(batch)
+
+    def close(self):
+        pass
+
+
+def create_sink(args, item_columns, work_dir):
+    """Sink wybrany w --sink; bez --sink-path SQLite pisze do pamięci, a DuckDB i Parquet do katalogu roboczego."""
+    if args.sink == 'sqlite':
+        return SqliteSink(item_columns, args.sink_path or ':memory:')
+    if args.sink == 'duckdb':
+        return DuckDbSink(item_columns, args.sink_path or os.path.join(work_dir, 'benchmark.duckdb'))
+    if args.sink == 'parquet':
+        return ParquetSink(item_columns, args.sink_path or os.path.join(work_dir, 'parquet'))
+    return MemorySink([name for name, _ in item_columns])
+
+
+def import_scraper(market, args):
+    """Importuje nbv2 i konfiguruje go plikiem wskazującym na atrapę (w katalogu tymczasowym, razem z logiem)."""
+    work_dir = tempfile.mkdtemp(prefix='nostale_benchmark_')
+    config_path = os.path.join(work_dir, 'config.ini')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        f.write(BENCHMARK_CONFIG.format(base_url=market.url, mode=args.mode, workers=args.workers,
+                                        browser_profile=args.browser_profile, work_dir=work_dir))
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+    scraper = importlib.import_module('nbv2')
+    scraper.configure(config_path)
+    scraper.configure_logging()
+    return scraper, work_dir
+
+
+def run_benchmark(args):
+    market = MockMarket(pages=args.pages, rows_per_page=args.rows, latency=args.latency, churn=args.churn).start()
+    try:
+        scraper, work_dir = import_scraper(market, args)
+        from db_writer import DatabaseWriter
+
+        # Atrapa podaje te same kategorie i subkategorie, które scrapuje nbv2
+        market.catalog = {category_value: (category_name, [(value, name) for name, value in
+                                                           scraper.subcategories.get(category_name, [])])
+                          for category_name, category_value in scraper.categories.items()}
+        jobs = [(category_name, subcategory_name, category_value, subcategory_value)
+                for category_name, category_value in scraper.categories.items()
+                for subcategory_name, subcategory_value in scraper.subcategories.get(category_name, [])]
+        category_ids = {category_name: index for index, category_name in enumerate(scraper.categories, start=1)}
+        subcategory_ids = {(category_name, subcategory_name): index
+                           for index, (category_name, subcategory_name, _, _) in enumerate(jobs, start=1)}
+
+        columns = [name for name, _ in scraper.ITEM_COLUMNS]
+        sink = create_sink(args, scraper.ITEM_COLUMNS, work_dir)
+        scraper.db_writer = DatabaseWriter(sink.load, columns, batch_rows=args.batch_rows, max_batch_age=1.0,
+                                           dead_letter_path=os.path.join(work_dir, 'dead_letter.jsonl'))
+        scraper.db_writer.start()
+
+        # Zapamiętujemy sterowniki, żeby zsumować ich zapytania do WebDrivera
+        drivers = []
+        create_driver = scraper.create_driver
+
+        def recording_create_driver(*driver_args, **driver_kwargs):
+            driver = create_driver(*driver_args, **driver_kwargs)
+            drivers.append(driver)
+            return driver
+
+        scraper.create_driver = recording_create_driver
+
+        pool = scraper.BrowserPool(market.url, size=args.workers, max_jobs=len(jobs) * args.repeats + 1)
+        try:
+            # Rozgrzanie puli (start przeglądarek i wejście na bazar) nie wlicza się do pomiaru
+            startup_started = time.perf_counter()
+            sessions = [pool.acquire() for _ in range(args.workers)]
+            for session in sessions:
+                scraper.open_bazaar(session.driver, market.url, f"rozgrzewka {session.session_id}")
+                session.on_bazaar = True
+                pool.release(session)
+            startup_seconds = time.perf_counter() - startup_started
+
+            round_trips_start = sum(driver.round_trips for driver in drivers)
+            pages_start, rows_start = market.pages_served, market.rows_served
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                results = list(executor.map(
+                    lambda job: scraper.scrape_subcategory_data(pool, *job, category_ids, subcategory_ids,
+                                                                'Brak Eventu'),
+                    jobs * args.repeats))
+            scrape_seconds = time.perf_counter() - started
+            round_trips = sum(driver.round_trips for driver in drivers) - round_trips_start
+        finally:
+            pool.close()
+        scraper.html_parse_executor.shutdown(wait=True)
+        scraper.db_writer.close()
+        total_seconds = time.perf_counter() - started
+        sink.close()
+
+        pages = market.pages_served - pages_start
+        rows = scraper.db_writer.rows_written
+        print(f"Tryb: {args.mode}, przeglądarki: {args.workers}, zadania: {len(results)} "
+              f"({sum(1 for result in results if not result)} nieudanych)")
+        print(f"Start przeglądarek: {startup_seconds:.1f} s, scrapowanie: {scrape_seconds:.1f} s, "
+              f"z opróżnieniem zapisu: {total_seconds:.1f} s")
+        print(f"Strony: {pages} ({pages / scrape_seconds:.2f} stron/s), wiersze zapisane: {rows} "
+              f"z {market.rows_served - rows_start} wysłanych")
+        print(f"Czas na wiersz: {scrape_seconds / rows * 1000 if rows else 0:.2f} ms, "
+              f"zapytania do WebDrivera: {round_trips} ({round_trips / pages if pages else 0:.1f} na stronę)")
+        print(f"Zapis ({args.sink}): {sink.rows / sink.seconds if sink.seconds else 0:,.0f} wierszy/s")
+        rss = scraper.metrics.snapshot()['observations'].get('browser_rss_mb')
+        if rss:
+            print(f"RSS przeglądarki ({args.browser_profile}): średnio {rss['avg']:.0f} MB, szczyt {rss['max']:.0f} MB")
+        print(scraper.pacer.report())
+        scraper.metrics.write_json(os.path.join(work_dir, 'metrics.json'))
+        print(f"Log scrapera i metryki faz: {work_dir}")
+        return 0 if all(results) else 1
+    finally:
+        market.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scrapera na lokalnej atrapie bazaru.")
+    parser.add_argument('--mode', choices=('bulk', 'html', 'network'), default='bulk')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=1, help="ile razy przejść wszystkie subkategorie")
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=50, help="ofert na stronę")
+    parser.add_argument('--latency', type=float, default=0.05, help="opóźnienie odpowiedzi /api/offers (s)")
+    parser.add_argument('--churn', type=float, default=0.0, help="odsetek stron renderowanych dwa razy")
+    parser.add_argument('--browser-profile', choices=('full', 'light'), default='full')
+    parser.add_argument('--sink', choices=('sqlite', 'duckdb', 'parquet', 'memory'), default='sqlite')
+    parser.add_argument('--sink-path', help="plik SQLite/DuckDB albo katalog Parquet (domyślnie w katalogu roboczym)")
+    parser.add_argument('--batch-rows', type=int, default=1000)
+    return run_benchmark(parser.parse_args())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import logging
+
+# --- Lekki profil przeglądarki: headless, bez obrazków, fontów, mediów i trackerów ---
+# Flagi ograniczające zużycie pamięci i CPU przez Chrome bez GPU i zbędnych usług w tle
+LIGHT_CHROME_ARGUMENTS = [
+    '--disable-gpu',
+    '--disable-software-rasterizer',
+    '--disable-dev-shm-usage',
+    '--disable-background-networking',
+    '--disable-renderer-backgrounding',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-breakpad',
+    '--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication',
+    '--mute-audio',
+    '--no-first-run',
+    '--blink-settings=imagesEnabled=false',
+]
+
+# Wzorce Network.setBlockedURLs ('*' dowolny ciąg znaków)
+DEFAULT_BLOCKED_URLS = [
+    # obrazki
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp',
+    # fonty
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    # media
+    '*.mp4', '*.webm', '*.mp3', '*.ogg', '*.wav', '*.m4a',
+    # trackery
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*facebook.net*',
+    '*hotjar.com*', '*clarity.ms*',
+]
+
+NAVIGATION_TIMING_JS = """
+var entry = performance.getEntriesByType('navigation')[0];
+return entry ? entry.duration : null;
+"""
+
+_psutil_missing_logged = False
+
+
+def apply_light_profile(chrome_options, window_size='1024,768'):
+    """Dodaje do opcji Chrome flagi lekkiego profilu i wyłącza ładowanie obrazków w preferencjach."""
+    for argument in LIGHT_CHROME_ARGUMENTS:
+        chrome_options.add_argument(argument)
+    chrome_options.add_argument(f'--window-size={window_size}')
+    chrome_options.add_experimental_option('prefs', {
+        'profile.managed_default_content_settings.images': 2,
+        'profile.default_content_setting_values.notifications': 2,
+    })
+
+
+def block_resources(driver, patterns):
+    """Blokuje żądania pasujące do wzorców przez CDP (wymaga włączonej domeny Network)."""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+
+
+def navigation_time_ms(driver):
+    """Czas ładowania bieżącej strony (Navigation Timing) w ms albo None."""
+    try:
+        duration = driver.execute_script(NAVIGATION_TIMING_JS)
+    except Exception as e:
+        logging.warning(f"Nie udało się odczytać czasu ładowania strony: {e}")
+        return None
+    return float(duration) if duration else None
+
+
+def browser_rss_bytes(driver):
+    """
+    Pamięć RSS procesu przeglądarki razem z procesami potomnymi (renderery, GPU) w bajtach albo None.
+    Wymaga opcjonalnego pakietu psutil.
+    """
+    global _psutil_missing_logged
+    try:
+        import psutil
+    except ImportError:
+        if not _psutil_missing_logged:
+            logging.info("Brak pakietu psutil - pomiar pamięci przeglądarek jest wyłączony.")
+            _psutil_missing_logged = True
+        return None
+
+    pid = getattr(driver, 'browser_pid', None)
+    if not pid:
+        return None
+    try:
+        process = psutil.Process(pid)
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+    except psutil.Error:
+        return None
@@ -0,0 +1,86 @@
+import logging
+
+import pyodbc
+
+# --- Ładowanie paczek bezpośrednio przez pyodbc (fast_executemany), bez pandas/SQLAlchemy ---
+
+
+class BulkLoader:
+    """
+    Zapisuje paczki kolumnowe (ColumnBatch) do tabeli SQL Server.
+    mode='direct'  - fast_executemany prosto do tabeli docelowej,
+    mode='staging' - fast_executemany do tymczasowej tabeli #staging i jeden INSERT ... SELECT do tabeli docelowej.
+    Połączenie jest tworzone leniwie w wątku, który woła load(), i odtwarzane po błędzie.
+    """
+
+    def __init__(self, conn_str, table, columns, mode='direct'):
+        if mode not in ('direct', 'staging'):
+            raise ValueError(f"Nieznany tryb ładowania: {mode}")
+        self.conn_str = conn_str
+        self.table = table
+        self.columns = columns
+        self.mode = mode
+        self.staging_table = f"#{table}_staging"
+        self._conn = None
+
+        column_list = ', '.join(name for name, _ in columns)
+        placeholders = ', '.join('?' for _ in columns)
+        target = self.staging_table if mode == 'staging' else table
+        self._insert_sql = f"INSERT INTO {target} ({column_list}) VALUES ({placeholders})"
+        self._merge_sql = f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {self.staging_table}"
+        self._input_sizes = [_input_size(sql_type) for _, sql_type in columns]
+
+    def _connect(self):
+        conn = pyodbc.connect(self.conn_str, autocommit=False)
+        if self.mode == 'staging':
+            column_defs = ', '.join(f"{name} {sql_type}" for name, sql_type in self.columns)
+            with conn.cursor() as cursor:
+                cursor.execute(f"CREATE TABLE {self.staging_table} ({column_defs})")
+            conn.commit()
+        return conn
+
+    def load(self, batch):
+        """Zapisuje paczkę w jednej transakcji."""
+        if self._conn is None:
+            self._conn = self._connect()
+
+        try:
+            with self._conn.cursor() as cursor:
+                cursor.fast_executemany = True
+                if None not in self._input_sizes:
+                    cursor.setinputsizes(self._input_sizes)
+                cursor.executemany(self._insert_sql, batch.rows())
+                if self.mode == 'staging':
+                    cursor.execute(self._merge_sql)
+                    cursor.execute(f"TRUNCATE TABLE {self.staging_table}")
+            self._conn.commit()
+        except Exception:
+            self._reset()
+            raise
+
+    def _reset(self):
+        try:
+            self._conn.rollback()
+            self._conn.close()
+        except Exception as e:
+            logging.warning(f"Błąd podczas zamykania połączenia ładowania paczek: {e}")
+        self._conn = None
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _input_size(sql_type):
+    """Rozmiary parametrów dla fast_executemany (ogranicza bufory NVARCHAR do rozmiaru kolumny)."""
+    sql_type = sql_type.upper()
+    if sql_type.startswith('NVARCHAR('):
+        return pyodbc.SQL_WVARCHAR, int(sql_type[len('NVARCHAR('):-1]), 0
+    if sql_type in ('INT', 'INTEGER'):
+        return pyodbc.SQL_INTEGER, 0, 0
+    if sql_type == 'BIGINT':
+        return pyodbc.SQL_BIGINT, 0, 0
+    if sql_type == 'DATETIME':
+        return pyodbc.SQL_TYPE_TIMESTAMP, 23, 3
+    return None
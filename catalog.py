@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import time
+from fnmatch import fnmatchcase
+
+# --- Katalog kategorii i subkategorii odczytany z listy rozwijanej bazaru (z pamięcią podręczną z TTL) ---
+# Jedno wywołanie execute_async_script przechodzi po wszystkich opcjach #categoryDropdown i po każdej zmianie
+# czeka, aż #subCategoryDropdown dostanie nowe opcje. Na końcu przywraca poprzedni wybór.
+DISCOVER_CATALOG_JS = """
+var done = arguments[arguments.length - 1];
+var timeoutMs = arguments[0];
+var categorySelect = document.getElementById('categoryDropdown');
+var subcategorySelect = document.getElementById('subCategoryDropdown');
+if (!categorySelect || !subcategorySelect) { done(null); return; }
+
+function options(select) {
+    return Array.prototype.map.call(select.options, function (option) {
+        return [option.textContent.trim(), option.value];
+    }).filter(function (option) { return option[1] !== ''; });
+}
+function choose(value) {
+    categorySelect.value = value;
+    categorySelect.dispatchEvent(new Event('input', {bubbles: true}));
+    categorySelect.dispatchEvent(new Event('change', {bubbles: true}));
+}
+
+var originalValue = categorySelect.value;
+var categories = options(categorySelect);
+var catalog = [];
+var previous = JSON.stringify(options(subcategorySelect));
+
+function next(index) {
+    if (index >= categories.length) {
+        choose(originalValue);
+        done(catalog);
+        return;
+    }
+    choose(categories[index][1]);
+    var started = Date.now();
+    (function poll() {
+        var current = JSON.stringify(options(subcategorySelect));
+        // Pierwsza kategoria może już być wybrana, więc lista nie musi się zmienić; pusta lista to jeszcze ładowanie
+        var changed = current !== previous || (index === 0 && categories[0][1] === originalValue);
+        if ((changed && current !== '[]') || Date.now() - started > timeoutMs) {
+            previous = current;
+            catalog.push([categories[index][0], categories[index][1], JSON.parse(current)]);
+            next(index + 1);
+        } else {
+            setTimeout(poll, 25);
+        }
+    })();
+}
+next(0);
+"""
+
+
+def discover_catalog(driver, timeout_ms=2000):
+    """
+    Czyta katalog z otwartego bazaru. Zwraca listę [nazwa kategorii, wartość, [[nazwa subkategorii, wartość], ...]]
+    albo None, gdy na stronie nie ma list rozwijanych.
+    """
+    driver.set_script_timeout(max(30.0, timeout_ms / 1000 * 20))
+    return driver.execute_async_script(DISCOVER_CATALOG_JS, timeout_ms)
+
+
+def load_cached_catalog(path, ttl_seconds):
+    """Zwraca katalog z pliku, jeśli jest młodszy niż ttl_seconds, w przeciwnym razie None."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning(f"Uszkodzony plik katalogu {path}: {e}")
+        return None
+    if time.time() - cache.get('discovered_at', 0) > ttl_seconds:
+        logging.info(f"Katalog z pliku {path} jest przeterminowany.")
+        return None
+    return cache['catalog']
+
+
+def save_catalog(path, catalog):
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({'discovered_at': time.time(), 'catalog': catalog}, f, ensure_ascii=False, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def parse_patterns(text):
+    """Wzorce rozdzielone przecinkami (puste pomijane)."""
+    return [pattern.strip() for pattern in (text or '').split(',') if pattern.strip()]
+
+
+def _matches(patterns, category_name, category_value, subcategory_name, subcategory_value):
+    """
+    Wzorzec fnmatch (bez rozróżniania wielkości liter) porównywany z 'kategoria/subkategoria', z samą nazwą
+    subkategorii i z jej wartością, np. 'Główny Przedmiot/*', 'Składniki', '3353'.
+    """
+    candidates = (f"{category_name}/{subcategory_name}".casefold(), subcategory_name.casefold(),
+                  f"{category_value}/{subcategory_value}", subcategory_value)
+    return any(fnmatchcase(candidate, pattern.casefold()) for pattern in patterns for candidate in candidates)
+
+
+def select_from_catalog(catalog, include, exclude):
+    """
+    Zwraca (categories, subcategories) w kształcie słowników nbv2 z subkategorii pasujących do któregoś
+    wzorca include i do żadnego wzorca exclude.
+    """
+    categories = {}
+    subcategories = {}
+    for category_name, category_value, subcategory_entries in catalog:
+        chosen = [(subcategory_name, subcategory_value)
+                  for subcategory_name, subcategory_value in subcategory_entries
+                  if _matches(include, category_name, category_value, subcategory_name, subcategory_value)
+                  and not _matches(exclude, category_name, category_value, subcategory_name, subcategory_value)]
+        if chosen:
+            categories[category_name] = category_value
+            subcategories[category_name] = chosen
+    return categories, subcategories
+
+
+def catalog_from_dicts(categories, subcategories):
+    """Katalog (format discover_catalog) ze słowników categories/subcategories."""
+    return [[category_name, category_value,
+             [list(entry) for entry in subcategories.get(category_name, [])]]
+            for category_name, category_value in categories.items()]
@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+# --- Punkty kontrolne przebiegu: ostatnia zapisana strona każdej subkategorii (lokalny plik SQLite) ---
+CHECKPOINT_SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+        run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event TEXT,
+        started_at TEXT NOT NULL,
+        finished_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        run_id INTEGER NOT NULL REFERENCES runs(run_id),
+        category TEXT NOT NULL,
+        subcategory TEXT NOT NULL,
+        last_page INTEGER NOT NULL,
+        first_row_fingerprint TEXT,
+        completed INTEGER NOT NULL DEFAULT 0,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (run_id, category, subcategory)
+    )
+    """,
+]
+
+Checkpoint = namedtuple('Checkpoint', ['last_page', 'fingerprint', 'completed'])
+
+
+def page_fingerprint(rows, fields):
+    """Odcisk pierwszego wiersza strony (pozwala sprawdzić po wznowieniu, czy strona się nie przesunęła)."""
+    if not rows:
+        return None
+    key = '|'.join(str(rows[0][i]) for i in fields).encode('utf-8')
+    return hashlib.blake2b(key, digest_size=8).hexdigest()
+
+
+class CheckpointStore:
+    """
+    Trwały zapis postępu przebiegu. Strona jest zapisywana dopiero wtedy, gdy DatabaseWriter potwierdzi
+    zapis jej wierszy, i tylko jako następna po ostatniej zapisanej - punkt kontrolny nigdy nie wyprzedza danych.
+    Połączenie SQLite jest współdzielone przez wątki scraperów i wątek zapisu (chronione blokadą).
+    """
+
+    def __init__(self, path, run_id=None):
+        self.path = path
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            for statement in CHECKPOINT_SCHEMA_SQL:
+                self._conn.execute(statement)
+
+    def find_unfinished_run(self):
+        """Zwraca (run_id, event) ostatniego niedokończonego przebiegu albo None."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT run_id, event FROM runs WHERE finished_at IS NULL ORDER BY run_id DESC LIMIT 1").fetchone()
+
+    def start_run(self, event_name):
+        """Rozpoczyna nowy przebieg. Zwraca run_id."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("INSERT INTO runs (event, started_at) VALUES (?, ?)", (event_name, _now()))
+            self.run_id = cursor.lastrowid
+        logging.info(f"Rozpoczęto przebieg {self.run_id}.")
+        return self.run_id
+
+    def get(self, category, subcategory):
+        """Zwraca Checkpoint dla subkategorii w bieżącym przebiegu albo None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_page, first_row_fingerprint, completed FROM checkpoints "
+                "WHERE run_id = ? AND category = ? AND subcategory = ?",
+                (self.run_id, category, subcategory)).fetchone()
+        return Checkpoint(row[0], row[1], bool(row[2])) if row else None
+
+    def record_page(self, category, subcategory, page, fingerprint):
+        """
+        Zapisuje stronę jako ostatnią zapisaną (wołane przez wątek zapisu po commicie).
+        Przyjmowana jest tylko strona następna po ostatniej (albo ta sama, zapisana ponownie), więc strona
+        po paczce, która trafiła do dead-letter, nie przesuwa punktu kontrolnego.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT last_page FROM checkpoints WHERE run_id = ? AND category = ? AND subcategory = ?",
+                (self.run_id, category, subcategory)).fetchone()
+            last_page = row[0] if row else 0
+            if page not in (last_page, last_page + 1):
+                logging.warning(f"Punkt kontrolny '{subcategory}': strona {page} zapisana po stronie {last_page} "
+                                f"- pomijam (brakuje stron pomiędzy).")
+                return
+            self._conn.execute(
+                "INSERT INTO checkpoints (run_id, category, subcategory, last_page, first_row_fingerprint, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (run_id, category, subcategory) DO UPDATE SET last_page = excluded.last_page, "
+                "first_row_fingerprint = excluded.first_row_fingerprint, updated_at = excluded.updated_at",
+                (self.run_id, category, subcategory, page, fingerprint, _now()))
+
+    def mark_completed(self, category, subcategory, last_page):
+        """Oznacza subkategorię jako ukończoną, jeśli zapisane zostały wszystkie jej strony (do last_page)."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT last_page FROM checkpoints WHERE run_id = ? AND category = ? AND subcategory = ?",
+                (self.run_id, category, subcategory)).fetchone()
+            stored_page = row[0] if row else 0
+            if stored_page < last_page:
+                logging.warning(f"Punkt kontrolny '{subcategory}': zapisano {stored_page} z {last_page} stron "
+                                f"- subkategoria nie zostanie oznaczona jako ukończona.")
+                return
+            self._conn.execute(
+                "INSERT INTO checkpoints (run_id, category, subcategory, last_page, completed, updated_at) "
+                "VALUES (?, ?, ?, ?, 1, ?) "
+                "ON CONFLICT (run_id, category, subcategory) DO UPDATE SET completed = 1, "
+                "updated_at = excluded.updated_at",
+                (self.run_id, category, subcategory, last_page, _now()))
+
+    def finish_run(self, job_keys):
+        """Zamyka przebieg, jeśli wszystkie subkategorie (category, subcategory) są ukończone. Zwraca True/False."""
+        with self._lock, self._conn:
+            completed = {(category, subcategory) for category, subcategory in self._conn.execute(
+                "SELECT category, subcategory FROM checkpoints WHERE run_id = ? AND completed = 1", (self.run_id,))}
+            missing = [key for key in job_keys if key not in completed]
+            if missing:
+                logging.warning(f"Przebieg {self.run_id} niedokończony: {len(missing)} subkategorii do wznowienia "
+                                f"(--resume).")
+                return False
+            self._conn.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (_now(), self.run_id))
+        logging.info(f"Przebieg {self.run_id} zakończony.")
+        return True
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
@@ -0,0 +1,85 @@
+import re
+from datetime import timedelta
+from functools import lru_cache
+
+# --- Czyszczenie całych stron naraz: liczby, czas do wygaśnięcia i jeden znacznik czasu na stronę ---
+# Usuwane są tylko separatory tysięcy i dopiski, których używa strona; cokolwiek innego to błąd konwersji
+_QUANTITY_NOISE = re.compile(r'\s+')
+_PRICE_NOISE = re.compile(r'\s+|,|Gold|szt\.')
+_DIGITS_ONLY = re.compile(r'[0-9]+')
+_CLOCK_PATTERN = re.compile(r'^\s*(\d+):(\d{1,2})(?::(\d{1,2}))?\s*$')
+_DURATION_PATTERN = re.compile(
+    r'(\d+)\s*(dni|dnia|dzień|dzien|d|godzin\w*|godz|h|g|minut\w*|min|m|sekund\w*|sek|s)(?![a-ząćęłńóśźż])',
+    re.IGNORECASE)
+_UNIT_SECONDS = {'d': 86400, 'g': 3600, 'h': 3600, 'm': 60, 's': 1}
+
+
+def time_remaining_to_seconds(time_remaining):
+    """Zamienia tekst TimeRemaining (np. '1 dzień 4 godz.', '45 min.', '12:30:00') na sekundy albo None."""
+    if not isinstance(time_remaining, str):
+        return None
+    clock = _CLOCK_PATTERN.match(time_remaining)
+    if clock:
+        hours, minutes, seconds = clock.groups()
+        return int(hours) * 3600 + int(minutes) * 60 + int(seconds or 0)
+
+    total = None
+    for value, unit in _DURATION_PATTERN.findall(time_remaining):
+        total = (total or 0) + int(value) * _UNIT_SECONDS[unit[0].lower()]
+    return total
+
+
+# Na stronie powtarza się kilka-kilkanaście różnych tekstów czasu, więc wynik parsowania jest zapamiętywany
+_cached_seconds = lru_cache(maxsize=4096)(time_remaining_to_seconds)
+
+
+def _int_column(values, noise):
+    """
+    Zamienia kolumnę tekstów ('2,500 Gold szt.', '1 000') na liczby, usuwając dopasowania noise.
+    Zwraca (wartości, liczba błędów).
+    """
+    cleaned = []
+    failures = 0
+    for value in values:
+        if isinstance(value, int):
+            cleaned.append(value)
+            continue
+        digits = noise.sub('', value) if isinstance(value, str) else ''
+        if _DIGITS_ONLY.fullmatch(digits):
+            cleaned.append(int(digits))
+        else:
+            cleaned.append(None)
+            failures += 1
+    return cleaned, failures
+
+
+def clean_page(raw_rows, scraped_at):
+    """
+    Czyści stronę surowych krotek (nazwa, ilość, cena, czas) kolumnami.
+    Zwraca (kolumny, błędy): kolumny to słownik name, quantity, price, time_remaining, expires_in_seconds,
+    expires_at (wygaśnięcie liczone od scraped_at), a błędy - liczba nieudanych konwersji dla każdego pola.
+    """
+    if not raw_rows:
+        empty = {name: [] for name in ('name', 'quantity', 'price', 'time_remaining', 'expires_in_seconds',
+                                       'expires_at')}
+        return empty, {'quantity': 0, 'price': 0, 'time_remaining': 0}
+
+    names, quantities, prices, times = (list(column) for column in zip(*raw_rows))
+    quantities, quantity_failures = _int_column(quantities, _QUANTITY_NOISE)
+    prices, price_failures = _int_column(prices, _PRICE_NOISE)
+    seconds = [value if isinstance(value, int) else _cached_seconds(value) for value in times]
+    expires_at = [scraped_at + timedelta(seconds=value) if value is not None else None for value in seconds]
+    columns = {
+        'name': names,
+        'quantity': quantities,
+        'price': prices,
+        'time_remaining': [str(value) if isinstance(value, int) else value for value in times],
+        'expires_in_seconds': seconds,
+        'expires_at': expires_at,
+    }
+    failures = {
+        'quantity': quantity_failures,
+        'price': price_failures,
+        'time_remaining': sum(1 for value in seconds if value is None),
+    }
+    return columns, failures
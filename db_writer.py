@@ -0,0 +1,142 @@
+import json
+import logging
+import queue
+import threading
+import time
+
+# --- Asynchroniczny zapis do bazy (write-behind) ---
+# Scrapery oddają wiersze do kolejki i od razu wracają do przeglądarki; osobny wątek łączy je w paczki i zapisuje.
+_STOP = object()
+
+
+class ColumnBatch:
+    """Paczka wierszy trzymana kolumnowo (lista wartości na kolumnę) zamiast słownika na wiersz."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.values = [[] for _ in columns]
+
+    def extend(self, rows):
+        """Dopisuje krotki w kolejności kolumn."""
+        for column_values, values in zip(self.values, zip(*rows)):
+            column_values.extend(values)
+
+    def rows(self):
+        """Krotki parametrów dla executemany."""
+        return list(zip(*self.values))
+
+    def __len__(self):
+        return len(self.values[0]) if self.values else 0
+
+
+class DatabaseWriter(threading.Thread):
+    """
+    Wątek zapisujący wiersze paczkami. Paczka jest zapisywana, gdy osiągnie batch_rows wierszy
+    albo gdy najstarszy wiersz czeka dłużej niż max_batch_age sekund.
+    Pełna kolejka blokuje submit() (backpressure), a nieudane paczki trafiają do pliku dead-letter.
+    Funkcje on_stored przekazane z wierszami są wołane po zapisie paczki, która je zawiera (nie po dead-letter).
+    """
+
+    def __init__(self, write_batch, columns, max_queue_pages=50, batch_rows=1000, max_batch_age=5.0, max_retries=3,
+                 retry_delay=2.0, dead_letter_path='dead_letter.jsonl'):
+        super().__init__(name='db-writer', daemon=True)
+        self.write_batch = write_batch
+        self.columns = columns
+        self.batch_rows = batch_rows
+        self.max_batch_age = max_batch_age
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.dead_letter_path = dead_letter_path
+        self.rows_written = 0
+        self.rows_dead_lettered = 0
+        self._queue = queue.Queue(maxsize=max_queue_pages)
+
+    def submit(self, rows, on_stored=None):
+        """
+        Przekazuje wiersze (krotki w kolejności columns) do zapisu; blokuje, gdy kolejka jest pełna.
+        on_stored() jest wołane w wątku zapisu, gdy wiersze (i wszystkie przekazane wcześniej) są w bazie.
+        """
+        if not rows and on_stored is None:
+            return
+        try:
+            self._queue.put_nowait((rows, on_stored))
+        except queue.Full:
+            logging.warning("Kolejka zapisu do bazy jest pełna - scraper czeka na zwolnienie miejsca.")
+            self._queue.put((rows, on_stored))
+
+    def close(self):
+        """Zapisuje wszystko, co zostało w kolejce, i kończy wątek."""
+        self._queue.put(_STOP)
+        self.join()
+        logging.info(f"Zapis do bazy zakończony: {self.rows_written} wierszy zapisanych, "
+                     f"{self.rows_dead_lettered} w pliku {self.dead_letter_path}.")
+
+    def run(self):
+        batch = ColumnBatch(self.columns)
+        batch_callbacks = []
+        batch_started = None
+        stopping = False
+
+        while not stopping:
+            timeout = None
+            if batch:
+                timeout = max(0.0, self.max_batch_age - (time.monotonic() - batch_started))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stopping = True
+            elif item is not None:
+                rows, on_stored = item
+                if rows:
+                    if not batch:
+                        batch_started = time.monotonic()
+                    batch.extend(rows)
+                if on_stored is not None:
+                    batch_callbacks.append(on_stored)
+
+            batch_expired = batch and time.monotonic() - batch_started >= self.max_batch_age
+            if batch and (stopping or batch_expired or len(batch) >= self.batch_rows):
+                if self._flush(batch):
+                    self._notify(batch_callbacks)
+                batch = ColumnBatch(self.columns)
+                batch_callbacks = []
+                batch_started = None
+            elif not batch and batch_callbacks:
+                # Same znaczniki bez wierszy - wszystko przed nimi jest już zapisane
+                self._notify(batch_callbacks)
+                batch_callbacks = []
+
+    def _flush(self, batch):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self.write_batch(batch)
+                self.rows_written += len(batch)
+                logging.info(f"Zapisano paczkę {len(batch)} rekordów do bazy danych.")
+                return True
+            except Exception as db_error:
+                logging.error(f"Błąd zapisu paczki {len(batch)} rekordów (próba {attempt}/{self.max_retries}): {db_error}")
+                if attempt < self.max_retries:
+                    time.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+        self._dead_letter(batch)
+        return False
+
+    def _notify(self, callbacks):
+        for on_stored in callbacks:
+            try:
+                on_stored()
+            except Exception as e:
+                logging.error(f"Błąd obsługi potwierdzenia zapisu: {e}")
+
+    def _dead_letter(self, batch):
+        try:
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                for row in batch.rows():
+                    f.write(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False, default=str) + '\n')
+            self.rows_dead_lettered += len(batch)
+            logging.error(f"Paczka {len(batch)} rekordów zapisana do pliku {self.dead_letter_path}.")
+        except OSError as e:
+            logging.critical(f"Nie udało się zapisać paczki {len(batch)} rekordów do pliku dead-letter: {e}")
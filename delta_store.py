@@ -0,0 +1,205 @@
+import hashlib
+import logging
+import threading
+from datetime import timedelta
+
+# --- Zapis tylko zmian: porównanie ofert z ostatnim znanym stanem subkategorii ---
+DELTA_SCHEMA_SQL = [
+    """
+    IF OBJECT_ID('offer_state', 'U') IS NULL
+    CREATE TABLE offer_state (
+        SubCategoryID INT NOT NULL FOREIGN KEY REFERENCES subcategories(id),
+        Fingerprint BIGINT NOT NULL,
+        Name NVARCHAR(255) NOT NULL,
+        Quantity INT,
+        Price INT,
+        ExpiresAt DATETIME2(0),
+        FirstSeen DATETIME2(0) NOT NULL,
+        INDEX IX_offer_state_subcategory (SubCategoryID)
+    )
+    """,
+    """
+    IF OBJECT_ID('offer_endings', 'U') IS NULL
+    CREATE TABLE offer_endings (
+        SubCategoryID INT NOT NULL FOREIGN KEY REFERENCES subcategories(id),
+        Fingerprint BIGINT NOT NULL,
+        Name NVARCHAR(255) NOT NULL,
+        Quantity INT,
+        Price INT,
+        ExpiresAt DATETIME2(0),
+        FirstSeen DATETIME2(0) NOT NULL,
+        EndedAt DATETIME2(0) NOT NULL,
+        Reason NVARCHAR(10) NOT NULL
+    )
+    """,
+]
+
+
+def offer_fingerprint(subcategory_id, name, quantity, price, expires_at, tolerance_seconds):
+    """64-bitowy odcisk oferty: nazwa + ilość + cena + wyliczone wygaśnięcie (zaokrąglone do tolerancji)."""
+    expiry_bucket = int(expires_at.timestamp() // tolerance_seconds) if expires_at else ''
+    key = f"{subcategory_id}|{name}|{quantity}|{price}|{expiry_bucket}".encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'big', signed=True)
+
+
+class DeltaTracker:
+    """
+    Trzyma w pamięci aktywne oferty każdej subkategorii (wczytane z offer_state) i przepuszcza do zapisu
+    tylko oferty nowe lub zmienione. Oferta pasuje do znanej, gdy nazwa, ilość i cena są równe, a wyliczone
+    wygaśnięcie różni się najwyżej o tolerance_seconds (TimeRemaining ma dokładność do godzin/minut).
+    Oferty, których nie było w pełnym przebiegu subkategorii, są zapisywane w offer_endings.
+    Nowe oferty stają się znane dopiero po confirm(), czyli po zapisie ich wierszy - oferta z paczki, która
+    trafiła do dead-letter, zostanie przy następnym przebiegu wysłana ponownie.
+    """
+
+    def __init__(self, columns, tolerance_seconds=3600):
+        self.tolerance = timedelta(seconds=tolerance_seconds)
+        self.tolerance_seconds = tolerance_seconds
+        index = {name: position for position, name in enumerate(columns)}
+        self._fields = [index[name] for name in
+                        ('SubCategoryID', 'Name', 'Quantity', 'Price', 'ExpiresAt', 'DataScrapingu')]
+        self._lock = threading.Lock()
+        # subkategoria -> {(nazwa, ilość, cena): [(odcisk, wygaśnięcie, pierwsze wystąpienie), ...]}
+        self._known = {}
+        # subkategoria -> (niedopasowane znane oferty, oferty widziane w tym przebiegu)
+        self._jobs = {}
+        # subkategoria -> (nowy stan, zakończone oferty) do zapisania w save(); opróżniane przy każdym save()
+        self._finished = {}
+
+    def load(self, conn):
+        """Wczytuje ostatni znany stan wszystkich subkategorii (jedno zapytanie na starcie)."""
+        with conn.cursor() as cursor:
+            cursor.execute(DELTA_SCHEMA_SQL[0])
+            cursor.execute(DELTA_SCHEMA_SQL[1])
+            conn.commit()
+            cursor.execute("SELECT SubCategoryID, Fingerprint, Name, Quantity, Price, ExpiresAt, FirstSeen "
+                           "FROM offer_state")
+            for subcategory_id, fingerprint, name, quantity, price, expires_at, first_seen in cursor.fetchall():
+                self._known.setdefault(subcategory_id, {}).setdefault((name, quantity, price), []).append(
+                    (fingerprint, expires_at, first_seen))
+        logging.info(f"Delta: wczytano stan {sum(len(offers) for state in self._known.values() for offers in state.values())} "
+                     f"aktywnych ofert z {len(self._known)} subkategorii.")
+
+    def begin(self, subcategory_id):
+        """Rozpoczyna przebieg subkategorii."""
+        with self._lock:
+            known = self._known.get(subcategory_id, {})
+            self._jobs[subcategory_id] = ({key: list(offers) for key, offers in known.items()}, {})
+
+    def filter_rows(self, rows):
+        """
+        Zwraca (wiersze nowych lub zmienionych ofert, nowe oferty do confirm()). Znane oferty są od razu
+        oznaczane jako widziane; nowe - dopiero przez confirm() po zapisie ich wierszy.
+        """
+        changed = []
+        new_offers = []
+        with self._lock:
+            for row in rows:
+                subcategory_id, name, quantity, price, expires_at, scraped_at = (row[i] for i in self._fields)
+                job = self._jobs.get(subcategory_id)
+                if job is None:
+                    changed.append(row)
+                    continue
+                unmatched, seen = job
+                key = (name, quantity, price)
+
+                match = None
+                for candidate in unmatched.get(key, ()):
+                    known_expiry = candidate[1]
+                    if (known_expiry is None and expires_at is None) or (
+                            known_expiry is not None and expires_at is not None
+                            and abs(known_expiry - expires_at) <= self.tolerance):
+                        match = candidate
+                        break
+
+                if match is not None:
+                    unmatched[key].remove(match)
+                    seen.setdefault(key, []).append(match)
+                else:
+                    fingerprint = offer_fingerprint(subcategory_id, name, quantity, price, expires_at,
+                                                    self.tolerance_seconds)
+                    new_offers.append((subcategory_id, key, (fingerprint, expires_at, scraped_at)))
+                    changed.append(row)
+        return changed, new_offers
+
+    def confirm(self, new_offers):
+        """Oznacza nowe oferty z filter_rows() jako widziane (wołać po zapisie ich wierszy)."""
+        with self._lock:
+            for subcategory_id, key, offer in new_offers:
+                job = self._jobs.get(subcategory_id)
+                if job is not None:
+                    job[1].setdefault(key, []).append(offer)
+
+    def finish(self, subcategory_id, complete, ended_at):
+        """
+        Kończy przebieg subkategorii. Tylko pełny przebieg (complete=True) zamyka niewidziane oferty;
+        po przerwanym przebiegu stan jest jedynie uzupełniany o nowe oferty.
+        Zwraca słownik ze statystykami: seen, new, ended.
+        """
+        with self._lock:
+            job = self._jobs.pop(subcategory_id, None)
+            if job is None:
+                return {'seen': 0, 'new': 0, 'ended': 0}
+            unmatched, seen = job
+
+            new_state = {key: list(offers) for key, offers in seen.items()}
+            endings = []
+            if complete:
+                for (name, quantity, price), offers in unmatched.items():
+                    for fingerprint, expires_at, first_seen in offers:
+                        reason = 'expired' if expires_at is not None and expires_at <= ended_at else 'removed'
+                        endings.append((subcategory_id, fingerprint, name, quantity, price, expires_at,
+                                        first_seen, ended_at, reason))
+            else:
+                for key, offers in unmatched.items():
+                    new_state.setdefault(key, []).extend(offers)
+
+            previous_count = sum(len(offers) for offers in self._known.get(subcategory_id, {}).values())
+            seen_count = sum(len(offers) for offers in seen.values())
+            matched_count = previous_count - sum(len(offers) for offers in unmatched.values())
+
+            self._known[subcategory_id] = new_state
+            previous_endings = self._finished.get(subcategory_id, (None, []))[1]
+            self._finished[subcategory_id] = (new_state, previous_endings + endings)
+            return {'seen': seen_count, 'new': seen_count - matched_count, 'ended': len(endings)}
+
+    def save(self, conn):
+        """
+        Zapisuje stan subkategorii zakończonych od poprzedniego save() i ich zakończone oferty (wołać po zapisie
+        wszystkich wierszy subkategorii). Po błędzie stan wraca do kolejki na następne save().
+        """
+        with self._lock:
+            finished = self._finished
+            self._finished = {}
+        if not finished:
+            return
+
+        try:
+            self._write(conn, finished)
+        except Exception:
+            conn.rollback()
+            with self._lock:
+                for subcategory_id, (state, endings) in finished.items():
+                    newer_state, newer_endings = self._finished.get(subcategory_id, (state, []))
+                    self._finished[subcategory_id] = (newer_state, endings + newer_endings)
+            raise
+
+    def _write(self, conn, finished):
+        with conn.cursor() as cursor:
+            cursor.fast_executemany = True
+            for subcategory_id, (state, endings) in finished.items():
+                cursor.execute("DELETE FROM offer_state WHERE SubCategoryID = ?", subcategory_id)
+                state_rows = [(subcategory_id, fingerprint, name, quantity, price, expires_at, first_seen)
+                              for (name, quantity, price), offers in state.items()
+                              for fingerprint, expires_at, first_seen in offers]
+                if state_rows:
+                    cursor.executemany(
+                        "INSERT INTO offer_state (SubCategoryID, Fingerprint, Name, Quantity, Price, ExpiresAt, "
+                        "FirstSeen) VALUES (?, ?, ?, ?, ?, ?, ?)", state_rows)
+                if endings:
+                    cursor.executemany(
+                        "INSERT INTO offer_endings (SubCategoryID, Fingerprint, Name, Quantity, Price, ExpiresAt, "
+                        "FirstSeen, EndedAt, Reason) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", endings)
+                logging.info(f"Delta: subkategoria {subcategory_id} - {len(state_rows)} aktywnych ofert, "
+                             f"{len(endings)} zakończonych.")
+        conn.commit()
@@ -0,0 +1,86 @@
+from html.parser import HTMLParser
+
+# --- Parser strony z wynikami (offline, na podstawie driver.page_source) ---
+# Ten sam kontrakt co selektory w nbv2.py: button.all-searches-p oraz kolumny pozycjonowane przez 'left: Npx;'.
+FIELD_NAME = 0
+FIELD_QUANTITY = 1
+FIELD_PRICE = 2
+FIELD_TIME_REMAINING = 3
+
+# (tag, klasa CSS lub None, fragment stylu lub None) -> indeks pola w wierszu
+FIELD_SELECTORS = [
+    ('button', 'all-searches-p', None, FIELD_NAME),
+    ('p', None, 'left:372px;', FIELD_QUANTITY),
+    ('button', None, 'left:470px;', FIELD_PRICE),
+    ('p', None, 'left:612px;', FIELD_TIME_REMAINING),
+]
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+
+class ItemsHTMLParser(HTMLParser):
+    """Wyciąga wiersze (nazwa, ilość, cena, czas) z elementów .item w jednym przebiegu po HTML."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self._depth = 0
+        self._item_depth = None
+        self._row = None
+        self._field = None
+        self._field_depth = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == 'br' and self._field is not None:
+                self._text.append('\n')
+            return
+        self._depth += 1
+        attributes = dict(attrs)
+        classes = (attributes.get('class') or '').split()
+
+        if self._item_depth is None:
+            if 'item' in classes:
+                self._item_depth = self._depth
+                self._row = [None, None, None, None]
+            return
+
+        if self._field is None:
+            style = (attributes.get('style') or '').replace(' ', '').lower()
+            for selector_tag, selector_class, selector_style, field in FIELD_SELECTORS:
+                if tag != selector_tag or self._row[field] is not None:
+                    continue
+                if selector_class is not None and selector_class not in classes:
+                    continue
+                if selector_style is not None and selector_style not in style:
+                    continue
+                self._field = field
+                self._field_depth = self._depth
+                self._text = []
+                break
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        if self._field is not None and self._depth == self._field_depth:
+            self._row[self._field] = ' '.join(''.join(self._text).split())
+            self._field = None
+            self._field_depth = None
+        if self._item_depth is not None and self._depth == self._item_depth:
+            self.rows.append(tuple(self._row))
+            self._item_depth = None
+            self._row = None
+        self._depth -= 1
+
+    def handle_data(self, data):
+        if self._field is not None:
+            self._text.append(data)
+
+
+def parse_items_html(page_source):
+    """Parsuje snapshot strony i zwraca listę krotek (nazwa, ilość, cena, czas); brakujące pola to None."""
+    parser = ItemsHTMLParser()
+    parser.feed(page_source)
+    parser.close()
+    return parser.rows
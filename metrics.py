@@ -0,0 +1,163 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Metryki przebiegu: czasy faz, liczniki i obserwacje, z eksportem JSON i Prometheus ---
+
+
+class Metrics:
+    """
+    Zbiera czasy faz (np. driver_startup, page_load, extraction), liczniki (np. stale_element_retries)
+    i obserwacje (np. rows_per_page) - łącznie i osobno dla każdego zadania. Zadanie bieżącego wątku
+    ustawia job(); fazy z innych wątków (np. parser HTML) mogą podać zadanie jawnie.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # nazwa -> [liczba, suma, min, max]
+        self._phases = {}
+        self._observations = {}
+        self._counters = {}
+        # zadanie -> {'phases': {faza: sekundy}, 'counters': {nazwa: wartość}}
+        self._jobs = {}
+
+    def set_job(self, name):
+        """Przypisuje fazy i liczniki bieżącego wątku do zadania name (None kończy). Zwraca poprzednie zadanie."""
+        previous = getattr(self._local, 'job', None)
+        self._local.job = name
+        return previous
+
+    @contextmanager
+    def job(self, name):
+        """Jak set_job(), ale tylko na czas bloku."""
+        previous = self.set_job(name)
+        try:
+            yield
+        finally:
+            self.set_job(previous)
+
+    def _job_entry(self, job):
+        job = job if job is not None else getattr(self._local, 'job', None)
+        if job is None:
+            return None
+        return self._jobs.setdefault(job, {'phases': {}, 'counters': {}})
+
+    @contextmanager
+    def phase(self, name, job=None):
+        """Mierzy czas bloku jako fazę name (także gdy blok kończy się wyjątkiem)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(name, time.perf_counter() - started, job)
+
+    def record_phase(self, name, seconds, job=None):
+        with self._lock:
+            _add_sample(self._phases, name, seconds)
+            entry = self._job_entry(job)
+            if entry is not None:
+                entry['phases'][name] = entry['phases'].get(name, 0.0) + seconds
+
+    def increment(self, name, value=1, job=None):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+            entry = self._job_entry(job)
+            if entry is not None:
+                entry['counters'][name] = entry['counters'].get(name, 0) + value
+
+    def observe(self, name, value):
+        with self._lock:
+            _add_sample(self._observations, name, value)
+
+    def snapshot(self):
+        """Zwraca podsumowanie jako słownik gotowy do zapisania w JSON."""
+        with self._lock:
+            return {
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'duration_seconds': round(time.monotonic() - self._started, 3),
+                'phases': {name: _summary(sample) for name, sample in sorted(self._phases.items())},
+                'counters': dict(sorted(self._counters.items())),
+                'observations': {name: _summary(sample) for name, sample in sorted(self._observations.items())},
+                'jobs': {job: {'phases': {name: round(seconds, 3) for name, seconds in entry['phases'].items()},
+                               'counters': dict(entry['counters'])}
+                         for job, entry in sorted(self._jobs.items())},
+            }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        logging.info(f"Metryki przebiegu zapisane do pliku {path}.")
+
+    def prometheus_text(self, prefix='nostale'):
+        """Metryki w formacie tekstowym Prometheus (exposition format 0.0.4)."""
+        snapshot = self.snapshot()
+        lines = [f"# TYPE {prefix}_phase_seconds summary"]
+        for name, summary in snapshot['phases'].items():
+            lines.append(f'{prefix}_phase_seconds_sum{{phase="{_label(name)}"}} {summary["sum"]}')
+            lines.append(f'{prefix}_phase_seconds_count{{phase="{_label(name)}"}} {summary["count"]}')
+        lines.append(f"# TYPE {prefix}_job_phase_seconds gauge")
+        for job, entry in snapshot['jobs'].items():
+            for name, seconds in entry['phases'].items():
+                lines.append(f'{prefix}_job_phase_seconds{{job="{_label(job)}",phase="{_label(name)}"}} {seconds}')
+        for name, value in snapshot['counters'].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name, summary in snapshot['observations'].items():
+            lines.append(f"# TYPE {prefix}_{name} summary")
+            lines.append(f"{prefix}_{name}_sum {summary['sum']}")
+            lines.append(f"{prefix}_{name}_count {summary['count']}")
+        lines.append(f"# TYPE {prefix}_run_duration_seconds gauge")
+        lines.append(f"{prefix}_run_duration_seconds {snapshot['duration_seconds']}")
+        return '\n'.join(lines) + '\n'
+
+    def serve_prometheus(self, port, host='127.0.0.1'):
+        """Udostępnia /metrics w wątku w tle (domyślnie tylko lokalnie). Zwraca serwer (shutdown() kończy)."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        logging.info(f"Metryki Prometheus dostępne pod http://{host}:{port}/metrics")
+        return server
+
+
+def _add_sample(samples, name, value):
+    sample = samples.get(name)
+    if sample is None:
+        samples[name] = [1, value, value, value]
+    else:
+        sample[0] += 1
+        sample[1] += value
+        sample[2] = min(sample[2], value)
+        sample[3] = max(sample[3], value)
+
+
+def _summary(sample):
+    count, total, minimum, maximum = sample
+    return {'count': count, 'sum': round(total, 3), 'avg': round(total / count, 3),
+            'min': round(minimum, 3), 'max': round(maximum, 3)}
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
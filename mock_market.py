@@ -0,0 +1,274 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# --- Lokalna atrapa bazaru: ten sam kontrakt DOM, na którym opiera się nbv2.py (bez sieci i Cloudflare) ---
+# #bibi-basar -> #categoryDropdown / #subCategoryDropdown -> .search-button -> wiersze .item z kolumnami
+# pozycjonowanymi przez 'left: Npx;' -> button.pagination-button.next-button. Wyniki przychodzą z /api/offers
+# (JSON), więc działa też extraction_mode = network.
+DEFAULT_CATALOG = {
+    '3310': ('Główny Przedmiot', [('3353', 'Przedmioty specjalne')]),
+    '3311': ('Przedmiot Konsumpcyjny', [('3359', 'Składniki')]),
+}
+
+ITEM_NAMES = [
+    'Cela Specjalisty', 'Czerwona Mikstura Leczenia', 'Niebieska Mikstura Many', 'Kamień Ulepszeń',
+    'Pióro Anioła', 'Złoty Kamień Szlachetny', 'Pergamin Ulepszenia Sprzętu', 'Zwój Ochronny Sprzętu',
+    'Róg Jednorożca', 'Skrzydła Anioła', 'Dusza Smoka', 'Pełna Księżycowa Zbroja', 'Kryształ Światła',
+    'Kryształ Ciemności', 'Ognista Esencja', 'Lodowa Esencja', 'Drewno Bukowe', 'Skóra Wilka', 'Ruda Żelaza',
+    'Mąka', 'Jajko', 'Mleko', 'Miód', 'Ser', 'Zioło Lecznicze', 'Kieł Wampira', 'Karta Partnera',
+]
+
+PAGE_HTML = """<!DOCTYPE html>
+<html lang="pl">
+<head>
+<meta charset="utf-8">
+<title>NosBazar (atrapa)</title>
+</head>
+<body>
+<div id="landing"><button id="bibi-basar" style="display: none;">NosBazar</button></div>
+<div id="market" style="display: none;">
+<div class="filters">
+<select id="categoryDropdown"></select>
+<select id="subCategoryDropdown"></select>
+<button class="search-button">Szukaj</button>
+</div>
+<div class="items-list"></div>
+<div class="pagination">
+<button class="pagination-button prev-button" disabled>&lt;</button>
+<span class="pagination-info"></span>
+<button class="pagination-button next-button" disabled>&gt;</button>
+</div>
+</div>
+<script>
+var MOCK = __CONFIG__;
+var state = {category: null, subcategory: null, page: 1, pages: 0};
+
+function fillSelect(select, options) {
+    select.innerHTML = '';
+    options.forEach(function (option) {
+        var element = document.createElement('option');
+        element.value = option[0];
+        element.textContent = option[1];
+        select.appendChild(element);
+    });
+}
+
+function escapeHtml(text) {
+    var element = document.createElement('span');
+    element.textContent = text;
+    return element.innerHTML;
+}
+
+function rowHtml(offer, partial) {
+    var html = '<img src="" alt="">' +
+        '<button class="all-searches-p" style="position: absolute; left: 60px;">' + escapeHtml(offer.name) + '</button>' +
+        '<p style="position: absolute; left: 372px;">' + offer.quantity + '</p>';
+    if (!partial) {
+        html += '<button class="price-button" style="position: absolute; left: 470px;">' +
+            offer.price.toLocaleString('en-US') + '&nbsp;Gold<br><span class="unit">szt.</span></button>' +
+            '<p style="position: absolute; left: 612px;">' + escapeHtml(offer.timeRemaining) + '</p>';
+    }
+    return html;
+}
+
+function renderRows(offers, partial) {
+    var list = document.querySelector('.items-list');
+    var fragment = document.createDocumentFragment();
+    offers.forEach(function (offer) {
+        var item = document.createElement('div');
+        item.className = 'item';
+        item.innerHTML = rowHtml(offer, partial);
+        fragment.appendChild(item);
+    });
+    list.innerHTML = '';
+    list.appendChild(fragment);
+}
+
+function render(payload) {
+    state.page = payload.page;
+    state.pages = payload.pages;
+    // Churn: część stron najpierw pojawia się niekompletna, a po churn_ms jest podmieniana na nowe węzły
+    if (payload.offers.length && Math.random() < MOCK.churn) {
+        renderRows(payload.offers, true);
+        setTimeout(function () { renderRows(payload.offers, false); }, MOCK.churn_ms);
+    } else {
+        renderRows(payload.offers, false);
+    }
+    document.querySelector('.pagination-info').textContent = state.page + ' / ' + state.pages;
+    document.querySelector('.next-button').disabled = state.page >= state.pages;
+    document.querySelector('.prev-button').disabled = state.page <= 1;
+}
+
+function load(page) {
+    var url = '/api/offers?category=' + encodeURIComponent(state.category) +
+        '&subcategory=' + encodeURIComponent(state.subcategory) + '&page=' + page;
+    fetch(url).then(function (response) { return response.json(); }).then(render);
+}
+
+var categorySelect = document.getElementById('categoryDropdown');
+var subcategorySelect = document.getElementById('subCategoryDropdown');
+fillSelect(categorySelect, Object.keys(MOCK.catalog).map(function (key) { return [key, MOCK.catalog[key][0]]; }));
+categorySelect.addEventListener('change', function () {
+    fillSelect(subcategorySelect, MOCK.catalog[categorySelect.value][1]);
+});
+fillSelect(subcategorySelect, MOCK.catalog[categorySelect.value][1]);
+
+document.querySelector('.search-button').addEventListener('click', function () {
+    state.category = categorySelect.value;
+    state.subcategory = subcategorySelect.value;
+    load(1);
+});
+document.querySelector('.next-button').addEventListener('click', function () {
+    if (state.page < state.pages) { load(state.page + 1); }
+});
+document.querySelector('.prev-button').addEventListener('click', function () {
+    if (state.page > 1) { load(state.page - 1); }
+});
+document.getElementById('bibi-basar').addEventListener('click', function () {
+    document.getElementById('landing').style.display = 'none';
+    document.getElementById('market').style.display = 'block';
+});
+// Zamiast wyzwania Cloudflare: bazar pojawia się po cloudflare_delay
+setTimeout(function () {
+    document.getElementById('bibi-basar').style.display = 'inline-block';
+}, MOCK.cloudflare_delay_ms);
+</script>
+</body>
+</html>
+"""
+
+
+def generate_offers(subcategory, page, rows_per_page):
+    """Deterministyczne oferty strony (te same przy każdym odczycie tej samej strony)."""
+    rng = random.Random(f"{subcategory}:{page}")
+    offers = []
+    for _ in range(rows_per_page):
+        hours = rng.randint(0, 23)
+        if rng.random() < 0.2:
+            time_remaining = f"1 dzień {hours} godz."
+        elif rng.random() < 0.5:
+            time_remaining = f"{hours} godz. {rng.randint(1, 59)} min."
+        else:
+            time_remaining = f"{hours + 1} godz."
+        offers.append({
+            'name': rng.choice(ITEM_NAMES),
+            'quantity': rng.randint(1, 999),
+            'price': rng.choice((rng.randint(1, 999), rng.randint(1000, 99999), rng.randint(100000, 5000000))),
+            'timeRemaining': time_remaining,
+        })
+    return offers
+
+
+class MockMarket:
+    """
+    Serwer atrapy bazaru w wątku w tle. pages - liczba stron każdej subkategorii, rows_per_page - ofert na stronę,
+    latency - opóźnienie odpowiedzi /api/offers w sekundach, churn - odsetek stron renderowanych dwa razy
+    (najpierw niekompletnie, po churn_ms na nowych węzłach), cloudflare_delay - opóźnienie pojawienia się bazaru.
+    """
+
+    def __init__(self, pages=12, rows_per_page=50, latency=0.05, churn=0.0, churn_ms=150, cloudflare_delay=0.0,
+                 catalog=None, host='127.0.0.1', port=0):
+        self.pages = pages
+        self.rows_per_page = rows_per_page
+        self.latency = latency
+        self.churn = churn
+        self.churn_ms = churn_ms
+        self.cloudflare_delay = cloudflare_delay
+        self.catalog = catalog or DEFAULT_CATALOG
+        self.host = host
+        self.port = port
+        self.pages_served = 0
+        self.rows_served = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self):
+        market = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                market._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='mock-market', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _handle(self, request):
+        parsed = urlparse(request.path)
+        if parsed.path == '/api/offers':
+            params = parse_qs(parsed.query)
+            page = int(params.get('page', ['1'])[0])
+            subcategory = params.get('subcategory', [''])[0]
+            if self.latency > 0:
+                time.sleep(self.latency)
+            offers = generate_offers(subcategory, page, self.rows_per_page) if 1 <= page <= self.pages else []
+            with self._lock:
+                self.pages_served += 1
+                self.rows_served += len(offers)
+            self._send(request, 'application/json', json.dumps(
+                {'page': page, 'pages': self.pages, 'offers': offers}, ensure_ascii=False))
+        elif parsed.path == '/':
+            config = {
+                'catalog': self.catalog,
+                'churn': self.churn,
+                'churn_ms': self.churn_ms,
+                'cloudflare_delay_ms': int(self.cloudflare_delay * 1000),
+            }
+            self._send(request, 'text/html', PAGE_HTML.replace('__CONFIG__', json.dumps(config, ensure_ascii=False)))
+        else:
+            request.send_error(404)
+
+    @staticmethod
+    def _send(request, content_type, body):
+        data = body.encode('utf-8')
+        request.send_response(200)
+        request.send_header('Content-Type', f"{content_type}; charset=utf-8")
+        request.send_header('Content-Length', str(len(data)))
+        request.send_header('Cache-Control', 'no-store')
+        request.end_headers()
+        request.wfile.write(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokalna atrapa bazaru NosTale.")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--pages', type=int, default=12)
+    parser.add_argument('--rows', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--churn', type=float, default=0.0)
+    parser.add_argument('--cloudflare-delay', type=float, default=0.0)
+    args = parser.parse_args()
+
+    market = MockMarket(pages=args.pages, rows_per_page=args.rows, latency=args.latency, churn=args.churn,
+                        cloudflare_delay=args.cloudflare_delay, port=args.port).start()
+    print(f"Atrapa bazaru działa pod adresem {market.url} (Ctrl+C kończy).")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        market.stop()
+
+
+if __name__ == '__main__':
+    main()
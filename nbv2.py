@@ -1,590 +1,1997 @@
-import pyodbc
-import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.types import Integer, NVARCHAR, DateTime
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException, \
-    WebDriverException
-import time
-from datetime import datetime
-import configparser
-import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import random
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.common.action_chains import ActionChains
-import os
-
-# --- Konfiguracja Logowania ---
-logging.basicConfig(
-    filename='nostale_scraper.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(threadName)s - %(message)s'
-)
-
-config = configparser.ConfigParser()
-config.read('config.ini')
-
-# --- Konfiguracja Bazy Danych ---
-server = config['Database']['server']
-database = config['Database']['database']
-username = config['Database']['username']
-password = config['Database']['password']
-
-# --- Konfiguracja Strony Internetowej ---
-base_url = config['Website']['base_url']
-server_name = config['Website']['server_name']
-language = config['Website']['language']
-
-# --- Połączenie z Bazą Danych ---
-conn_str = (
-    f'DRIVER={{ODBC Driver 18 for SQL Server}};'
-    f'SERVER={server};DATABASE={database};'
-    f'UID={username};PWD={password};'
-    f'TrustServerCertificate=yes;'
-)
-
-try:
-    conn = pyodbc.connect(conn_str)
-    engine = create_engine('mssql+pyodbc:///?odbc_connect=' + conn_str,
-                           fast_executemany=True,
-                           pool_size=10, max_overflow=20, pool_timeout=30, pool_recycle=3600
-                           )
-    logging.info("Połączono z bazą danych.")
-except Exception as e:
-    logging.error(f"Błąd połączenia z bazą danych: {e}")
-    exit()
-
-# Lista realistycznych User-Agentów (możesz dodać więcej)
-USER_AGENTS = [
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36 Edg/123.0.2478.67",
-    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:126.0) Gecko/20100101 Firefox/126.0"
-]
-
-# --- Lista dostępnych eventów ---
-events_list = [
-    "Brak Eventu",
-    "Ulepszenie Ekwipunku",
-    "Podwójny Drop",
-    "Podwójne Doświadczenie",
-    "Ulepszanie Karty Specjalisty",
-    "Podwójne Pudełka Rajdu",
-    "Podwójne złoto",
-    "Ulepszanie Run",
-    "Ulepszanie Tatuaży",
-    "Ulepszanie Kart Specjalisty Partnera",
-    "Podwójne Błyskawiczne Bitwy"
-]
-
-
-# Definicje funkcji do czyszczenia danych
-def clean_quantity(quantity_str):
-    """Usuwa spacje i konwertuje ilość na liczbę całkowitą."""
-    if not isinstance(quantity_str, str):
-        logging.warning(f"Oczekiwano stringa dla ilości, otrzymano: {type(quantity_str)}, wartość: {quantity_str}")
-        return None
-    try:
-        return int(quantity_str.replace(" ", ""))
-    except ValueError:
-        logging.warning(f"Nie można przekonwertować ilości na liczbę: {quantity_str}")
-        return None
-
-
-def clean_price(price_str):
-    """Usuwa spacje, 'Gold', 'szt.' i WSZYSTKIE przecinki, konwertuje cenę na liczbę całkowitą."""
-    if not isinstance(price_str, str):
-        logging.warning(f"Oczekiwano stringa dla ceny, otrzymano: {type(price_str)}, wartość: {price_str}")
-        return None
-    try:
-        price_cleaned = price_str.replace(" ", "").replace("Gold", "").replace("szt.", "").replace(",", "").strip()
-        return int(price_cleaned)
-    except ValueError:
-        logging.warning(f"Nie można przekonwertować ceny na liczbę: {price_str}")
-        return None
-
-
-# Funkcja do "ludzkiego" kliknięcia
-def human_click(driver, element):
-    """Przewija do elementu, symuluje ruch myszy i kliknięcie."""
-    try:
-        actions = ActionChains(driver)
-
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-        time.sleep(random.uniform(0.05, 0.15))
-
-        actions.move_to_element(element)
-        time.sleep(random.uniform(0.05, 0.1))
-
-        offset_x = random.randint(-3, 3)
-        offset_y = random.randint(-3, 3)
-        actions.move_by_offset(offset_x, offset_y).click().perform()
-        time.sleep(random.uniform(0.1, 0.3))
-    except Exception as e:
-        logging.warning(f"Błąd podczas symulacji ludzkiego kliknięcia: {e}. Próbuję standardowego kliknięcia.")
-        element.click()
-        time.sleep(random.uniform(0.05, 0.1))
-
-
-def scrape_items_from_page(driver, category_ids, category_name, subcategory_ids, subcategory_name, current_event_name):
-    """
-    Scrauje przedmioty z aktualnie załadowanej strony i ZWRACA listę zebranych słowników.
-    """
-    data_page_items = []
-    try:
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_all_elements_located((By.CLASS_NAME, "item"))
-        )
-
-        items = driver.find_elements(By.CLASS_NAME, 'item')
-
-        if not items:
-            return []
-
-        item_index = 0
-        while item_index < len(items):
-            retry = 0
-            success = False
-            while not success and retry < 3:
-                items = driver.find_elements(By.CLASS_NAME, 'item')
-                if item_index >= len(items):
-                    logging.warning(
-                        f"Subkategoria: {subcategory_name} - Próba dostępu do przedmiotu {item_index} poza zakresem po odświeżeniu listy. Przechodzę do następnego.")
-                    break
-
-                item = items[item_index]
-
-                try:
-                    name_element = WebDriverWait(item, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, 'button.all-searches-p')))
-                    quantity_element = WebDriverWait(item, 5).until(
-                        EC.presence_of_element_located((By.XPATH, './/p[contains(@style, "left: 372px;")]')))
-                    price_element = WebDriverWait(item, 5).until(
-                        EC.presence_of_element_located((By.XPATH, './/button[contains(@style, "left: 470px;")]')))
-                    time_remaining_element = WebDriverWait(item, 5).until(
-                        EC.presence_of_element_located((By.XPATH, './/p[contains(@style, "left: 612px;")]')))
-
-                    name = name_element.text
-                    quantity = quantity_element.text
-                    price = price_element.text
-                    time_remaining = time_remaining_element.text
-
-                    data_page_items.append({
-                        'CategoryID': category_ids[category_name],
-                        'CategoryName': category_name,
-                        'SubCategoryID': subcategory_ids[(category_name, subcategory_name)],
-                        'SubCategoryName': subcategory_name,
-                        'Name': name,
-                        'Quantity': clean_quantity(quantity),
-                        'Price': clean_price(price),
-                        'TimeRemaining': time_remaining,
-                        'DataScrapingu': datetime.now(),
-                        'Event': current_event_name
-                    })
-                    success = True
-                    break
-                except StaleElementReferenceException as e:
-                    retry += 1
-                    logging.warning(
-                        f"Subkategoria: {subcategory_name}, Przedmiot {item_index} - StaleElementReferenceException (próba {retry}). Ponawiam próbę odczytu.")
-                    time.sleep(random.uniform(1.0, 2.0))
-                except (NoSuchElementException, TimeoutException) as e:
-                    logging.error(
-                        f"Subkategoria: {subcategory_name}, Przedmiot {item_index} - Błąd: element nie znaleziono lub timeout (wewnętrzny). Przechodzę do następnego.")
-                    break
-                except Exception as e:
-                    logging.exception(
-                        f"Subkategoria: {subcategory_name}, Przedmiot {item_index} - Nieoczekiwany błąd podczas przetwarzania elementu. Przechodzę do następnego.")
-                    break
-
-            if not success:
-                logging.error(
-                    f"Subkategoria: {subcategory_name}, Przedmiot {item_index} - Nie udało się pobrać danych po kilku próbach.")
-            item_index += 1
-
-        return data_page_items
-
-    except TimeoutException as e:
-        logging.warning(
-            f"Subkategoria: {subcategory_name} - Timeout podczas oczekiwania na listę przedmiotów na stronie: {e}. (Może być pusta)")
-        return []
-    except WebDriverException as e:
-        logging.error(
-            f"Subkategoria: {subcategory_name} - Błąd WebDrivera podczas scrapowania przedmiotów ze strony: {e}")
-        return []
-    except Exception as e:
-        logging.exception(
-            f"Subkategoria: {subcategory_name} - Nieoczekiwany błąd podczas scrapowania przedmiotów ze strony: {e}")
-        return []
-
-
-def scrape_subcategory_data(category_name, subcategory_name, category_value, subcategory_value, category_ids,
-                            subcategory_ids, base_url, current_event_name):
-    """
-    Scrauje dane dla pojedynczej subkategorii i zapisuje je bezpośrednio do bazy danych.
-    """
-    driver = None
-    try:
-        chrome_options = ChromeOptions()
-
-        selected_user_agent = random.choice(USER_AGENTS)
-        chrome_options.add_argument(f"user-agent={selected_user_agent}")
-
-        chrome_options.add_argument("--start-maximized")
-        # chrome_options.add_argument("--headless") # Pamiętaj, żeby to włączyć, gdy skończysz debugować!
-
-        chrome_options.add_argument("--lang=pl-PL")
-
-        # --- Dodatkowe opcje Chrome mogące pomóc ---
-        chrome_options.add_argument('--ignore-certificate-errors')
-        chrome_options.add_argument('--disable-notifications')
-        chrome_options.add_argument('--disable-extensions')
-        chrome_options.add_argument('--window-size=1400,900')
-
-        # --- Tworzenie instancji przeglądarki z automatycznym wykrywaniem wersji ---
-        # USUWAMY parametr 'version_main'
-        driver = uc.Chrome(options=chrome_options)
-
-        # --- Wzmocnienie skryptów anty-detekcyjnych ---
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": """
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-            """
-        })
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": """
-                window.chrome = {
-                    runtime: {},
-                    app: {},
-                    csi: () => {},
-                    loadTimes: () => {}
-                };
-            """
-        })
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": """
-                Object.defineProperty(navigator, 'plugins', {
-                    get: () => [
-                        { description: 'Portable Document Format', filename: 'internal-pdf-viewer', name: 'PDF Viewer', ... },
-                        { description: 'Shockwave Flash', filename: 'internal-nacl-plugin', name: 'Shockwave Flash', ... }
-                    ],
-                });
-            """
-        })
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": """
-                Object.defineProperty(navigator, 'languages', {
-                    get: () => ['pl-PL', 'pl', 'en-US', 'en'],
-                });
-            """
-        })
-
-        driver.implicitly_wait(5)
-
-        # --- KLUCZOWE MIEJSCE DLA CLOUDFLARE INITIAL CHALLENGE ---
-        driver.get(base_url)
-        logging.info(f"Wątek: {subcategory_name} - Ładuję stronę główną. Oczekuję na Cloudflare.")
-        time.sleep(random.uniform(10, 25))  # Opóźnienie dla Cloudflare
-
-        bibi_basar = WebDriverWait(driver, 20).until(  # Zwiększono timeout, bo to zaraz po CF
-            EC.element_to_be_clickable((By.ID, "bibi-basar"))
-        )
-        human_click(driver, bibi_basar)
-        time.sleep(random.uniform(0.5, 1.0))
-
-        category_dropdown_element = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "categoryDropdown"))
-        )
-        category_dropdown = Select(category_dropdown_element)
-        human_click(driver, category_dropdown_element)
-        category_dropdown.select_by_value(category_value)
-        time.sleep(random.uniform(0.5, 1.0))
-
-        subcategory_dropdown_element = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.ID, "subCategoryDropdown"))
-        )
-        subcategory_dropdown = Select(subcategory_dropdown_element)
-        human_click(driver, subcategory_dropdown_element)
-        subcategory_dropdown.select_by_value(subcategory_value)
-        time.sleep(random.uniform(0.5, 1.0))
-
-        search_button = driver.find_element(By.CLASS_NAME, "search-button")
-
-        human_click(driver, search_button)
-        logging.info(f"Wątek: {subcategory_name} - Wybrano '{category_name}'/'{subcategory_name}'. Klikam 'Szukaj'.")
-        time.sleep(random.uniform(3, 6))
-
-        human_click(driver, search_button)
-
-        WebDriverWait(driver, 25).until(
-            EC.presence_of_all_elements_located((By.CLASS_NAME, "item"))
-        )
-        logging.info(
-            f"Wątek: {subcategory_name} - Przedmioty załadowane po wyszukiwaniu. Rozpoczynam scrapowanie strony 1.")
-        time.sleep(random.uniform(0.5, 1.5))
-
-        current_page = 1
-        while True:
-            data_current_page = scrape_items_from_page(driver, category_ids, category_name, subcategory_ids,
-                                                       subcategory_name, current_event_name)
-
-            if data_current_page:
-                df_current_page = pd.DataFrame(data_current_page)
-                try:
-                    df_current_page.to_sql('items', engine, if_exists='append', index=False, dtype={
-                        'CategoryID': Integer(),
-                        'CategoryName': NVARCHAR(255),
-                        'SubCategoryID': Integer(),
-                        'SubCategoryName': NVARCHAR(255),
-                        'Name': NVARCHAR(255),
-                        'Quantity': Integer(),
-                        'Price': Integer(),
-                        'TimeRemaining': NVARCHAR(50),
-                        'DataScrapingu': DateTime(),
-                        'Event': NVARCHAR(255)
-                    }, chunksize=1000)
-                    logging.info(
-                        f"Wątek: {subcategory_name} - Strona {current_page} zapisana do bazy danych ({len(df_current_page)} rekordów).")
-                except Exception as db_error:
-                    logging.error(
-                        f"Wątek: {subcategory_name} - Błąd zapisu Strony {current_page} do bazy danych: {db_error}")
-            else:
-                logging.info(
-                    f"Wątek: {subcategory_name} - Strona {current_page} nie zawiera przedmiotów. Koniec paginacji dla tej subkategorii.")
-                break
-
-            try:
-                next_page_button = WebDriverWait(driver, 15).until(
-                    EC.element_to_be_clickable(
-                        (By.CSS_SELECTOR, "button.pagination-button.next-button:not([disabled])"))
-                )
-
-                old_item = None
-                try:
-                    old_item = driver.find_element(By.CLASS_NAME, "item")
-                except NoSuchElementException:
-                    pass
-
-                human_click(driver, next_page_button)
-                logging.info(f"Wątek: {subcategory_name} - Przechodzę do Strony {current_page + 1}.")
-
-                if old_item:
-                    WebDriverWait(driver, 20).until(EC.staleness_of(old_item))
-
-                WebDriverWait(driver, 30).until(
-                    EC.presence_of_all_elements_located((By.CLASS_NAME, "item"))
-                )
-
-                current_page += 1
-                time.sleep(random.uniform(0.5, 1.0))
-
-            except (NoSuchElementException, TimeoutException):
-                logging.info(
-                    f"Wątek: {subcategory_name} - Brak kolejnych stron dla subkategorii '{subcategory_name}'. Zakończono paginację.")
-                break
-            except WebDriverException as e:
-                logging.error(
-                    f"Wątek: {subcategory_name} - Krytyczny błąd WebDrivera podczas nawigacji na następną stronę dla '{subcategory_name}': {e}. Wątek nie powiódł się.")
-                return False
-            except Exception as e:
-                logging.exception(
-                    f"Wątek: {subcategory_name} - Nieoczekiwany błąd podczas nawigacji na następną stronę dla '{subcategory_name}': {e}. Wątek nie powiódł się.")
-                return False
-
-        logging.info(f"Wątek: {subcategory_name} - Zakończono scrapowanie subkategorii '{subcategory_name}'.")
-        return True
-
-    except TimeoutException as e:
-        logging.warning(
-            f"Wątek: {subcategory_name} - Timeout podczas inicjalizacji/nawigacji dla '{subcategory_name}': {e}. Wątek nie powiódł się.")
-        return False
-    except WebDriverException as e:
-        logging.error(
-            f"Wątek: {subcategory_name} - Błąd WebDrivera podczas inicjalizacji/podstawowych operacji dla '{subcategory_name}': {e}. Wątek nie powiódł się.")
-        return False
-    except Exception as e:
-        logging.exception(
-            f"Wątek: {subcategory_name} - Nieoczekiwany błąd w wątku subkategorii '{subcategory_name}': {e}. Wątek nie powiódł się.")
-        return False
-    finally:
-        if driver:
-            try:
-                driver.quit()
-                logging.info(f"Wątek: {subcategory_name} - Przeglądarka zamknięta dla '{subcategory_name}'.")
-            except Exception as e:
-                logging.error(
-                    f"Wątek: {subcategory_name} - Błąd podczas zamykania przeglądarki dla '{subcategory_name}': {e}")
-
-
-# --- Sekcja wyboru eventu przed rozpoczęciem scrapowania ---
-print("\nWybierz aktualny event:")
-for i, event in enumerate(events_list):
-    print(f"{i + 1}. {event}")
-
-selected_event_index = -1
-while not (0 < selected_event_index <= len(events_list)):
-    try:
-        user_input = input(f"Podaj numer eventu (1-{len(events_list)}): ")
-        selected_event_index = int(user_input)
-        if not (0 < selected_event_index <= len(events_list)):
-            print("Nieprawidłowy numer. Spróbuj ponownie.")
-    except ValueError:
-        print("Nieprawidłowy numer. Wprowadź liczbę.")
-
-current_event_name = events_list[selected_event_index - 1]
-print(f"\nWybrano event: {current_event_name}\n")
-logging.info(f"Rozpoczynanie scrapowania z wybranym eventem: {current_event_name}")
-
-# Tworzenie tabel w bazie danych (jeśli nie istnieją)
-with conn.cursor() as cursor:
-    cursor.execute("""
-    IF OBJECT_ID('categories', 'U') IS NULL
-    CREATE TABLE categories (
-        id INT IDENTITY(1,1) PRIMARY KEY,
-        name NVARCHAR(255) NOT NULL
-    )
-    """)
-    conn.commit()
-
-with conn.cursor() as cursor:
-    cursor.execute("""
-    IF OBJECT_ID('subcategories', 'U') IS NULL
-    CREATE TABLE subcategories (
-        id INT IDENTITY(1,1) PRIMARY KEY,
-        category_id INT NOT NULL FOREIGN KEY REFERENCES categories(id),
-        name NVARCHAR(255) NOT NULL
-        )
-    """)
-    conn.commit()
-
-with conn.cursor() as cursor:
-    cursor.execute("""
-    IF OBJECT_ID('items', 'U') IS NULL
-    CREATE TABLE items (
-        id INT IDENTITY(1,1) PRIMARY KEY,
-        CategoryID INT NOT NULL FOREIGN KEY REFERENCES categories(id),
-        CategoryName NVARCHAR(255) NOT NULL,
-        SubCategoryID INT NOT NULL FOREIGN KEY REFERENCES subcategories(id),
-        SubCategoryName NVARCHAR(255) NOT NULL,
-        Name NVARCHAR(255) NOT NULL,
-        Quantity INT,
-        Price INT,
-        TimeRemaining NVARCHAR(50),
-        DataScrapingu DATETIME NOT NULL
-    )
-    """)
-    conn.commit()
-
-# Zmiana: Dodanie kolumny 'Event' do tabeli 'items' jeśli jej nie ma
-with conn.cursor() as cursor:
-    try:
-        cursor.execute("""
-        IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
-                       WHERE TABLE_SCHEMA = 'dbo' 
-                       AND TABLE_NAME = 'items' 
-                       AND COLUMN_NAME = 'Event')
-        BEGIN
-            ALTER TABLE items ADD Event NVARCHAR(255);
-        END
-        """)
-        conn.commit()
-        logging.info("Sprawdzono i ewentualnie dodano kolumnę 'Event' do tabeli 'items'.")
-    except Exception as e:
-        logging.error(f"Błąd podczas dodawania kolumny 'Event' do tabeli 'items': {e}")
-
-categories = {
-    "Główny Przedmiot": "3310",
-    "Przedmiot Konsumpcyjny": "3311"
-}
-
-subcategories = {
-    "Główny Przedmiot": [
-        #("Zwyczajne przedmioty", "3350"),
-       # ("Materiały do ulepszania", "3351"),
-       # ("Narzędzia", "3352"),
-        ("Przedmioty specjalne", "3353")
-      #  ("Eliksiry", "3354"),
-      # ("Event", "3355"),
-       # ("Tytuł", "4626")
-    ],
-    "Przedmiot Konsumpcyjny": [
-        ("Składniki", "3359")
-    ]
-}
-
-category_ids = {}
-for category_name in categories.keys():
-    query = f"SELECT id FROM categories WHERE name = ?"
-    with conn.cursor() as cursor:
-        cursor.execute(query, category_name)
-        result = cursor.fetchone()
-        if not result:
-            query_insert = f"INSERT INTO categories (name) OUTPUT INSERTED.id VALUES (?)"
-            cursor.execute(query_insert, category_name)
-            category_id = cursor.fetchone()[0]
-            category_ids[category_name] = category_id
-            conn.commit()
-        else:
-            category_ids[category_name] = result[0]
-
-subcategory_ids = {}
-for category_name, subcategories_list in subcategories.items():
-    for subcategory_name, _ in subcategories_list:
-        query_check = f"SELECT id FROM subcategories WHERE name = ? AND category_id = ?"
-        with conn.cursor() as cursor:
-            cursor.execute(query_check, (subcategory_name, category_ids[category_name]))
-            result = cursor.fetchone()
-        if result:
-            subcategory_id = result[0]
-        else:
-            query_insert = f"INSERT INTO subcategories (category_id, name) OUTPUT INSERTED.id VALUES (?, ?)"
-            with conn.cursor() as cursor:
-                cursor.execute(query_insert, (category_ids[category_name], subcategory_name))
-                subcategory_id = cursor.fetchone()[0]
-                conn.commit()
-        subcategory_ids[(category_name, subcategory_name)] = subcategory_id
-
-base_url = f"{base_url}?lang={language}&server={server_name}"
-
-# Utrzymujemy bardzo duże opóźnienie między wątkami (dla WinError 183)
-MIN_THREAD_START_DELAY = 15.0  # Duże opóźnienie
-MAX_THREAD_START_DELAY = 30.0  # Bardzo duże opóźnienie
-
-with ThreadPoolExecutor(max_workers=1) as executor:
-    futures = []
-    first_thread_started = False
-    for category_name, category_value in categories.items():
-        for subcategory_name, subcategory_value in subcategories.get(category_name, []):
-            if first_thread_started:
-                delay = random.uniform(MIN_THREAD_START_DELAY, MAX_THREAD_START_DELAY)
-                logging.info(f"Oczekiwanie na uruchomienie kolejnego wątku przez {delay:.2f} sekundy...")
-                time.sleep(delay)
-            else:
-                first_thread_started = True
-
-            logging.info(f"Uruchamianie wątku dla subkategorii: {subcategory_name}")
-            future = executor.submit(scrape_subcategory_data, category_name, subcategory_name, category_value,
-                                     subcategory_value, category_ids, subcategory_ids, base_url, current_event_name)
-            futures.append(future)
-
-    for future in as_completed(futures):
-        try:
-            thread_status = future.result()
-            if thread_status:
-                logging.info(f"Wątek zakończył pracę pomyślnie.")
-            else:
-                logging.warning("Wątek zakończony z błędami.")
-
-        except Exception as e:
-            logging.error(f"Błąd pobierania wyników z wątku: {e}")
-
-logging.info("Zakończono wszystkie wątki scrapujące.")
-print("Skrypt zakończony.")
\ No newline at end of file
+import time
+# Początek startu procesu - do pomiaru czasu od uruchomienia do pierwszej nawigacji
+PROCESS_STARTED = time.perf_counter()
+from datetime import datetime
+import argparse
+import configparser
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import random
+import os
+import signal
+import sys
+import queue
+import threading
+import multiprocessing
+import uuid
+from functools import partial
+from urllib.parse import urlparse
+from market_parser import parse_items_html
+from metrics import Metrics
+from network_capture import enable_network_capture, drain_performance_log, wait_for_json_exchange, \
+    fetch_json_in_page, find_offers_list, offers_to_rows, with_query_param
+from browser_resources import DEFAULT_BLOCKED_URLS, apply_light_profile, block_resources, browser_rss_bytes, \
+    navigation_time_ms
+from async_logging import setup_logging, setup_worker_logging, shutdown_logging, start_relay
+from catalog import catalog_from_dicts, discover_catalog, load_cached_catalog, parse_patterns, save_catalog, \
+    select_from_catalog
+from checkpoint_store import CheckpointStore, page_fingerprint
+from cleaning import clean_page
+from db_writer import DatabaseWriter
+from delta_store import DeltaTracker
+from pacing import Pacer, parse_jitter_ranges
+from price_aggregates import PriceAggregates
+from refresh_scheduler import RefreshScheduler
+from scheduler import HostRateLimiter, prepare_worker_drivers
+from session_store import SessionStore, apply_cookies, apply_local_storage
+from sharding import ShardGroup, parse_page_info
+from sinks import SINK_KINDS, create_sink
+
+# --- Selenium i undetected_chromedriver są importowane dopiero przed startem pierwszej przeglądarki ---
+uc = By = WebDriverWait = Select = EC = ChromeOptions = ActionChains = None
+NoSuchElementException = StaleElementReferenceException = TimeoutException = WebDriverException = None
+# Ustawiane przy pierwszej nawigacji procesu (pomiar czasu startu)
+first_navigation_done = threading.Event()
+
+
+def import_selenium():
+    """Importuje Selenium i undetected_chromedriver (kilkaset ms) - wołane przez create_driver()."""
+    global uc, By, WebDriverWait, Select, EC, ChromeOptions, ActionChains, NoSuchElementException, \
+        StaleElementReferenceException, TimeoutException, WebDriverException
+    if uc is not None:
+        return
+    with metrics.phase('selenium_import'):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait, Select
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, \
+            TimeoutException, WebDriverException
+        from selenium.webdriver.chrome.options import Options as ChromeOptions
+        from selenium.webdriver.common.action_chains import ActionChains
+        # uc na końcu: inne wątki sprawdzają uc, zanim użyją pozostałych nazw
+        import undetected_chromedriver as uc
+
+
+# --- Konfiguracja Logowania ---
+def configure_logging(log_queue=None):
+    """
+    Konfiguruje log (w main() i w procesach roboczych, nie przy imporcie modułu). Zapis do pliku odbywa się
+    w wątku w tle; proces roboczy przekazuje rekordy przez log_queue do procesu głównego.
+    """
+    level = logging.getLevelName(log_level.upper())
+    if log_queue is not None:
+        setup_worker_logging(log_queue, level, log_dedup_window, log_dedup_burst)
+        return
+    setup_logging(log_path, level, max_bytes=log_max_mb * 1024 * 1024, backup_count=log_backup_count,
+                  json_format=log_format == 'json', dedup_window=log_dedup_window, dedup_burst=log_dedup_burst,
+                  queue_size=log_queue_size)
+
+
+# Lista realistycznych User-Agentów (możesz dodać więcej)
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36 Edg/123.0.2478.67",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:126.0) Gecko/20100101 Firefox/126.0"
+]
+
+# Kolumny tabeli 'items' w kolejności, w jakiej budowane są wiersze (krotki)
+ITEM_COLUMNS = [
+    ('CategoryID', 'INT'),
+    ('CategoryName', 'NVARCHAR(255)'),
+    ('SubCategoryID', 'INT'),
+    ('SubCategoryName', 'NVARCHAR(255)'),
+    ('Name', 'NVARCHAR(255)'),
+    ('Quantity', 'INT'),
+    ('Price', 'INT'),
+    ('TimeRemaining', 'NVARCHAR(50)'),
+    ('DataScrapingu', 'DATETIME'),
+    ('Event', 'NVARCHAR(255)'),
+    ('ExpiresAt', 'DATETIME'),
+    ('ExpiresInSeconds', 'INT'),
+]
+# Pola pierwszego wiersza strony zapisywane w punkcie kontrolnym (bez TimeRemaining, który się zmienia)
+PAGE_FINGERPRINT_FIELDS = [index for index, (name, _) in enumerate(ITEM_COLUMNS) if name in ('Name', 'Quantity', 'Price')]
+
+# Zwiększane przy każdej zmianie bootstrap_database() lub sposobu nadawania id
+STARTUP_CACHE_VERSION = 1
+
+# --- Stan procesu tworzony przy starcie zapisu, przebiegu i trybu ciągłego ---
+# Obiekty zapisu są tworzone w start_storage() osobno w każdym procesie
+items_loader = None
+delta_tracker = None
+# Osobne połączenie wątku zapisu: stan delty jest zapisywany po potwierdzeniu zapisu każdej subkategorii
+delta_conn = None
+db_writer = None
+price_aggregates = None
+checkpoint_store = None
+refresh_scheduler = None
+
+# --- Konfiguracja z config.ini: czytana w configure(), a nie przy imporcie modułu ---
+config = configparser.ConfigParser()
+config_path = None
+
+
+def configure(path='config.ini'):
+    """
+    Czyta config.ini i tworzy obiekty zależne od konfiguracji (limit zapytań, magazyn sesji, metryki, pule wątków).
+    Wołane w main() po argparse i w procesach roboczych; sam import nbv2 niczego nie czyta ani nie uruchamia.
+    """
+    global config, config_path, log_path, log_level, log_format, log_max_mb, log_backup_count, log_dedup_window, \
+        log_dedup_burst, log_queue_size, server, database, username, password, server_name, language, base_url, \
+        extraction_mode, network_url_pattern, network_offers_path, network_response_timeout, network_field_map, \
+        network_page_param, html_parse_executor, scraper_workers, max_jobs_per_session, scheduler_mode, \
+        worker_drivers_dir, shard_pages, \
+        browser_profile, browser_window_size, browser_blocked_urls, rate_limiter, conn_str, pacer, cloudflare_timeout, \
+        search_timeout, writer_queue_pages, writer_batch_rows, writer_max_batch_age, writer_max_retries, \
+        writer_dead_letter_path, writer_bulk_mode, storage_sink, schema_mode, schema_columnstore, \
+        schema_migrate_legacy, delta_mode, delta_tolerance_seconds, aggregates_enabled, aggregates_path, \
+        aggregates_snapshot_minutes, checkpoint_enabled, checkpoint_path, metrics, metrics_json_path, \
+        metrics_prometheus_port, metrics_prometheus_host, catalog_discovery, catalog_cache_path, catalog_ttl_hours, \
+        catalog_option_timeout_ms, catalog_include, catalog_exclude, daemon_pages_per_hour, daemon_min_interval, daemon_max_interval, \
+        daemon_default_change_rate, daemon_smoothing, daemon_state_path, startup_cache_path, startup_cache_hours, \
+        session_store, clearance_check_timeout
+    config = configparser.ConfigParser()
+    config.read(path)
+    config_path = path
+
+    # --- Log: rotacja po max_mb, format text albo json (jeden obiekt na linię) ---
+    # Ostrzeżenia i błędy o tej samej treści (z dokładnością do liczb) są zapisywane najwyżej dedup_burst razy
+    # na dedup_window_seconds; reszta trafia do logu jako podsumowanie z liczbą pominiętych.
+    log_path = config.get('Logging', 'path', fallback='nostale_scraper.log')
+    log_level = config.get('Logging', 'level', fallback='INFO')
+    log_format = config.get('Logging', 'format', fallback='text')
+    log_max_mb = config.getfloat('Logging', 'max_mb', fallback=10.0)
+    log_backup_count = config.getint('Logging', 'backup_count', fallback=5)
+    log_dedup_window = config.getfloat('Logging', 'dedup_window_seconds', fallback=60.0)
+    log_dedup_burst = config.getint('Logging', 'dedup_burst', fallback=5)
+    # Przy pełnej kolejce rekordy są odrzucane (i liczone), żeby log nigdy nie wstrzymywał scrapowania
+    log_queue_size = config.getint('Logging', 'queue_size', fallback=10000)
+
+    # --- Konfiguracja Bazy Danych (używana tylko przez sink 'sqlserver') ---
+    server = config.get('Database', 'server', fallback='')
+    database = config.get('Database', 'database', fallback='')
+    username = config.get('Database', 'username', fallback='')
+    password = config.get('Database', 'password', fallback='')
+
+    # --- Konfiguracja Strony Internetowej ---
+    server_name = config['Website']['server_name']
+    language = config['Website']['language']
+    base_url = f"{config['Website']['base_url']}?lang={language}&server={server_name}"
+
+    # --- Konfiguracja Scrapera ---
+    # extraction_mode: 'bulk' (jeden execute_script na stronę), 'html' (parsowanie page_source w tle)
+    # lub 'network' (oferty z odpowiedzi JSON rynku przechwyconych przez CDP)
+    extraction_mode = config.get('Scraper', 'extraction_mode', fallback='bulk')
+
+    # --- Konfiguracja przechwytywania sieci (extraction_mode = network) ---
+    network_url_pattern = config.get('Network', 'url_pattern', fallback=r'/api/')
+    network_offers_path = config.get('Network', 'offers_path', fallback='')
+    network_response_timeout = config.getfloat('Network', 'response_timeout', fallback=15.0)
+    network_field_map = {
+        'name': config.get('Network', 'name_field', fallback='name'),
+        'quantity': config.get('Network', 'quantity_field', fallback='quantity'),
+        'price': config.get('Network', 'price_field', fallback='price'),
+        'time_remaining': config.get('Network', 'time_remaining_field', fallback='timeRemaining'),
+    }
+    # Parametr numeru strony w przechwyconym zapytaniu o oferty (shardy powtarzają je z numerem swojej strony)
+    network_page_param = config.get('Network', 'page_param', fallback='page')
+    html_parse_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='parser')
+    # Liczba równoległych wątków (i przeglądarek w puli) oraz po ilu subkategoriach przeglądarka jest wymieniana
+    scraper_workers = config.getint('Scraper', 'workers', fallback=1)
+    max_jobs_per_session = config.getint('Scraper', 'max_jobs_per_session', fallback=20)
+    # scheduler_mode: 'threads' (wątki jednego procesu) lub 'processes' (osobne procesy z własnymi sterownikami)
+    scheduler_mode = config.get('Scraper', 'scheduler_mode', fallback='threads')
+    worker_drivers_dir = config.get('Scraper', 'worker_drivers_dir', fallback='drivers')
+    # shard_pages: w trybie 'network' subkategoria z co najmniej 2 * shard_pages stronami jest dzielona na zakresy
+    # stron dla kilku przeglądarek (najwyżej workers zakresów, każdy min. shard_pages stron); 0 wyłącza podział
+    shard_pages = config.getint('Scraper', 'shard_pages', fallback=0)
+
+    # --- Profil przeglądarki ---
+    # profile: 'full' (okno, wszystkie zasoby strony) lub 'light' (headless, bez GPU, obrazków, fontów, mediów
+    # i trackerów - mniej pamięci na przeglądarkę; Cloudflare może częściej odrzucać przeglądarkę headless)
+    browser_profile = config.get('Browser', 'profile', fallback='full')
+    browser_window_size = config.get('Browser', 'window_size', fallback='1024,768')
+    browser_blocked_urls = DEFAULT_BLOCKED_URLS + [pattern.strip() for pattern in
+                                                   config.get('Browser', 'blocked_urls', fallback='').split(',')
+                                                   if pattern.strip()]
+
+    # --- Limit zapytań do serwisu (wiadro żetonów wspólne dla wszystkich wątków i procesów) ---
+    # requests_per_second = 0 wyłącza limit; wartość ujemna jest błędem konfiguracji
+    requests_per_second = config.getfloat('RateLimit', 'requests_per_second', fallback=0.5)
+    if requests_per_second < 0:
+        raise ValueError(f"[RateLimit] requests_per_second nie może być ujemne: {requests_per_second}")
+    rate_limiter = HostRateLimiter({
+        urlparse(base_url).netloc: (requests_per_second, config.getint('RateLimit', 'burst', fallback=3))
+    })
+
+    # --- Połączenie z Bazą Danych ---
+    conn_str = (
+        f'DRIVER={{ODBC Driver 18 for SQL Server}};'
+        f'SERVER={server};DATABASE={database};'
+        f'UID={username};PWD={password};'
+        f'TrustServerCertificate=yes;'
+    )
+
+    # --- Konfiguracja tempa (jitter i oczekiwanie na gotowość strony) ---
+    pacer = Pacer(parse_jitter_ranges(config['Pacing']) if config.has_section('Pacing') else None,
+                  quiet_ms=config.getint('Pacing', 'quiet_ms', fallback=300))
+    # Maksymalny czas na przejście Cloudflare i na reakcję wyników po kliknięciu 'Szukaj'
+    cloudflare_timeout = config.getfloat('Pacing', 'cloudflare_timeout', fallback=45.0)
+    search_timeout = config.getfloat('Pacing', 'search_timeout', fallback=6.0)
+
+    # --- Konfiguracja zapisu do bazy (write-behind) ---
+    writer_queue_pages = config.getint('Writer', 'queue_pages', fallback=50)
+    writer_batch_rows = config.getint('Writer', 'batch_rows', fallback=1000)
+    writer_max_batch_age = config.getfloat('Writer', 'max_batch_age', fallback=5.0)
+    writer_max_retries = config.getint('Writer', 'max_retries', fallback=3)
+    writer_dead_letter_path = config.get('Writer', 'dead_letter_path', fallback='dead_letter.jsonl')
+    # bulk_mode: 'direct' (fast_executemany do tabeli items) lub 'staging' (tabela tymczasowa + jeden INSERT ... SELECT)
+    writer_bulk_mode = config.get('Writer', 'bulk_mode', fallback='direct')
+
+    # --- Konfiguracja schematu bazy ---
+    # sink: 'sqlserver' (domyślnie), 'sqlite', 'duckdb' lub 'parquet' (katalog partycjonowany po dniu i subkategorii);
+    # tylko 'sqlserver' wymaga sterownika ODBC, a schema_mode/delta_mode działają tylko z nim
+    storage_sink = config.get('Storage', 'sink', fallback='sqlserver')
+    if storage_sink not in SINK_KINDS:
+        raise ValueError(f"Nieznany sink w [Storage]: {storage_sink} (dostępne: {', '.join(SINK_KINDS)})")
+    # schema_mode: 'legacy' (pełne wiersze w tabeli items) lub 'normalized' (item_names/events + offer_snapshots)
+    schema_mode = config.get('Storage', 'schema_mode', fallback='legacy')
+    schema_columnstore = config.getboolean('Storage', 'columnstore', fallback=False)
+    schema_migrate_legacy = config.getboolean('Storage', 'migrate_legacy', fallback=False)
+    # delta_mode: zapisywane są tylko oferty nowe lub zmienione od poprzedniego przebiegu
+    delta_mode = config.getboolean('Storage', 'delta_mode', fallback=False)
+    delta_tolerance_seconds = config.getint('Storage', 'delta_tolerance_seconds', fallback=3600)
+
+    # --- Agregaty cen (min/mediana/max, ilość, liczba ofert) aktualizowane po zapisie każdej strony ---
+    aggregates_enabled = config.getboolean('Aggregates', 'enabled', fallback=True)
+    aggregates_path = config.get('Aggregates', 'path', fallback='aggregates.sqlite')
+    aggregates_snapshot_minutes = config.getint('Aggregates', 'snapshot_minutes', fallback=60)
+
+    # --- Punkty kontrolne (wznawianie przerwanego przebiegu przez --resume) ---
+    checkpoint_enabled = config.getboolean('Checkpoint', 'enabled', fallback=True)
+    checkpoint_path = config.get('Checkpoint', 'path', fallback='checkpoints.sqlite')
+
+    # --- Metryki (czasy faz, liczniki): podsumowanie JSON na końcu przebiegu i opcjonalnie endpoint Prometheus ---
+    metrics = Metrics()
+    metrics_json_path = config.get('Metrics', 'json_path', fallback='metrics.json')
+    # prometheus_port: 0 wyłącza endpoint /metrics; procesy robocze używają kolejnych portów
+    metrics_prometheus_port = config.getint('Metrics', 'prometheus_port', fallback=0)
+    # prometheus_host: 0.0.0.0 udostępnia endpoint poza lokalną maszyną
+    metrics_prometheus_host = config.get('Metrics', 'prometheus_host', fallback='127.0.0.1')
+
+    # --- Katalog kategorii: odkrywany na bazarze (discovery) albo z listy w kodzie, zawężany wzorcami ---
+    # include/exclude: wzorce fnmatch rozdzielone przecinkami, np. 'Główny Przedmiot/*, Składniki' albo '3353'
+    catalog_discovery = config.getboolean('Catalog', 'discovery', fallback=False)
+    catalog_cache_path = config.get('Catalog', 'cache_path', fallback='catalog_cache.json')
+    catalog_ttl_hours = config.getfloat('Catalog', 'ttl_hours', fallback=24.0)
+    catalog_option_timeout_ms = config.getint('Catalog', 'option_timeout_ms', fallback=2000)
+    catalog_include = parse_patterns(config.get('Catalog', 'include', fallback='*'))
+    catalog_exclude = parse_patterns(config.get('Catalog', 'exclude', fallback=''))
+
+    # --- Tryb ciągły (--daemon): odświeżanie subkategorii według tempa zmian ofert w budżecie stron na godzinę ---
+    daemon_pages_per_hour = config.getfloat('Daemon', 'pages_per_hour', fallback=600.0)
+    daemon_min_interval = config.getfloat('Daemon', 'min_interval_minutes', fallback=5.0) * 60
+    daemon_max_interval = config.getfloat('Daemon', 'max_interval_minutes', fallback=360.0) * 60
+    # Tempo zmian (ułamek ofert na godzinę) przyjmowane, zanim subkategoria zostanie zescrapowana dwa razy
+    daemon_default_change_rate = config.getfloat('Daemon', 'default_change_rate', fallback=1.0)
+    daemon_smoothing = config.getfloat('Daemon', 'smoothing', fallback=0.3)
+    daemon_state_path = config.get('Daemon', 'state_path', fallback='daemon_state.json')
+
+    # --- Pamięć podręczna startu: bootstrap schematu i id kategorii są pomijane, gdy nic się nie zmieniło ---
+    startup_cache_path = config.get('Startup', 'cache_path', fallback='startup_cache.json')
+    startup_cache_hours = config.getfloat('Startup', 'cache_hours', fallback=24.0)
+
+    # --- Magazyn sesji Cloudflare i profili Chrome ---
+    session_store = None
+    if config.getboolean('Session', 'enabled', fallback=True):
+        session_store = SessionStore(
+            config.get('Session', 'store_dir', fallback='sessions'),
+            profile_count=len(USER_AGENTS),
+            max_age_seconds=config.getfloat('Session', 'max_age_hours', fallback=12.0) * 3600,
+            use_profiles=config.getboolean('Session', 'use_profiles', fallback=True)
+        )
+    # Jak długo czekać na bazar, zanim uznamy zapisane ciasteczka za odrzucone przez Cloudflare
+    clearance_check_timeout = config.getfloat('Session', 'clearance_check_timeout', fallback=10.0)
+
+
+# --- Lista dostępnych eventów ---
+events_list = [
+    "Brak Eventu",
+    "Ulepszenie Ekwipunku",
+    "Podwójny Drop",
+    "Podwójne Doświadczenie",
+    "Ulepszanie Karty Specjalisty",
+    "Podwójne Pudełka Rajdu",
+    "Podwójne złoto",
+    "Ulepszanie Run",
+    "Ulepszanie Tatuaży",
+    "Ulepszanie Kart Specjalisty Partnera",
+    "Podwójne Błyskawiczne Bitwy"
+]
+
+
+# Funkcja do "ludzkiego" kliknięcia
+def human_click(driver, element):
+    """Przewija do elementu, symuluje ruch myszy i kliknięcie."""
+    try:
+        actions = ActionChains(driver)
+
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
+
+        offset_x = random.randint(-3, 3)
+        offset_y = random.randint(-3, 3)
+        # Pauza między najechaniem a kliknięciem jest wykonywana przez przeglądarkę - jedno zapytanie zamiast kilku
+        actions.move_to_element(element).move_by_offset(offset_x, offset_y).pause(pacer.jitter('hover')) \
+            .click().perform()
+        pacer.pause('click')
+    except Exception as e:
+        logging.warning(f"Błąd podczas symulacji ludzkiego kliknięcia: {e}. Próbuję standardowego kliknięcia.")
+        element.click()
+        pacer.pause('click')
+
+
+def build_item_records(raw_rows, category_ids, category_name, subcategory_ids, subcategory_name,
+                       current_event_name):
+    """
+    Zamienia surowe krotki (nazwa, ilość, cena, czas) jednej strony na krotki w kolejności ITEM_COLUMNS.
+    Cała strona jest czyszczona naraz i dostaje jeden znacznik czasu; błędy konwersji trafiają do liczników.
+    """
+    category_id = category_ids[category_name]
+    subcategory_id = subcategory_ids[(category_name, subcategory_name)]
+    with metrics.phase('cleaning', job=subcategory_name):
+        scraped_at = datetime.now()
+        columns, failures = clean_page(raw_rows, scraped_at)
+        records = [(
+            category_id,
+            category_name,
+            subcategory_id,
+            subcategory_name,
+            name,
+            quantity,
+            price,
+            time_remaining,
+            scraped_at,
+            current_event_name,
+            expires_at,
+            expires_in_seconds
+        ) for name, quantity, price, time_remaining, expires_at, expires_in_seconds in zip(
+            columns['name'], columns['quantity'], columns['price'], columns['time_remaining'], columns['expires_at'],
+            columns['expires_in_seconds'])]
+
+    if any(failures.values()):
+        for field, count in failures.items():
+            if count:
+                metrics.increment(f"{field}_parse_failures", count, job=subcategory_name)
+        logging.warning(f"Subkategoria: {subcategory_name} - Nieudane konwersje na stronie ({len(raw_rows)} wierszy): "
+                        f"ilość {failures['quantity']}, cena {failures['price']}, "
+                        f"czas do wygaśnięcia {failures['time_remaining']}.")
+    return records
+
+
+def capture_offers_response(driver, subcategory_name):
+    """
+    Czeka na odpowiedź JSON z ofertami po kliknięciu (tryb 'network'). Zwraca listę krotek lub None.
+    URL przechwyconego zapytania zostaje w driver.offers_url (shardy powtarzają je z innym numerem strony).
+    """
+    try:
+        with metrics.phase('network_capture'):
+            exchange = wait_for_json_exchange(driver, network_url_pattern, timeout=network_response_timeout)
+    except WebDriverException as e:
+        logging.warning(f"Wątek: {subcategory_name} - Błąd odczytu logu sieci: {e}")
+        return None
+    if exchange is None:
+        metrics.increment('timeouts')
+        logging.warning(
+            f"Wątek: {subcategory_name} - Nie przechwycono odpowiedzi pasującej do '{network_url_pattern}'. Użyję DOM.")
+        return None
+    driver.offers_url, payload = exchange
+    return offers_payload_rows(payload, subcategory_name)
+
+
+def offers_payload_rows(payload, subcategory_name):
+    """Wyciąga krotki ofert z payloadu JSON rynku. Zwraca None, gdy payload nie ma oczekiwanego kształtu."""
+    offers = find_offers_list(payload, network_offers_path)
+    if offers is None:
+        logging.warning(f"Wątek: {subcategory_name} - Odpowiedź JSON nie zawiera listy ofert.")
+        return None
+    rows = offers_to_rows(offers, network_field_map)
+    if any(row[0] is None for row in rows):
+        logging.warning(f"Wątek: {subcategory_name} - Oferty JSON nie mają pola '{network_field_map['name']}'.")
+        return None
+    return rows
+
+
+def fetch_offers_page(driver, offers_url, page, subcategory_name):
+    """
+    Pobiera stronę page, powtarzając w przeglądarce przechwycone zapytanie o oferty (fetch z ciasteczkami
+    i zgodą Cloudflare sesji), bez klikania w pager. Zwraca listę krotek (pustą za ostatnią stroną) lub None.
+    """
+    rate_limiter.acquire(base_url)
+    with metrics.phase('network_capture'):
+        payload = fetch_json_in_page(driver, with_query_param(offers_url, network_page_param, page),
+                                     timeout=network_response_timeout)
+    if payload is None:
+        metrics.increment('timeouts')
+        return None
+    return offers_payload_rows(payload, subcategory_name)
+
+
+def parse_page_source(page_source, category_ids, category_name, subcategory_ids, subcategory_name,
+                      current_event_name):
+    """Parsuje snapshot strony (tryb 'html') - wywoływane w wątku parsera, bez dostępu do przeglądarki."""
+    raw_rows = []
+    with metrics.phase('extraction', job=subcategory_name):
+        parsed_rows = parse_items_html(page_source)
+    for item_index, row in enumerate(parsed_rows):
+        if any(value is None for value in row):
+            logging.error(
+                f"Subkategoria: {subcategory_name}, Przedmiot {item_index} - Niekompletny wiersz w snapshocie HTML: {row}. Pomijam.")
+            continue
+        raw_rows.append(row)
+    return build_item_records(raw_rows, category_ids, category_name, subcategory_ids, subcategory_name,
+                              current_event_name)
+
+
+# --- Masowy odczyt strony z wynikami ---
+# Jeden execute_script zwraca wszystkie wiersze strony, zamiast kilku zapytań do WebDrivera na każdy przedmiot.
+EXTRACT_ITEMS_JS = """
+return Array.from(document.getElementsByClassName('item')).map(function (item) {
+    function text(selector) {
+        var element = item.querySelector(selector);
+        return element ? element.innerText.trim() : null;
+    }
+    return [
+        text('button.all-searches-p'),
+        text('p[style*="left: 372px;"]'),
+        text('button[style*="left: 470px;"]'),
+        text('p[style*="left: 612px;"]')
+    ];
+});
+"""
+
+
+def install_round_trip_counter(driver):
+    """Podpina licznik zapytań HTTP wysyłanych przez WebDrivera (driver.round_trips)."""
+    original_execute = driver.execute
+
+    def counting_execute(driver_command, params=None):
+        driver.round_trips += 1
+        return original_execute(driver_command, params)
+
+    driver.round_trips = 0
+    driver.execute = counting_execute
+
+
+def scrape_item_row(driver, item_index, subcategory_name):
+    """
+    Odczytuje pojedynczy przedmiot element po elemencie (tryb awaryjny).
+    Zwraca krotkę (nazwa, ilość, cena, czas) lub None.
+    """
+    retry = 0
+    while retry < 3:
+        items = driver.find_elements(By.CLASS_NAME, 'item')
+        if item_index >= len(items):
+            logging.warning(
+                f"Subkategoria: {subcategory_name} - Próba dostępu do przedmiotu {item_index} poza zakresem po odświeżeniu listy. Przechodzę do następnego.")
+            return None
+
+        item = items[item_index]
+
+        try:
+            name_element = WebDriverWait(item, 5).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, 'button.all-searches-p')))
+            quantity_element = WebDriverWait(item, 5).until(
+                EC.presence_of_element_located((By.XPATH, './/p[contains(@style, "left: 372px;")]')))
+            price_element = WebDriverWait(item, 5).until(
+                EC.presence_of_element_located((By.XPATH, './/button[contains(@style, "left: 470px;")]')))
+            time_remaining_element = WebDriverWait(item, 5).until(
+                EC.presence_of_element_located((By.XPATH, './/p[contains(@style, "left: 612px;")]')))
+
+            return (name_element.text, quantity_element.text, price_element.text, time_remaining_element.text)
+        except StaleElementReferenceException:
+            retry += 1
+            metrics.increment('stale_element_retries')
+            logging.warning(
+                f"Subkategoria: {subcategory_name}, Przedmiot {item_index} - StaleElementReferenceException (próba {retry}). Ponawiam próbę odczytu.")
+            pacer.pause('retry')
+        except (NoSuchElementException, TimeoutException):
+            metrics.increment('timeouts')
+            logging.error(
+                f"Subkategoria: {subcategory_name}, Przedmiot {item_index} - Błąd: element nie znaleziono lub timeout (wewnętrzny). Przechodzę do następnego.")
+            return None
+        except Exception:
+            logging.exception(
+                f"Subkategoria: {subcategory_name}, Przedmiot {item_index} - Nieoczekiwany błąd podczas przetwarzania elementu. Przechodzę do następnego.")
+            return None
+    return None
+
+
+def scrape_items_from_page(driver, category_ids, category_name, subcategory_ids, subcategory_name, current_event_name):
+    """
+    Scrauje przedmioty z aktualnie załadowanej strony i ZWRACA listę zebranych wierszy (krotek ITEM_COLUMNS).
+    Pusta lista oznacza stronę bez przedmiotów, None - błąd odczytu (strona nie została przeczytana).
+    """
+    raw_rows = []
+    round_trips_start = getattr(driver, 'round_trips', 0)
+    try:
+        with pacer.waiting():
+            WebDriverWait(driver, 30).until(
+                EC.presence_of_all_elements_located((By.CLASS_NAME, "item"))
+            )
+
+        with metrics.phase('extraction'):
+            rows = driver.execute_script(EXTRACT_ITEMS_JS) or []
+
+            if not rows:
+                return []
+
+            fallback_rows = 0
+            for item_index, row in enumerate(rows):
+                # Niespójny snapshot (np. wiersz w trakcie renderowania) - tylko ten wiersz czytamy po staremu
+                if not row or len(row) != 4 or any(value is None for value in row):
+                    fallback_rows += 1
+                    row = scrape_item_row(driver, item_index, subcategory_name)
+                    if row is None:
+                        logging.error(
+                            f"Subkategoria: {subcategory_name}, Przedmiot {item_index} - Nie udało się pobrać danych po kilku próbach.")
+                        continue
+
+                raw_rows.append(row)
+        if fallback_rows:
+            metrics.increment('fallback_rows', fallback_rows)
+
+        data_page_items = build_item_records(raw_rows, category_ids, category_name, subcategory_ids,
+                                             subcategory_name, current_event_name)
+
+        if hasattr(driver, 'round_trips'):
+            logging.info(
+                f"Subkategoria: {subcategory_name} - Odczytano {len(data_page_items)}/{len(rows)} przedmiotów, "
+                f"zapytania do WebDrivera: {driver.round_trips - round_trips_start}, wiersze awaryjne: {fallback_rows}.")
+
+        return data_page_items
+
+    except TimeoutException as e:
+        metrics.increment('timeouts')
+        logging.warning(
+            f"Subkategoria: {subcategory_name} - Timeout podczas oczekiwania na listę przedmiotów na stronie: {e}. (Może być pusta)")
+        return []
+    except WebDriverException as e:
+        logging.error(
+            f"Subkategoria: {subcategory_name} - Błąd WebDrivera podczas scrapowania przedmiotów ze strony: {e}")
+        return None
+    except Exception as e:
+        logging.exception(
+            f"Subkategoria: {subcategory_name} - Nieoczekiwany błąd podczas scrapowania przedmiotów ze strony: {e}")
+        return None
+
+
+def save_items_page(data_page_items, subcategory_name, current_page, page_key=None, scrape_id=None, on_stored=None):
+    """
+    Przekazuje przedmioty z jednej strony do asynchronicznego zapisu w bazie (w trybie delta tylko zmiany).
+    page_key = (kategoria, subkategoria): po zapisie strona trafia do punktu kontrolnego, a jej oferty
+    do harmonogramu trybu ciągłego. Agregaty cen dostają całą stronę (także w trybie delta), ale dopiero po zapisie jej wierszy;
+    scrape_id odróżnia kolejne scrapowania subkategorii. on_stored jest wołane na końcu potwierdzenia zapisu.
+    """
+    page_rows = len(data_page_items)
+    if refresh_scheduler and page_key:
+        refresh_scheduler.observe(page_key, {hash(tuple(row[i] for i in PAGE_FINGERPRINT_FIELDS))
+                                             for row in data_page_items})
+    if checkpoint_store and page_key:
+        on_stored = partial(record_checkpoint_page, page_key, current_page,
+                            page_fingerprint(data_page_items, PAGE_FINGERPRINT_FIELDS), on_stored)
+    if price_aggregates:
+        on_stored = partial(update_price_aggregates, data_page_items, scrape_id, current_page, on_stored)
+    if delta_tracker:
+        data_page_items, new_offers = delta_tracker.filter_rows(data_page_items)
+        on_stored = partial(confirm_delta_offers, new_offers, on_stored)
+    db_writer.submit(data_page_items, on_stored)
+    logging.info(
+        f"Wątek: {subcategory_name} - Strona {current_page} przekazana do zapisu "
+        f"({len(data_page_items)}/{page_rows} rekordów).")
+
+
+def record_checkpoint_page(page_key, page, fingerprint, on_stored=None):
+    """Potwierdzenie zapisu strony: zapisuje ją w punkcie kontrolnym, potem woła pozostałe potwierdzenie."""
+    checkpoint_store.record_page(*page_key, page, fingerprint)
+    if on_stored:
+        on_stored()
+
+
+def update_price_aggregates(page_rows, scrape_id, page, on_stored=None):
+    """Potwierdzenie zapisu strony: dolicza ją do agregatów cen, potem woła pozostałe potwierdzenie."""
+    try:
+        with metrics.phase('aggregates'):
+            price_aggregates.update(page_rows, scrape_id, page)
+    except Exception as e:
+        logging.error(f"Błąd aktualizacji agregatów cen: {e}")
+    if on_stored:
+        on_stored()
+
+
+def confirm_delta_offers(new_offers, on_stored=None):
+    """Potwierdzenie zapisu strony: nowe oferty stają się znane delcie, potem woła pozostałe potwierdzenie."""
+    delta_tracker.confirm(new_offers)
+    if on_stored:
+        on_stored()
+
+
+def finish_delta(subcategory_id, subcategory_name, complete, ended_at):
+    """Potwierdzenie zapisu wszystkich stron subkategorii: zamyka przebieg delty i od razu zapisuje jej stan."""
+    delta_stats = delta_tracker.finish(subcategory_id, complete=complete, ended_at=ended_at)
+    delta_tracker.save(delta_conn)
+    logging.info(f"Wątek: {subcategory_name} - Delta: {delta_stats['seen']} ofert, {delta_stats['new']} nowych "
+                 f"lub zmienionych, {delta_stats['ended']} zakończonych.")
+
+
+def create_driver(profile=None, driver_path=None):
+    """
+    Uruchamia nową instancję Chrome z opcjami i skryptami anty-detekcyjnymi (opcjonalnie dla profilu sesji).
+    driver_path wskazuje już załatany chromedriver (tryb wieloprocesowy).
+    """
+    import_selenium()
+    chrome_options = ChromeOptions()
+
+    if profile is None:
+        selected_user_agent = random.choice(USER_AGENTS)
+    else:
+        selected_user_agent = USER_AGENTS[profile % len(USER_AGENTS)]
+    chrome_options.add_argument(f"user-agent={selected_user_agent}")
+
+    light = browser_profile == 'light'
+    if not light:
+        chrome_options.add_argument("--start-maximized")
+
+    chrome_options.add_argument("--lang=pl-PL")
+
+    # --- Dodatkowe opcje Chrome mogące pomóc ---
+    chrome_options.add_argument('--ignore-certificate-errors')
+    chrome_options.add_argument('--disable-notifications')
+    chrome_options.add_argument('--disable-extensions')
+    if light:
+        apply_light_profile(chrome_options, browser_window_size)
+    else:
+        chrome_options.add_argument('--window-size=1400,900')
+
+    if extraction_mode == 'network':
+        enable_network_capture(chrome_options)
+
+    # --- Tworzenie instancji przeglądarki z automatycznym wykrywaniem wersji ---
+    # USUWAMY parametr 'version_main'
+    user_data_dir = session_store.profile_dir(profile) if session_store and profile is not None else None
+    # headless=True: undetected_chromedriver sam dobiera tryb --headless=new i łata jego znaki rozpoznawcze
+    driver = uc.Chrome(options=chrome_options, user_data_dir=user_data_dir, driver_executable_path=driver_path,
+                       headless=light)
+    try:
+        install_round_trip_counter(driver)
+        if light:
+            block_resources(driver, browser_blocked_urls)
+
+        # --- Wzmocnienie skryptów anty-detekcyjnych ---
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+            "source": """
+                Object.defineProperty(navigator, 'webdriver', {
+                    get: () => undefined
+                });
+            """
+        })
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+            "source": """
+                window.chrome = {
+                    runtime: {},
+                    app: {},
+                    csi: () => {},
+                    loadTimes: () => {}
+                };
+            """
+        })
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+            "source": """
+                Object.defineProperty(navigator, 'plugins', {
+                    get: () => [
+                        { description: 'Portable Document Format', filename: 'internal-pdf-viewer', name: 'PDF Viewer', ... },
+                        { description: 'Shockwave Flash', filename: 'internal-nacl-plugin', name: 'Shockwave Flash', ... }
+                    ],
+                });
+            """
+        })
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+            "source": """
+                Object.defineProperty(navigator, 'languages', {
+                    get: () => ['pl-PL', 'pl', 'en-US', 'en'],
+                });
+            """
+        })
+
+        driver.implicitly_wait(5)
+
+        if extraction_mode == 'network':
+            driver.execute_cdp_cmd("Network.enable", {})
+    except Exception:
+        driver.quit()
+        raise
+
+    return driver
+
+
+def open_bazaar(driver, base_url, log_name, profile=None):
+    """
+    Ładuje stronę główną, przechodzi Cloudflare i otwiera bazar (bibi-basar).
+    Z ważną zapisaną sesją profilu stałe oczekiwanie na Cloudflare jest pomijane.
+    """
+    use_store = session_store is not None and profile is not None
+    state = session_store.load(profile) if use_store else None
+    if state:
+        apply_cookies(driver, state)
+
+    # --- KLUCZOWE MIEJSCE DLA CLOUDFLARE INITIAL CHALLENGE ---
+    rate_limiter.acquire(base_url)
+    with metrics.phase('bazaar_navigation'):
+        driver.get(base_url)
+    if not first_navigation_done.is_set():
+        first_navigation_done.set()
+        startup_seconds = time.perf_counter() - PROCESS_STARTED
+        metrics.record_phase('startup_to_first_navigation', startup_seconds)
+        logging.info(f"Pierwsza nawigacja {startup_seconds:.2f} s od startu procesu.")
+
+    bibi_basar = None
+    # Nowy, pusty profil Chrome nie ma czego sprawdzać - od razu pełne oczekiwanie na Cloudflare
+    if state is not None or (use_store and session_store.had_chrome_profile(profile)):
+        if state:
+            apply_local_storage(driver, state)
+        try:
+            with pacer.waiting(), metrics.phase('cloudflare_wait'):
+                bibi_basar = WebDriverWait(driver, clearance_check_timeout).until(
+                    EC.element_to_be_clickable((By.ID, "bibi-basar"))
+                )
+            logging.info(f"Wątek: {log_name} - Sesja profilu {profile} ważna. Pomijam oczekiwanie na Cloudflare.")
+        except TimeoutException:
+            metrics.increment('session_clearance_rejected')
+            logging.info(f"Wątek: {log_name} - Sesja profilu {profile} nieważna. Pełne wyzwanie Cloudflare.")
+            session_store.invalidate(profile)
+
+    if bibi_basar is None:
+        logging.info(f"Wątek: {log_name} - Ładuję stronę główną. Oczekuję na Cloudflare.")
+        # Bazar pojawia się dopiero po przejściu wyzwania - czekamy na niego zamiast stałego opóźnienia
+        with pacer.waiting(), metrics.phase('cloudflare_wait'):
+            bibi_basar = WebDriverWait(driver, cloudflare_timeout).until(
+                EC.element_to_be_clickable((By.ID, "bibi-basar"))
+            )
+        pacer.pause('cloudflare')
+        if use_store:
+            try:
+                session_store.save(profile, driver)
+            except Exception as e:
+                logging.warning(f"Wątek: {log_name} - Nie udało się zapisać sesji profilu {profile}: {e}")
+
+    with metrics.phase('bazaar_navigation'):
+        human_click(driver, bibi_basar)
+
+
+def select_subcategory(driver, category_name, subcategory_name, category_value, subcategory_value):
+    """
+    Wybiera kategorię i subkategorię na otwartym bazarze i uruchamia wyszukiwanie.
+    Zwraca oferty przechwycone z sieci (tryb 'network') albo None, gdy stronę trzeba czytać z DOM.
+    """
+    # Przy ciepłej sesji na stronie są jeszcze wyniki poprzedniej subkategorii
+    # (execute_script zamiast find_elements, żeby nie czekać implicit wait na pustej stronie)
+    old_item = driver.execute_script("return document.querySelector('.item');")
+
+    selection_started = time.perf_counter()
+    category_dropdown_element = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.ID, "categoryDropdown"))
+    )
+    category_dropdown = Select(category_dropdown_element)
+    human_click(driver, category_dropdown_element)
+    category_dropdown.select_by_value(category_value)
+    pacer.pause('select')
+
+    subcategory_dropdown_element = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.ID, "subCategoryDropdown"))
+    )
+    subcategory_dropdown = Select(subcategory_dropdown_element)
+    human_click(driver, subcategory_dropdown_element)
+    subcategory_dropdown.select_by_value(subcategory_value)
+    pacer.pause('select')
+
+    search_button = driver.find_element(By.CLASS_NAME, "search-button")
+    metrics.record_phase('dropdown_selection', time.perf_counter() - selection_started)
+
+    # Oferty z odpowiedzi JSON na kliknięcie (tryb 'network'); None = odczyt z DOM
+    captured_rows = None
+    if extraction_mode == 'network':
+        drain_performance_log(driver)
+    pacer.arm_results_observer(driver)
+    rate_limiter.acquire(base_url)
+    page_load_started = time.perf_counter()
+    human_click(driver, search_button)
+    logging.info(f"Wątek: {subcategory_name} - Wybrano '{category_name}'/'{subcategory_name}'. Klikam 'Szukaj'.")
+
+    # Drugie kliknięcie tylko wtedy, gdy wyniki nie zareagowały na pierwsze
+    if not pacer.wait_results_settled(driver, search_timeout):
+        metrics.increment('search_retries')
+        logging.info(f"Wątek: {subcategory_name} - Wyniki nie zmieniły się po kliknięciu 'Szukaj'. Klikam ponownie.")
+        if extraction_mode == 'network':
+            drain_performance_log(driver)
+        pacer.arm_results_observer(driver)
+        rate_limiter.acquire(base_url)
+        human_click(driver, search_button)
+        pacer.wait_results_settled(driver, search_timeout)
+
+    if extraction_mode == 'network':
+        captured_rows = capture_offers_response(driver, subcategory_name)
+
+    with pacer.waiting():
+        if old_item:
+            WebDriverWait(driver, 20).until(EC.staleness_of(old_item))
+
+        WebDriverWait(driver, 25).until(
+            EC.presence_of_all_elements_located((By.CLASS_NAME, "item"))
+        )
+    metrics.record_phase('page_load', time.perf_counter() - page_load_started)
+    logging.info(
+        f"Wątek: {subcategory_name} - Przedmioty załadowane po wyszukiwaniu. Rozpoczynam scrapowanie strony 1.")
+    pacer.pause('page')
+    return captured_rows
+
+
+# --- Pula długo żyjących przeglądarek ---
+# Utrzymujemy bardzo duże opóźnienie między uruchomieniami przeglądarek (dla WinError 183)
+MIN_THREAD_START_DELAY = 15.0  # Duże opóźnienie
+MAX_THREAD_START_DELAY = 30.0  # Bardzo duże opóźnienie
+
+
+def fast_forward_pages(driver, subcategory_name, target_page):
+    """
+    Przewija wyniki do strony target_page samym przyciskiem 'następna', bez odczytu ofert.
+    Zwraca numer osiągniętej strony (mniejszy, jeśli stron jest teraz mniej niż w punkcie kontrolnym).
+    """
+    current_page = 1
+    while current_page < target_page:
+        try:
+            with pacer.waiting():
+                next_page_button = WebDriverWait(driver, 15).until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, "button.pagination-button.next-button:not([disabled])"))
+                )
+            old_item = driver.execute_script("return document.querySelector('.item');")
+            if extraction_mode == 'network':
+                drain_performance_log(driver)
+            rate_limiter.acquire(base_url)
+            human_click(driver, next_page_button)
+            with pacer.waiting():
+                if old_item:
+                    WebDriverWait(driver, 20).until(EC.staleness_of(old_item))
+                WebDriverWait(driver, 30).until(EC.presence_of_all_elements_located((By.CLASS_NAME, "item")))
+        except TimeoutException:
+            logging.warning(f"Wątek: {subcategory_name} - Przewijanie zatrzymane na stronie {current_page} "
+                            f"(punkt kontrolny: {target_page}).")
+            break
+        current_page += 1
+    logging.info(f"Wątek: {subcategory_name} - Wznowiono od strony {current_page}.")
+    return current_page
+
+
+def read_page_count(driver):
+    """Odczytuje liczbę stron wyników z pagera ('1 / 12'). Zwraca None, jeśli pager jej nie pokazuje."""
+    page_info = parse_page_info(driver.execute_script(
+        "var info = document.querySelector('.pagination-info'); return info ? info.textContent : null;"))
+    return page_info[1] if page_info else None
+
+
+class BrowserSession:
+    """Przeglądarka otwarta na bazarze, używana przez kolejne zadania subkategorii."""
+
+    def __init__(self, driver, session_id, profile=None):
+        self.driver = driver
+        self.session_id = session_id
+        self.profile = profile
+        self.jobs_done = 0
+        self.on_bazaar = False
+        self.page_load_ms = None
+        self.peak_rss = None
+
+    def sample_resources(self):
+        """Mierzy pamięć RSS przeglądarki (z procesami potomnymi) i zapamiętuje szczyt."""
+        rss = browser_rss_bytes(self.driver)
+        if rss is None:
+            return
+        self.peak_rss = max(self.peak_rss or 0, rss)
+        metrics.observe('browser_rss_mb', rss / 2 ** 20)
+        logging.info(f"Sesja {self.session_id} - RSS przeglądarki: {rss / 2 ** 20:.0f} MB.")
+
+    def check_health(self):
+        """Sprawdza, czy przeglądarka odpowiada, i aktualizuje on_bazaar. Zwraca False dla martwej sesji."""
+        try:
+            self.on_bazaar = bool(self.driver.execute_script(
+                "return document.readyState === 'complete' && document.getElementById('categoryDropdown') !== null;"))
+            return True
+        except WebDriverException as e:
+            logging.warning(f"Sesja {self.session_id} - Przeglądarka nie odpowiada: {e}")
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+            resources = []
+            if self.peak_rss is not None:
+                resources.append(f"szczyt RSS {self.peak_rss / 2 ** 20:.0f} MB")
+            if self.page_load_ms is not None:
+                resources.append(f"ładowanie strony {self.page_load_ms:.0f} ms")
+            logging.info(f"Sesja {self.session_id} - Przeglądarka zamknięta po {self.jobs_done} zadaniach"
+                         f"{' (' + ', '.join(resources) + ')' if resources else ''}.")
+        except Exception as e:
+            logging.error(f"Sesja {self.session_id} - Błąd podczas zamykania przeglądarki: {e}")
+        finally:
+            if session_store and self.profile is not None:
+                session_store.release_profile(self.profile)
+
+
+class BrowserPool:
+    """
+    Pula sesji przeglądarki: sesja zostaje na bazarze i obsługuje kolejne subkategorie,
+    a jest wymieniana dopiero po max_jobs zadaniach albo po błędzie.
+    """
+
+    def __init__(self, base_url, size, max_jobs, profile=None, driver_path=None):
+        self.base_url = base_url
+        self.size = size
+        self.max_jobs = max_jobs
+        # Stały profil i własny, załatany sterownik (proces roboczy); bez nich profil jest wypożyczany z magazynu
+        self.profile = profile
+        self.driver_path = driver_path
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._live_sessions = 0
+        self._next_session_id = 1
+        self._last_start = None
+
+    def _start_session(self):
+        # Uruchomienia są serializowane i rozsunięte w czasie, bo równoległe łatanie chromedrivera kończy się WinError 183
+        # (z własnym, wcześniej załatanym sterownikiem opóźnienie nie jest potrzebne)
+        with self._start_lock:
+            if self._last_start is not None and self.driver_path is None:
+                delay = random.uniform(MIN_THREAD_START_DELAY, MAX_THREAD_START_DELAY)
+                remaining = delay - (time.monotonic() - self._last_start)
+                if remaining > 0:
+                    logging.info(f"Oczekiwanie na uruchomienie kolejnej przeglądarki przez {remaining:.2f} sekundy...")
+                    pacer.sleep(remaining)
+            leased = self.profile is None and session_store is not None
+            profile = session_store.acquire_profile() if leased else self.profile
+            try:
+                with metrics.phase('driver_startup'):
+                    driver = create_driver(profile, self.driver_path)
+            except Exception:
+                if leased:
+                    session_store.release_profile(profile)
+                raise
+            finally:
+                self._last_start = time.monotonic()
+
+        with self._lock:
+            session_id = self._next_session_id
+            self._next_session_id += 1
+        logging.info(f"Sesja {session_id} - Uruchomiono nową przeglądarkę (profil {profile}).")
+        return BrowserSession(driver, session_id, profile)
+
+    def acquire(self):
+        """Zwraca zdrową sesję: wolną z puli, nową (jeśli jest miejsce) albo czeka na zwolnienie."""
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_start = self._live_sessions < self.size
+                    if can_start:
+                        self._live_sessions += 1
+                if can_start:
+                    try:
+                        return self._start_session()
+                    except Exception:
+                        with self._lock:
+                            self._live_sessions -= 1
+                        raise
+                session = self._idle.get()
+
+            if session.check_health():
+                return session
+            self._discard(session)
+
+    def release(self, session, failed=False):
+        """Oddaje sesję do puli albo ją zamyka (po błędzie lub po max_jobs zadaniach)."""
+        session.jobs_done += 1
+        if not failed:
+            session.sample_resources()
+        if failed or session.jobs_done >= self.max_jobs:
+            self._discard(session)
+        else:
+            self._idle.put(session)
+
+    def _discard(self, session):
+        session.quit()
+        with self._lock:
+            self._live_sessions -= 1
+
+    def close(self):
+        """Zamyka wszystkie wolne sesje."""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+def finish_sharded_subcategory(group, category_name, subcategory_name, complete):
+    """Wołane przez ostatni shard: loguje scalenie i oznacza subkategorię jako ukończoną po zapisie wszystkich stron."""
+    logging.info(f"Wątek: {subcategory_name} - Shardy zakończone ({'wszystkie' if complete else 'z błędami'}), "
+                 f"odrzucono {group.duplicates_dropped} powtórzonych ofert na granicach zakresów stron.")
+    if checkpoint_store and complete:
+        # Strony shardów nie są ciągłe, więc zamiast numeru strony sprawdzane jest potwierdzenie zapisu każdej z nich
+        def mark_completed():
+            if group.all_pages_stored():
+                checkpoint_store.mark_completed(category_name, subcategory_name, 0)
+            else:
+                logging.warning(f"Punkt kontrolny '{subcategory_name}': nie wszystkie strony shardów zostały zapisane.")
+
+        db_writer.submit([], mark_completed)
+
+
+def scrape_shard_pages(driver, shard, category_ids, category_name, subcategory_ids, subcategory_name,
+                       current_event_name, store_page):
+    """
+    Czyta zakres stron shardu powtarzanym zapytaniem o oferty (bez pagera i bez wyboru subkategorii w UI).
+    Zwraca False, gdy strony nie udało się pobrać; pusta strona kończy zakres (subkategoria się skurczyła).
+    """
+    for page in range(shard.start_page, shard.end_page + 1):
+        rows = fetch_offers_page(driver, shard.group.offers_url, page, subcategory_name)
+        if rows is None:
+            logging.error(f"Wątek: {subcategory_name} - Nie udało się pobrać strony {page} zakresu "
+                          f"{shard.start_page}-{shard.end_page}.")
+            return False
+        if not rows:
+            logging.info(f"Wątek: {subcategory_name} - Strona {page} nie zawiera przedmiotów - koniec zakresu "
+                         f"{shard.start_page}-{shard.end_page}.")
+            return True
+        store_page(build_item_records(rows, category_ids, category_name, subcategory_ids, subcategory_name,
+                                      current_event_name), page)
+        if page < shard.end_page:
+            pacer.pause('page')
+    logging.info(f"Wątek: {subcategory_name} - Koniec zakresu stron {shard.start_page}-{shard.end_page}.")
+    return True
+
+
+def scrape_subcategory_data(pool, category_name, subcategory_name, category_value, subcategory_value, category_ids,
+                            subcategory_ids, current_event_name, shard=None, submit_shard=None):
+    """
+    Scrauje dane dla pojedynczej subkategorii na sesji z puli i zapisuje je bezpośrednio do bazy danych.
+    Z submit_shard duża subkategoria (tryb 'network') jest dzielona na zakresy stron: ten wątek bierze pierwszy
+    zakres, a pozostałe są przekazywane przez submit_shard(shard) jako osobne zadania (wołające tę funkcję z shard).
+    """
+    checkpoint = None
+    if shard is None and checkpoint_store:
+        checkpoint = checkpoint_store.get(category_name, subcategory_name)
+    if checkpoint and checkpoint.completed:
+        logging.info(f"Wątek: {subcategory_name} - Subkategoria ukończona w tym przebiegu - pomijam.")
+        return True
+    resume_page = checkpoint.last_page if checkpoint else 0
+    # Wznowienie należy do tego samego przebiegu, więc strony zapisane przed przerwą nie są liczone ponownie
+    if shard:
+        scrape_id = shard.group.scrape_id
+    else:
+        scrape_id = checkpoint_store.run_id if checkpoint_store else uuid.uuid4().hex
+
+    session = None
+    failed = True
+    job_started = time.monotonic()
+    subcategory_id = subcategory_ids[(category_name, subcategory_name)]
+    # Przebieg delty obejmuje całą subkategorię - zaczyna go zadanie główne, kończy ostatni shard
+    if delta_tracker and shard is None:
+        delta_tracker.begin(subcategory_id)
+    # Metryki zadania są zbierane per subkategoria (shardy sumują się do tej samej pozycji)
+    previous_job = metrics.set_job(subcategory_name)
+    try:
+        session = pool.acquire()
+        driver = session.driver
+
+        if not session.on_bazaar:
+            open_bazaar(driver, pool.base_url, subcategory_name, session.profile)
+            session.on_bazaar = True
+            session.page_load_ms = navigation_time_ms(driver)
+            if session.page_load_ms is not None:
+                metrics.observe('bazaar_page_load_ms', session.page_load_ms)
+                logging.info(f"Sesja {session.session_id} - Strona bazaru załadowana w {session.page_load_ms:.0f} ms.")
+
+        last_data_page = 0
+        # W trybie 'html' strona jest parsowana w tle, a przeglądarka w tym czasie przechodzi dalej
+        pending_parse = None
+
+        def store_page(page_rows, page):
+            """Zapisuje stronę; strona z punktu kontrolnego jest pomijana, jeśli jej pierwszy wiersz się nie zmienił."""
+            nonlocal last_data_page
+            last_data_page = page
+            metrics.increment('pages')
+            metrics.observe('rows_per_page', len(page_rows))
+            if shard:
+                save_items_page(shard.group.merge_page(page, page_rows), subcategory_name, page, scrape_id=scrape_id,
+                                on_stored=partial(shard.group.page_stored, page))
+                return
+            if page == resume_page:
+                if page_fingerprint(page_rows, PAGE_FINGERPRINT_FIELDS) == checkpoint.fingerprint:
+                    logging.info(f"Wątek: {subcategory_name} - Strona {page} zgodna z punktem kontrolnym - już zapisana.")
+                    return
+                logging.warning(f"Wątek: {subcategory_name} - Strona {page} zmieniła się od punktu kontrolnego "
+                                f"- zapisuję ją ponownie.")
+            save_items_page(page_rows, subcategory_name, page, (category_name, subcategory_name), scrape_id)
+
+        def finish_pending_parse():
+            """Czeka na wynik parsowania poprzedniej strony i zapisuje go. Zwraca False dla pustej strony."""
+            nonlocal pending_parse
+            if pending_parse is None:
+                return True
+            parsed_page, parse_future = pending_parse
+            pending_parse = None
+            data_parsed_page = parse_future.result()
+            if not data_parsed_page:
+                logging.info(
+                    f"Wątek: {subcategory_name} - Strona {parsed_page} nie zawiera przedmiotów. Koniec paginacji dla tej subkategorii.")
+                return False
+            store_page(data_parsed_page, parsed_page)
+            return True
+
+        if shard:
+            # Zakres od drugiego wzwyż: bez wyboru subkategorii w UI, strony pobiera powtórzone zapytanie o oferty
+            if not scrape_shard_pages(driver, shard, category_ids, category_name, subcategory_ids, subcategory_name,
+                                      current_event_name, store_page):
+                return False
+            failed = False
+            return True
+
+        captured_rows = select_subcategory(driver, category_name, subcategory_name, category_value,
+                                           subcategory_value)
+
+        # Podział wymaga przechwyconego zapytania o oferty - tylko ono pozwala otworzyć dowolną stronę
+        if submit_shard and shard_pages > 0 and resume_page == 0 and captured_rows is not None:
+            total_pages = read_page_count(driver)
+            shard_count = min(scraper_workers, (total_pages or 0) // shard_pages)
+            if shard_count > 1:
+                group = ShardGroup(subcategory_name, total_pages, shard_count, PAGE_FINGERPRINT_FIELDS,
+                                   driver.offers_url, scrape_id)
+                shard = group.shards[0]
+                for other_shard in group.shards[1:]:
+                    submit_shard(other_shard)
+                logging.info(f"Wątek: {subcategory_name} - {total_pages} stron podzielono na {shard_count} zakresy: "
+                             f"{', '.join(f'{s.start_page}-{s.end_page}' for s in group.shards)}.")
+        end_page = shard.end_page if shard else None
+
+        current_page = 1
+        if resume_page > 1:
+            current_page = fast_forward_pages(driver, subcategory_name, resume_page)
+            # Odpowiedź JSON przewiniętej strony nie została przechwycona - odczyt z DOM
+            captured_rows = None
+        last_data_page = current_page - 1
+
+        while True:
+            if extraction_mode == 'html':
+                pending_parse = (current_page, html_parse_executor.submit(
+                    parse_page_source, driver.page_source, category_ids, category_name, subcategory_ids,
+                    subcategory_name, current_event_name))
+            else:
+                if captured_rows is not None:
+                    data_current_page = build_item_records(captured_rows, category_ids, category_name,
+                                                           subcategory_ids, subcategory_name, current_event_name)
+                else:
+                    data_current_page = scrape_items_from_page(driver, category_ids, category_name,
+                                                               subcategory_ids, subcategory_name, current_event_name)
+
+                if data_current_page is None:
+                    # Nieprzeczytana strona to nie koniec paginacji - przebieg nie może zostać uznany za pełny
+                    logging.error(
+                        f"Wątek: {subcategory_name} - Nie udało się odczytać strony {current_page}. Wątek nie powiódł się.")
+                    return False
+                if data_current_page:
+                    store_page(data_current_page, current_page)
+                else:
+                    logging.info(
+                        f"Wątek: {subcategory_name} - Strona {current_page} nie zawiera przedmiotów. Koniec paginacji dla tej subkategorii.")
+                    break
+
+            if end_page and current_page >= end_page:
+                logging.info(f"Wątek: {subcategory_name} - Koniec zakresu stron 1-{end_page}.")
+                break
+
+            try:
+                with pacer.waiting():
+                    next_page_button = WebDriverWait(driver, 15).until(
+                        EC.element_to_be_clickable(
+                            (By.CSS_SELECTOR, "button.pagination-button.next-button:not([disabled])"))
+                    )
+
+                old_item = None
+                try:
+                    old_item = driver.find_element(By.CLASS_NAME, "item")
+                except NoSuchElementException:
+                    pass
+
+                if extraction_mode == 'network':
+                    drain_performance_log(driver)
+                rate_limiter.acquire(base_url)
+                page_load_started = time.perf_counter()
+                human_click(driver, next_page_button)
+                logging.info(f"Wątek: {subcategory_name} - Przechodzę do Strony {current_page + 1}.")
+
+                parse_wait_started = time.perf_counter()
+                if not finish_pending_parse():
+                    break
+                parse_wait = time.perf_counter() - parse_wait_started
+
+                if extraction_mode == 'network':
+                    captured_rows = capture_offers_response(driver, subcategory_name)
+
+                with pacer.waiting():
+                    if old_item:
+                        WebDriverWait(driver, 20).until(EC.staleness_of(old_item))
+
+                    # Z przechwyconym JSON-em nie czekamy na wyrenderowanie wierszy
+                    if captured_rows is None:
+                        WebDriverWait(driver, 30).until(
+                            EC.presence_of_all_elements_located((By.CLASS_NAME, "item"))
+                        )
+                # Bez czasu parsowania poprzedniej strony (finish_pending_parse), który liczy się do extraction
+                metrics.record_phase('page_load', time.perf_counter() - page_load_started - parse_wait)
+
+                current_page += 1
+                pacer.pause('page')
+
+            except (NoSuchElementException, TimeoutException):
+                logging.info(
+                    f"Wątek: {subcategory_name} - Brak kolejnych stron dla subkategorii '{subcategory_name}'. Zakończono paginację.")
+                break
+            except WebDriverException as e:
+                logging.error(
+                    f"Wątek: {subcategory_name} - Krytyczny błąd WebDrivera podczas nawigacji na następną stronę dla '{subcategory_name}': {e}. Wątek nie powiódł się.")
+                finish_pending_parse()
+                return False
+            except Exception as e:
+                logging.exception(
+                    f"Wątek: {subcategory_name} - Nieoczekiwany błąd podczas nawigacji na następną stronę dla '{subcategory_name}': {e}. Wątek nie powiódł się.")
+                finish_pending_parse()
+                return False
+
+        finish_pending_parse()
+        if checkpoint_store and shard is None:
+            # Subkategoria jest ukończona dopiero, gdy wątek zapisu potwierdzi wszystkie jej strony
+            db_writer.submit([], partial(checkpoint_store.mark_completed, category_name, subcategory_name,
+                                         last_data_page))
+
+        logging.info(f"Wątek: {subcategory_name} - Zakończono scrapowanie subkategorii '{subcategory_name}'.")
+        failed = False
+        return True
+
+    except TimeoutException as e:
+        logging.warning(
+            f"Wątek: {subcategory_name} - Timeout podczas inicjalizacji/nawigacji dla '{subcategory_name}': {e}. Wątek nie powiódł się.")
+        return False
+    except WebDriverException as e:
+        logging.error(
+            f"Wątek: {subcategory_name} - Błąd WebDrivera podczas inicjalizacji/podstawowych operacji dla '{subcategory_name}': {e}. Wątek nie powiódł się.")
+        return False
+    except Exception as e:
+        logging.exception(
+            f"Wątek: {subcategory_name} - Nieoczekiwany błąd w wątku subkategorii '{subcategory_name}': {e}. Wątek nie powiódł się.")
+        return False
+    finally:
+        if session:
+            pool.release(session, failed)
+        pacer.add_job_time(time.monotonic() - job_started)
+        metrics.record_phase('job', time.monotonic() - job_started)
+        metrics.increment('jobs_failed' if failed else 'jobs_completed')
+        metrics.set_job(previous_job)
+        # Po wznowieniu wcześniejsze strony nie były czytane, więc ich ofert nie można uznać za zakończone
+        complete = not failed and resume_page == 0
+        finish_subcategory = True
+        if shard:
+            finish_subcategory, complete = shard.group.finish_shard(not failed)
+            if finish_subcategory:
+                finish_sharded_subcategory(shard.group, category_name, subcategory_name, complete)
+        if delta_tracker and finish_subcategory:
+            # Przebieg jest zamykany w wątku zapisu, gdy wszystkie strony subkategorii są już w bazie
+            db_writer.submit([], partial(finish_delta, subcategory_id, subcategory_name, complete, datetime.now()))
+
+
+# --- Kategorie i subkategorie do scrapowania ---
+categories = {
+    "Główny Przedmiot": "3310",
+    "Przedmiot Konsumpcyjny": "3311"
+}
+
+subcategories = {
+    "Główny Przedmiot": [
+        #("Zwyczajne przedmioty", "3350"),
+       # ("Materiały do ulepszania", "3351"),
+       # ("Narzędzia", "3352"),
+        ("Przedmioty specjalne", "3353")
+      #  ("Eliksiry", "3354"),
+      # ("Event", "3355"),
+       # ("Tytuł", "4626")
+    ],
+    "Przedmiot Konsumpcyjny": [
+        ("Składniki", "3359")
+    ]
+}
+
+
+# --- Sekcja wyboru eventu przed rozpoczęciem scrapowania ---
+def choose_event(event=None):
+    """
+    Zwraca nazwę eventu: z argumentu --event (nazwa albo numer z listy), a bez niego pyta użytkownika.
+    Bez --event i bez konsoli (cron, usługa) kończy program zamiast czekać na input().
+    """
+    if event is not None:
+        if event.isdigit() and 0 < int(event) <= len(events_list):
+            current_event_name = events_list[int(event) - 1]
+        else:
+            matching = [name for name in events_list if name.casefold() == event.strip().casefold()]
+            if not matching:
+                raise SystemExit(f"Nieznany event: {event}. Dostępne: {', '.join(events_list)}")
+            current_event_name = matching[0]
+        logging.info(f"Rozpoczynanie scrapowania z eventem z linii poleceń: {current_event_name}")
+        return current_event_name
+
+    if not sys.stdin.isatty():
+        raise SystemExit("Brak --event, a wejście nie jest konsolą - podaj event w linii poleceń.")
+
+    print("\nWybierz aktualny event:")
+    for i, event in enumerate(events_list):
+        print(f"{i + 1}. {event}")
+
+    selected_event_index = -1
+    while not (0 < selected_event_index <= len(events_list)):
+        try:
+            user_input = input(f"Podaj numer eventu (1-{len(events_list)}): ")
+            selected_event_index = int(user_input)
+            if not (0 < selected_event_index <= len(events_list)):
+                print("Nieprawidłowy numer. Spróbuj ponownie.")
+        except ValueError:
+            print("Nieprawidłowy numer. Wprowadź liczbę.")
+
+    current_event_name = events_list[selected_event_index - 1]
+    print(f"\nWybrano event: {current_event_name}\n")
+    logging.info(f"Rozpoczynanie scrapowania z wybranym eventem: {current_event_name}")
+    return current_event_name
+
+
+def select_categories(selection):
+    """
+    Zawęża categories i subcategories do pozycji z --categories (nazwy lub wartości kategorii i subkategorii
+    rozdzielone przecinkami; kategoria oznacza wszystkie jej subkategorie).
+    """
+    global categories, subcategories
+    wanted = {name.strip().casefold() for name in selection.split(',') if name.strip()}
+    selected = {}
+    for category_name, category_value in categories.items():
+        whole_category = category_name.casefold() in wanted or category_value in wanted
+        chosen = [(subcategory_name, subcategory_value)
+                  for subcategory_name, subcategory_value in subcategories.get(category_name, [])
+                  if whole_category or subcategory_name.casefold() in wanted or subcategory_value in wanted]
+        if chosen:
+            selected[category_name] = chosen
+
+    known = {name.casefold() for name in categories} | set(categories.values()) | {
+        value for subcategories_list in subcategories.values() for entry in subcategories_list
+        for value in (entry[0].casefold(), entry[1])}
+    unknown = wanted - known
+    if unknown or not selected:
+        raise SystemExit(f"Nieznane kategorie lub subkategorie: {', '.join(sorted(unknown)) or selection}")
+
+    categories = {category_name: categories[category_name] for category_name in selected}
+    subcategories = selected
+    logging.info(f"Wybrane subkategorie: {', '.join(name for chosen in selected.values() for name, _ in chosen)}")
+
+
+def connect_database():
+    """Łączy się z bazą danych; bez połączenia kończy program."""
+    # Import dopiero tutaj: pozostałe sinki działają bez pyodbc i sterownika ODBC
+    import pyodbc
+    try:
+        connection = pyodbc.connect(conn_str)
+        logging.info("Połączono z bazą danych.")
+        return connection
+    except Exception as e:
+        logging.error(f"Błąd połączenia z bazą danych: {e}")
+        exit()
+
+
+def bootstrap_database(conn):
+    """Tworzy tabele w bazie danych (jeśli nie istnieją)."""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        IF OBJECT_ID('categories', 'U') IS NULL
+        CREATE TABLE categories (
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            name NVARCHAR(255) NOT NULL
+        )
+        """)
+        conn.commit()
+
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        IF OBJECT_ID('subcategories', 'U') IS NULL
+        CREATE TABLE subcategories (
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            category_id INT NOT NULL FOREIGN KEY REFERENCES categories(id),
+            name NVARCHAR(255) NOT NULL
+            )
+        """)
+        conn.commit()
+
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        IF OBJECT_ID('items', 'U') IS NULL
+        CREATE TABLE items (
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            CategoryID INT NOT NULL FOREIGN KEY REFERENCES categories(id),
+            CategoryName NVARCHAR(255) NOT NULL,
+            SubCategoryID INT NOT NULL FOREIGN KEY REFERENCES subcategories(id),
+            SubCategoryName NVARCHAR(255) NOT NULL,
+            Name NVARCHAR(255) NOT NULL,
+            Quantity INT,
+            Price INT,
+            TimeRemaining NVARCHAR(50),
+            DataScrapingu DATETIME NOT NULL
+        )
+        """)
+        conn.commit()
+
+    # Zmiana: Dodanie kolumny 'Event' do tabeli 'items' jeśli jej nie ma
+    with conn.cursor() as cursor:
+        try:
+            cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
+                           WHERE TABLE_SCHEMA = 'dbo' 
+                           AND TABLE_NAME = 'items' 
+                           AND COLUMN_NAME = 'Event')
+            BEGIN
+                ALTER TABLE items ADD Event NVARCHAR(255);
+            END
+            """)
+            conn.commit()
+            logging.info("Sprawdzono i ewentualnie dodano kolumnę 'Event' do tabeli 'items'.")
+        except Exception as e:
+            logging.error(f"Błąd podczas dodawania kolumny 'Event' do tabeli 'items': {e}")
+
+    # Wygaśnięcie jako liczba (a nie tekst TimeRemaining) - indeks pod zapytania o oferty, które wkrótce wygasają
+    with conn.cursor() as cursor:
+        cursor.execute("""
+        IF COL_LENGTH('items', 'ExpiresAt') IS NULL
+        ALTER TABLE items ADD ExpiresAt DATETIME NULL, ExpiresInSeconds INT NULL
+        """)
+        cursor.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE object_id = OBJECT_ID('items') AND name = 'IX_items_ExpiresAt')
+        CREATE NONCLUSTERED INDEX IX_items_ExpiresAt ON items (ExpiresAt) INCLUDE (Name, Price)
+        """)
+        conn.commit()
+
+
+def resolve_category_ids(conn):
+    """
+    Zwraca id kategorii i subkategorii z bazy, dopisując brakujące - jednym MERGE na tabelę zamiast
+    zapytania (i ewentualnego INSERT) na każdą pozycję. WHEN MATCHED sprawia, że OUTPUT zwraca też istniejące id.
+    """
+    category_names = list(categories)
+    subcategory_keys = [(category_name, subcategory_name)
+                        for category_name in category_names
+                        for subcategory_name, _ in subcategories.get(category_name, [])]
+    category_ids = {}
+    subcategory_ids = {}
+    with conn.cursor() as cursor:
+        if category_names:
+            cursor.execute(f"""
+            MERGE categories AS target
+            USING (VALUES {', '.join('(?)' for _ in category_names)}) AS source (name)
+            ON target.name = source.name
+            WHEN MATCHED THEN UPDATE SET name = source.name
+            WHEN NOT MATCHED THEN INSERT (name) VALUES (source.name)
+            OUTPUT INSERTED.id, INSERTED.name;
+            """, category_names)
+            # Przy zdublowanych nazwach (stare dane) wygrywa najniższe id
+            for category_id, name in sorted(cursor.fetchall(), reverse=True):
+                category_ids[name] = category_id
+
+        if subcategory_keys:
+            cursor.execute(f"""
+            MERGE subcategories AS target
+            USING (SELECT c.id, v.name
+                   FROM (VALUES {', '.join('(?, ?)' for _ in subcategory_keys)}) AS v (category_name, name)
+                   JOIN categories c ON c.name = v.category_name) AS source (category_id, name)
+            ON target.category_id = source.category_id AND target.name = source.name
+            WHEN MATCHED THEN UPDATE SET name = source.name
+            WHEN NOT MATCHED THEN INSERT (category_id, name) VALUES (source.category_id, source.name)
+            OUTPUT INSERTED.id, INSERTED.category_id, INSERTED.name;
+            """, [value for key in subcategory_keys for value in key])
+            names_by_id = {category_id: name for name, category_id in category_ids.items()}
+            for subcategory_id, category_id, name in sorted(cursor.fetchall(), reverse=True):
+                if category_id in names_by_id:
+                    subcategory_ids[(names_by_id[category_id], name)] = subcategory_id
+        conn.commit()
+
+    return category_ids, subcategory_ids
+
+
+def discover_catalog_in_browser():
+    """Otwiera bazar w osobnej przeglądarce i czyta z list rozwijanych pełny katalog kategorii."""
+    browser_pool = BrowserPool(base_url, size=1, max_jobs=1)
+    try:
+        session = browser_pool.acquire()
+        failed = True
+        try:
+            open_bazaar(session.driver, base_url, "katalog", session.profile)
+            session.on_bazaar = True
+            WebDriverWait(session.driver, 10).until(EC.presence_of_element_located((By.ID, "categoryDropdown")))
+            with metrics.phase('catalog_discovery'):
+                catalog = discover_catalog(session.driver, catalog_option_timeout_ms)
+            failed = not catalog
+        finally:
+            browser_pool.release(session, failed=failed)
+    finally:
+        browser_pool.close()
+    return catalog
+
+
+def load_catalog(refresh=False):
+    """
+    Ustala categories i subcategories: z katalogu odkrytego na bazarze (catalog_discovery, z pamięcią podręczną
+    ważną ttl_hours) albo z listy w kodzie, a następnie zawęża je wzorcami include/exclude.
+    """
+    global categories, subcategories
+    catalog = None
+    if catalog_discovery:
+        catalog = None if refresh else load_cached_catalog(catalog_cache_path, catalog_ttl_hours * 3600)
+        if catalog is None:
+            try:
+                catalog = discover_catalog_in_browser()
+            except Exception as e:
+                logging.error(f"Nie udało się odczytać katalogu z bazaru: {e}")
+            if catalog:
+                save_catalog(catalog_cache_path, catalog)
+                logging.info(f"Odczytano katalog z bazaru: {len(catalog)} kategorii, "
+                             f"{sum(len(entries) for _, _, entries in catalog)} subkategorii.")
+            else:
+                # Lepiej przeterminowany katalog niż żaden; bez pliku zostaje lista w kodzie
+                catalog = load_cached_catalog(catalog_cache_path, float('inf'))
+    if not catalog:
+        catalog = catalog_from_dicts(categories, subcategories)
+
+    categories, subcategories = select_from_catalog(catalog, catalog_include, catalog_exclude)
+    if not categories:
+        raise SystemExit("Żadna subkategoria nie pasuje do wzorców [Catalog] include/exclude.")
+
+
+def startup_cache_key():
+    """Odcisk wszystkiego, od czego zależą bootstrap schematu i id kategorii (sink, baza, kolumny, katalog)."""
+    storage_options = dict(config.items('Storage')) if config.has_section('Storage') else {}
+    key = json.dumps([STARTUP_CACHE_VERSION, storage_sink, server, database, storage_options, ITEM_COLUMNS,
+                      categories, subcategories], ensure_ascii=False, sort_keys=True)
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def load_startup_cache(key):
+    """Zwraca (category_ids, subcategory_ids) z pamięci podręcznej startu albo None (brak, zmiana, wygaśnięcie)."""
+    try:
+        with open(startup_cache_path, encoding='utf-8') as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning(f"Uszkodzony plik pamięci podręcznej startu {startup_cache_path}: {e}")
+        return None
+    if cache.get('key') != key or time.time() - cache.get('saved_at', 0) > startup_cache_hours * 3600:
+        return None
+    return cache['category_ids'], {(category_name, subcategory_name): subcategory_id
+                                   for category_name, subcategory_name, subcategory_id in cache['subcategory_ids']}
+
+
+def save_startup_cache(key, category_ids, subcategory_ids):
+    cache = {
+        'key': key,
+        'saved_at': time.time(),
+        'category_ids': category_ids,
+        'subcategory_ids': [[category_name, subcategory_name, subcategory_id]
+                            for (category_name, subcategory_name), subcategory_id in subcategory_ids.items()],
+    }
+    try:
+        with open(f"{startup_cache_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(f"{startup_cache_path}.tmp", startup_cache_path)
+    except OSError as e:
+        logging.warning(f"Nie udało się zapisać pamięci podręcznej startu: {e}")
+
+
+def resolve_storage_ids(conn, refresh=False):
+    """
+    Przygotowuje miejsce zapisu i zwraca id kategorii i subkategorii (z SQL Server albo z wybranego sinka).
+    Gdy od ostatniego startu nic się nie zmieniło, bootstrap i zapytania są pomijane (refresh=True wymusza je).
+    """
+    key = startup_cache_key()
+    cached = None if refresh else load_startup_cache(key)
+    if cached:
+        logging.info("Schemat i id kategorii z pamięci podręcznej startu - pomijam bootstrap bazy.")
+        return cached
+
+    with metrics.phase('storage_bootstrap'):
+        if storage_sink == 'sqlserver':
+            bootstrap_database(conn)
+            category_ids, subcategory_ids = resolve_category_ids(conn)
+        else:
+            sink = create_sink(storage_sink, ITEM_COLUMNS, config)
+            try:
+                category_ids, subcategory_ids = sink.resolve_ids(categories, subcategories)
+            finally:
+                sink.close()
+    save_startup_cache(key, category_ids, subcategory_ids)
+    return category_ids, subcategory_ids
+
+
+def start_storage(conn):
+    """Uruchamia zapis do bazy (loader, opcjonalna delta i wątek DatabaseWriter) w bieżącym procesie."""
+    global items_loader, delta_tracker, delta_conn, db_writer, price_aggregates
+    if aggregates_enabled:
+        price_aggregates = PriceAggregates(aggregates_path, [name for name, _ in ITEM_COLUMNS],
+                                           snapshot_minutes=aggregates_snapshot_minutes)
+    if storage_sink != 'sqlserver':
+        if schema_mode == 'normalized' or delta_mode:
+            logging.warning(f"schema_mode = normalized i delta_mode wymagają SQL Server - sink '{storage_sink}' "
+                            f"zapisuje pełne wiersze.")
+        items_loader = create_sink(storage_sink, ITEM_COLUMNS, config)
+    elif schema_mode == 'normalized':
+        from normalized_schema import NormalizedLoader, bootstrap_normalized_schema, load_name_cache, \
+            migrate_legacy_items
+
+        bootstrap_normalized_schema(conn, events_list, columnstore=schema_columnstore)
+        if schema_migrate_legacy:
+            migrate_legacy_items(conn)
+        # Słowniki nazw są wczytywane raz; w trakcie pracy do bazy trafiają tylko nowe nazwy
+        items_loader = NormalizedLoader(conn_str, [name for name, _ in ITEM_COLUMNS],
+                                        item_ids=load_name_cache(conn, 'item_names'),
+                                        event_ids=load_name_cache(conn, 'events'))
+        logging.info(f"Schemat znormalizowany: {len(items_loader.item_ids)} przedmiotów w słowniku.")
+    else:
+        from bulk_loader import BulkLoader
+        items_loader = BulkLoader(conn_str, 'items', ITEM_COLUMNS, mode=writer_bulk_mode)
+    if delta_mode and conn is not None:
+        delta_tracker = DeltaTracker([name for name, _ in ITEM_COLUMNS], tolerance_seconds=delta_tolerance_seconds)
+        delta_tracker.load(conn)
+        delta_conn = connect_database()
+
+    def write_batch(batch):
+        with metrics.phase('db_write'):
+            items_loader.load(batch)
+        metrics.increment('rows_written', len(batch))
+
+    db_writer = DatabaseWriter(write_batch, [name for name, _ in ITEM_COLUMNS],
+                               max_queue_pages=writer_queue_pages, batch_rows=writer_batch_rows,
+                               max_batch_age=writer_max_batch_age, max_retries=writer_max_retries,
+                               dead_letter_path=writer_dead_letter_path)
+    db_writer.start()
+
+
+def stop_storage(conn):
+    """Opróżnia kolejkę zapisu i zamyka loader."""
+    html_parse_executor.shutdown(wait=True)
+    db_writer.close()
+    items_loader.close()
+    # Stan delty jest zapisywany po każdej subkategorii; tu zostaje najwyżej stan po nieudanym save()
+    if delta_tracker:
+        delta_tracker.save(delta_conn)
+        delta_conn.close()
+    if price_aggregates:
+        price_aggregates.close()
+
+
+def run_jobs_in_threads(jobs, category_ids, subcategory_ids, current_event_name):
+    """Wykonuje zadania subkategorii w wątkach bieżącego procesu, na wspólnej puli przeglądarek."""
+    browser_pool = BrowserPool(base_url, size=scraper_workers, max_jobs=max_jobs_per_session)
+    try:
+        with ThreadPoolExecutor(max_workers=scraper_workers) as executor:
+            futures = []
+            # Zakresy stron dużych subkategorii trafiają do tej samej puli wątków jako osobne zadania
+            shard_futures = []
+            for category_name, subcategory_name, category_value, subcategory_value in jobs:
+                def submit_shard(shard, job=(category_name, subcategory_name, category_value, subcategory_value)):
+                    logging.info(f"Uruchamianie wątku dla stron {shard.start_page}-{shard.end_page} "
+                                 f"subkategorii: {job[1]}")
+                    shard_futures.append(executor.submit(scrape_subcategory_data, browser_pool, *job, category_ids,
+                                                         subcategory_ids, current_event_name, shard=shard))
+
+                logging.info(f"Uruchamianie wątku dla subkategorii: {subcategory_name}")
+                future = executor.submit(scrape_subcategory_data, browser_pool, category_name, subcategory_name,
+                                         category_value, subcategory_value, category_ids, subcategory_ids,
+                                         current_event_name, submit_shard=submit_shard)
+                futures.append(future)
+
+            # Shardy są zlecane przez zadania główne, więc po ich zakończeniu lista shard_futures jest pełna
+            for pending in (futures, shard_futures):
+                for future in as_completed(pending):
+                    try:
+                        thread_status = future.result()
+                        if thread_status:
+                            logging.info(f"Wątek zakończył pracę pomyślnie.")
+                        else:
+                            logging.warning("Wątek zakończony z błędami.")
+
+                    except Exception as e:
+                        logging.error(f"Błąd pobierania wyników z wątku: {e}")
+    finally:
+        browser_pool.close()
+
+
+def run_daemon(jobs, category_ids, subcategory_ids, current_event_name):
+    """
+    Tryb ciągły: ciepłe sesje przeglądarek z puli scrapują subkategorie wtedy, gdy wskaże je RefreshScheduler
+    (często zmieniające się częściej, stabilne rzadziej). Kończy się po Ctrl+C albo SIGTERM, po dokończeniu
+    bieżących zadań.
+    """
+    global refresh_scheduler
+    # Klucz (kategoria, subkategoria) jak w subcategory_ids - ta sama nazwa subkategorii bywa w kilku kategoriach
+    jobs_by_subcategory = {job[:2]: job for job in jobs}
+    refresh_scheduler = RefreshScheduler(list(jobs_by_subcategory), daemon_pages_per_hour, daemon_min_interval,
+                                         daemon_max_interval, default_rate=daemon_default_change_rate,
+                                         smoothing=daemon_smoothing, state_path=daemon_state_path)
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    free_slots = threading.Semaphore(scraper_workers)
+
+    def finish_job(key, future):
+        try:
+            status = future.result()
+        except Exception as e:
+            logging.error(f"Tryb ciągły - Błąd zadania '{key[1]}' ({key[0]}): {e}")
+            status = False
+        # Wywołanie zwrotne Future: wyjątek zostałby tylko zalogowany przez concurrent.futures, a miejsce
+        # w puli nie wróciłoby do free_slots - tryb ciągły stanąłby po kilku błędach zapisu stanu
+        try:
+            refresh_scheduler.complete(key, bool(status))
+            try:
+                refresh_scheduler.save()
+            except OSError as e:
+                logging.error(f"Tryb ciągły - Nie udało się zapisać stanu harmonogramu {daemon_state_path}: {e}")
+            logging.info(f"Tryb ciągły - {key[1]} ({key[0]}): {refresh_scheduler.describe(key)}.")
+        finally:
+            free_slots.release()
+
+    browser_pool = BrowserPool(base_url, size=scraper_workers, max_jobs=max_jobs_per_session)
+    logging.info(f"Tryb ciągły: {len(jobs_by_subcategory)} subkategorii, budżet {daemon_pages_per_hour:.0f} "
+                 f"stron/h, przeglądarki: {scraper_workers}.")
+    try:
+        with ThreadPoolExecutor(max_workers=scraper_workers) as executor:
+            try:
+                while not stop_event.is_set():
+                    if not free_slots.acquire(timeout=1.0):
+                        continue
+                    key = refresh_scheduler.next_job(stop_event)
+                    if key is None:
+                        free_slots.release()
+                        break
+                    future = executor.submit(scrape_subcategory_data, browser_pool, *jobs_by_subcategory[key],
+                                             category_ids, subcategory_ids, current_event_name)
+                    future.add_done_callback(partial(finish_job, key))
+            except KeyboardInterrupt:
+                stop_event.set()
+            logging.info("Tryb ciągły - zatrzymywanie: czekam na zakończenie bieżących zadań.")
+    finally:
+        browser_pool.close()
+        refresh_scheduler.save()
+
+
+def process_worker(worker_index, driver_path, shared_rate_limiter, run_id, job_queue, result_queue, category_ids,
+                   subcategory_ids, current_event_name, sink_kind, log_queue, worker_config_path):
+    """
+    Proces roboczy: własne połączenie z bazą, własny zapis i jedna przeglądarka z osobnym sterownikiem
+    i profilem. Zadania pobiera ze wspólnej kolejki aż do znacznika None.
+    Proces czyta na nowo plik konfiguracji worker_config_path; sink_kind przenosi do niego ewentualne --sink.
+    Log trafia przez log_queue do pliku procesu głównego.
+    """
+    global rate_limiter, checkpoint_store, storage_sink
+    configure(worker_config_path)
+    configure_logging(log_queue)
+    rate_limiter = shared_rate_limiter
+    storage_sink = sink_kind
+    if run_id is not None:
+        checkpoint_store = CheckpointStore(checkpoint_path, run_id)
+    if metrics_prometheus_port:
+        metrics.serve_prometheus(metrics_prometheus_port + 1 + worker_index, metrics_prometheus_host)
+    conn = connect_database() if storage_sink == 'sqlserver' else None
+    start_storage(conn)
+    browser_pool = BrowserPool(base_url, size=1, max_jobs=max_jobs_per_session, profile=worker_index,
+                               driver_path=driver_path)
+    try:
+        while True:
+            job = job_queue.get()
+            if job is None:
+                break
+            category_name, subcategory_name, category_value, subcategory_value = job
+            try:
+                status = scrape_subcategory_data(browser_pool, category_name, subcategory_name, category_value,
+                                                 subcategory_value, category_ids, subcategory_ids,
+                                                 current_event_name)
+            except Exception as e:
+                logging.exception(f"Proces {worker_index} - Nieoczekiwany błąd zadania '{subcategory_name}': {e}")
+                status = False
+            result_queue.put((subcategory_name, status))
+    finally:
+        browser_pool.close()
+        stop_storage(conn)
+        if conn is not None:
+            conn.close()
+        if checkpoint_store:
+            checkpoint_store.close()
+        logging.info(f"Proces {worker_index} - {pacer.report()}")
+        if metrics_json_path:
+            root, extension = os.path.splitext(metrics_json_path)
+            metrics.write_json(f"{root}.worker{worker_index}{extension}")
+        shutdown_logging()
+
+
+def run_jobs_in_processes(jobs, category_ids, subcategory_ids, current_event_name):
+    """Wykonuje zadania subkategorii w scraper_workers procesach, ze wspólnym limitem zapytań do hosta."""
+    worker_count = min(scraper_workers, len(jobs))
+    if worker_count == 0:
+        return
+    driver_paths = prepare_worker_drivers(worker_count, worker_drivers_dir)
+
+    job_queue = multiprocessing.Queue()
+    result_queue = multiprocessing.Queue()
+    log_queue = multiprocessing.Queue(log_queue_size)
+    log_relay = start_relay(log_queue)
+    for job in jobs:
+        job_queue.put(job)
+    for _ in range(worker_count):
+        job_queue.put(None)
+
+    workers = []
+    for worker_index, driver_path in enumerate(driver_paths):
+        worker = multiprocessing.Process(
+            target=process_worker, name=f"scraper-{worker_index}",
+            args=(worker_index, driver_path, rate_limiter, checkpoint_store.run_id if checkpoint_store else None,
+                  job_queue, result_queue, category_ids, subcategory_ids, current_event_name, storage_sink,
+                  log_queue, config_path))
+        worker.start()
+        workers.append(worker)
+        logging.info(f"Uruchomiono proces roboczy {worker_index}.")
+
+    finished_jobs = 0
+    while finished_jobs < len(jobs):
+        try:
+            subcategory_name, status = result_queue.get(timeout=5)
+        except queue.Empty:
+            if not any(worker.is_alive() for worker in workers):
+                logging.error("Wszystkie procesy robocze zakończyły się przed wykonaniem wszystkich zadań.")
+                break
+            continue
+        finished_jobs += 1
+        if status:
+            logging.info(f"Zadanie '{subcategory_name}' zakończone pomyślnie.")
+        else:
+            logging.warning(f"Zadanie '{subcategory_name}' zakończone z błędami.")
+
+    for worker in workers:
+        worker.join()
+    log_relay.stop()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scraper bazaru NosTale.")
+    parser.add_argument('--config', default='config.ini', help="plik konfiguracji (domyślnie config.ini)")
+    parser.add_argument('--resume', action='store_true',
+                        help="wznawia ostatni niedokończony przebieg: pomija ukończone subkategorie "
+                             "i przewija pozostałe do ostatniej zapisanej strony")
+    parser.add_argument('--daemon', action='store_true',
+                        help="tryb ciągły: odświeża subkategorie według tempa zmian ofert aż do Ctrl+C/SIGTERM")
+    parser.add_argument('--event', help="nazwa albo numer eventu z listy (bez pytania na konsoli)")
+    parser.add_argument('--categories',
+                        help="kategorie lub subkategorie (nazwy albo wartości) rozdzielone przecinkami")
+    parser.add_argument('--workers', type=int, help="liczba przeglądarek (nadpisuje [Scraper] workers)")
+    parser.add_argument('--sink', choices=SINK_KINDS, help="miejsce zapisu (nadpisuje [Storage] sink)")
+    parser.add_argument('--refresh-catalog', action='store_true',
+                        help="wymusza odczyt katalogu z bazaru (przy [Catalog] discovery), bootstrap schematu "
+                             "i odczyt id kategorii mimo pamięci podręcznej")
+    return parser.parse_args()
+
+
+def apply_args(args):
+    """Nadpisuje ustawienia z config.ini argumentami linii poleceń."""
+    global scraper_workers, storage_sink
+    if args.workers is not None:
+        if args.workers < 1:
+            raise SystemExit("--workers musi być dodatnie.")
+        scraper_workers = args.workers
+    if args.sink is not None:
+        storage_sink = args.sink
+
+
+def start_checkpoints(resume, event=None):
+    """Otwiera magazyn punktów kontrolnych i rozpoczyna (albo wznawia) przebieg. Zwraca nazwę eventu."""
+    global checkpoint_store
+    if not checkpoint_enabled:
+        if resume:
+            logging.warning("Punkty kontrolne są wyłączone w config.ini - --resume nie ma zastosowania.")
+        return choose_event(event)
+
+    checkpoint_store = CheckpointStore(checkpoint_path)
+    unfinished_run = checkpoint_store.find_unfinished_run() if resume else None
+    if unfinished_run:
+        checkpoint_store.run_id, current_event_name = unfinished_run
+        logging.info(f"Wznawiam przebieg {checkpoint_store.run_id} (event: {current_event_name}).")
+        print(f"Wznawiam przebieg {checkpoint_store.run_id}, event: {current_event_name}")
+        return current_event_name
+
+    if resume:
+        logging.info("Brak niedokończonego przebiegu do wznowienia - zaczynam nowy.")
+    current_event_name = choose_event(event)
+    checkpoint_store.start_run(current_event_name)
+    return current_event_name
+
+
+def main():
+    args = parse_args()
+    configure(args.config)
+    configure_logging()
+    apply_args(args)
+    if metrics_prometheus_port:
+        metrics.serve_prometheus(metrics_prometheus_port, metrics_prometheus_host)
+    # Punkty kontrolne dotyczą jednego przebiegu; w trybie ciągłym subkategorie są scrapowane wielokrotnie
+    current_event_name = choose_event(args.event) if args.daemon else start_checkpoints(args.resume, args.event)
+    load_catalog(refresh=args.refresh_catalog)
+    if args.categories:
+        select_categories(args.categories)
+    conn = connect_database() if storage_sink == 'sqlserver' else None
+    category_ids, subcategory_ids = resolve_storage_ids(conn, refresh=args.refresh_catalog)
+
+    jobs = [(category_name, subcategory_name, category_value, subcategory_value)
+            for category_name, category_value in categories.items()
+            for subcategory_name, subcategory_value in subcategories.get(category_name, [])]
+
+    if scheduler_mode == 'processes' and storage_sink == 'duckdb':
+        logging.warning("DuckDB nie pozwala pisać do pliku z kilku procesów - zadania wykonują się w wątkach.")
+    if scheduler_mode == 'processes' and args.daemon:
+        logging.warning("Tryb ciągły działa na wątkach jednego procesu (scheduler_mode = processes pominięte).")
+    if scheduler_mode == 'processes' and storage_sink != 'duckdb' and not args.daemon:
+        run_jobs_in_processes(jobs, category_ids, subcategory_ids, current_event_name)
+    else:
+        start_storage(conn)
+        try:
+            if args.daemon:
+                run_daemon(jobs, category_ids, subcategory_ids, current_event_name)
+            else:
+                run_jobs_in_threads(jobs, category_ids, subcategory_ids, current_event_name)
+        finally:
+            # Kolejka zapisu jest opróżniana także po przerwaniu (Ctrl+C), żeby nie zgubić zebranych stron
+            stop_storage(conn)
+        print(pacer.report())
+
+    if checkpoint_store:
+        checkpoint_store.finish_run([(category_name, subcategory_name) for category_name, subcategory_name, _, _ in jobs])
+        checkpoint_store.close()
+
+    if metrics_json_path:
+        metrics.write_json(metrics_json_path)
+
+    logging.info("Zakończono wszystkie wątki scrapujące.")
+    print("Skrypt zakończony.")
+
+
+if __name__ == '__main__':
+    main()
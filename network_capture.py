@@ -0,0 +1,154 @@
+import base64
+import json
+import logging
+import re
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# --- Przechwytywanie odpowiedzi XHR/JSON rynku przez CDP (domena Network) ---
+# Wymaga przeglądarki uruchomionej z 'goog:loggingPrefs' = {'performance': 'ALL'} i włączonego Network.enable.
+
+
+def enable_network_capture(chrome_options):
+    """Włącza log wydajności Chrome, przez który WebDriver udostępnia zdarzenia domeny Network."""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def drain_performance_log(driver):
+    """Odrzuca zaległe zdarzenia, żeby następne oczekiwanie widziało tylko odpowiedzi po kliknięciu."""
+    try:
+        driver.get_log('performance')
+    except Exception as e:
+        logging.warning(f"Nie udało się wyczyścić logu wydajności: {e}")
+
+
+def wait_for_json_response(driver, url_pattern, timeout=15.0, poll_interval=0.2):
+    """
+    Czeka na zakończoną odpowiedź JSON, której URL pasuje do url_pattern, i zwraca zdekodowany payload.
+    Zwraca None, gdy w czasie timeout nic pasującego nie przyszło.
+    """
+    exchange = wait_for_json_exchange(driver, url_pattern, timeout, poll_interval)
+    return exchange[1] if exchange else None
+
+
+def wait_for_json_exchange(driver, url_pattern, timeout=15.0, poll_interval=0.2):
+    """Jak wait_for_json_response, ale zwraca (URL zapytania, payload), żeby zapytanie dało się powtórzyć."""
+    url_regex = re.compile(url_pattern)
+    candidates = {}
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        for entry in driver.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+
+            method = message.get('method')
+            params = message.get('params', {})
+
+            if method == 'Network.responseReceived':
+                response = params.get('response', {})
+                if url_regex.search(response.get('url', '')) and 'json' in response.get('mimeType', ''):
+                    candidates[params.get('requestId')] = response.get('url')
+            elif method == 'Network.loadingFinished' and params.get('requestId') in candidates:
+                request_id = params['requestId']
+                try:
+                    body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                    text = body.get('body', '')
+                    if body.get('base64Encoded'):
+                        text = base64.b64decode(text).decode('utf-8')
+                    return candidates[request_id], json.loads(text)
+                except Exception as e:
+                    logging.warning(f"Nie udało się odczytać odpowiedzi {candidates[request_id]}: {e}")
+                    candidates.pop(request_id, None)
+        time.sleep(poll_interval)
+
+    return None
+
+
+# --- Powtarzanie przechwyconego zapytania z poziomu strony (ciasteczka i zgoda Cloudflare sesji) ---
+FETCH_JSON_JS = """
+var url = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+var controller = new AbortController();
+var timer = setTimeout(function () { controller.abort(); }, timeoutMs);
+fetch(url, {credentials: 'include', signal: controller.signal})
+    .then(function (response) {
+        return response.text().then(function (body) { done({status: response.status, body: body}); });
+    })
+    .catch(function (error) { done({error: String(error)}); })
+    .finally(function () { clearTimeout(timer); });
+"""
+
+
+def with_query_param(url, name, value):
+    """Zwraca url z parametrem zapytania name ustawionym na value (pozostałe parametry bez zmian)."""
+    parts = urlsplit(url)
+    query = [(key, item) for key, item in parse_qsl(parts.query, keep_blank_values=True) if key != name]
+    query.append((name, str(value)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def fetch_json_in_page(driver, url, timeout=15.0):
+    """
+    Pobiera url przez fetch() w otwartej stronie (execute_async_script), więc zapytanie idzie z ciasteczkami
+    i zgodą Cloudflare sesji przeglądarki. Zwraca zdekodowany payload albo None (timeout, status, nie-JSON).
+    """
+    driver.set_script_timeout(timeout + 5)
+    result = driver.execute_async_script(FETCH_JSON_JS, url, int(timeout * 1000))
+    if not result or result.get('error'):
+        logging.warning(f"Zapytanie {url} z poziomu strony nie powiodło się: {(result or {}).get('error')}")
+        return None
+    if result.get('status') != 200:
+        logging.warning(f"Zapytanie {url} z poziomu strony zwróciło status {result.get('status')}.")
+        return None
+    try:
+        return json.loads(result.get('body') or '')
+    except ValueError as e:
+        logging.warning(f"Odpowiedź na {url} nie jest JSON-em: {e}")
+        return None
+
+
+def find_offers_list(payload, offers_path=''):
+    """
+    Zwraca listę ofert z payloadu. offers_path to ścieżka kluczy oddzielonych kropkami (np. 'data.items');
+    gdy jest pusta, wybierana jest pierwsza lista słowników znaleziona w payloadzie.
+    """
+    if offers_path:
+        node = payload
+        for key in offers_path.split('.'):
+            if isinstance(node, dict):
+                node = node.get(key)
+            elif isinstance(node, list) and key.isdigit() and int(key) < len(node):
+                node = node[int(key)]
+            else:
+                return None
+        return node if isinstance(node, list) else None
+
+    # Pusta lista jest wynikiem tylko wtedy, gdy w payloadzie nie ma żadnej listy słowników (strona bez ofert)
+    empty = None
+    pending = [payload]
+    while pending:
+        node = pending.pop(0)
+        if isinstance(node, list):
+            if node and all(isinstance(element, dict) for element in node):
+                return node
+            if not node and empty is None:
+                empty = node
+            pending.extend(node)
+        elif isinstance(node, dict):
+            pending.extend(node.values())
+    return empty
+
+
+def offers_to_rows(offers, field_map):
+    """
+    Zamienia oferty z JSON na krotki (nazwa, ilość, cena, czas).
+    field_map: {'name': klucz, 'quantity': klucz, 'price': klucz, 'time_remaining': klucz}.
+    Liczby zostają liczbami, więc nie przechodzą przez czyszczenie tekstu.
+    """
+    rows = []
+    for offer in offers:
+        row = tuple(offer.get(field_map[field]) for field in ('name', 'quantity', 'price', 'time_remaining'))
+        rows.append(row)
+    return rows
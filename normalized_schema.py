@@ -0,0 +1,235 @@
+import logging
+
+import pyodbc
+
+# --- Znormalizowany schemat: słownik przedmiotów, eventy i kompaktowe wiersze ofert ---
+# offer_snapshots przechowuje tylko klucze całkowite oraz liczby (cena, ilość, sekundy do wygaśnięcia).
+NORMALIZED_SCHEMA_SQL = [
+    """
+    IF OBJECT_ID('item_names', 'U') IS NULL
+    CREATE TABLE item_names (
+        id INT IDENTITY(1,1) PRIMARY KEY,
+        name NVARCHAR(255) NOT NULL CONSTRAINT UQ_item_names_name UNIQUE
+    )
+    """,
+    """
+    IF OBJECT_ID('events', 'U') IS NULL
+    CREATE TABLE events (
+        id INT IDENTITY(1,1) PRIMARY KEY,
+        name NVARCHAR(255) NOT NULL CONSTRAINT UQ_events_name UNIQUE
+    )
+    """,
+    """
+    IF OBJECT_ID('offer_snapshots', 'U') IS NULL
+    CREATE TABLE offer_snapshots (
+        ItemID INT NOT NULL FOREIGN KEY REFERENCES item_names(id),
+        SubCategoryID INT NOT NULL FOREIGN KEY REFERENCES subcategories(id),
+        EventID INT NOT NULL FOREIGN KEY REFERENCES events(id),
+        Quantity INT,
+        Price INT,
+        ExpiresInSeconds INT,
+        DataScrapingu DATETIME2(0) NOT NULL,
+        ExpiresAt DATETIME2(0)
+    )
+    """,
+    # Tabele sprzed kolumny ExpiresAt (wygaśnięcie jako liczba - indeksowalne zapytania 'wkrótce wygasają')
+    """
+    IF COL_LENGTH('offer_snapshots', 'ExpiresAt') IS NULL
+    ALTER TABLE offer_snapshots ADD ExpiresAt DATETIME2(0) NULL
+    """,
+    """
+    IF OBJECT_ID('schema_migrations', 'U') IS NULL
+    CREATE TABLE schema_migrations (
+        name NVARCHAR(100) PRIMARY KEY,
+        last_source_id INT NOT NULL
+    )
+    """,
+]
+
+# Historia cen jednego przedmiotu to jeden zakres indeksu (ItemID, DataScrapingu).
+# Tabela może mieć tylko jeden indeks klastrowany (typ 1 = rowstore, 5 = columnstore) - wybór jest jednorazowy.
+ROWSTORE_INDEX_SQL = """
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE object_id = OBJECT_ID('offer_snapshots') AND type IN (1, 5))
+CREATE CLUSTERED INDEX IX_offer_snapshots_item_time ON offer_snapshots (ItemID, DataScrapingu)
+"""
+
+COLUMNSTORE_INDEX_SQL = """
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE object_id = OBJECT_ID('offer_snapshots') AND type IN (1, 5))
+CREATE CLUSTERED COLUMNSTORE INDEX CCI_offer_snapshots ON offer_snapshots
+"""
+
+EXPIRES_INDEX_SQL = """
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE object_id = OBJECT_ID('offer_snapshots')
+               AND name = 'IX_offer_snapshots_expires')
+CREATE NONCLUSTERED INDEX IX_offer_snapshots_expires ON offer_snapshots (ExpiresAt) INCLUDE (ItemID, Price)
+"""
+
+OFFER_COLUMNS = ['ItemID', 'SubCategoryID', 'EventID', 'Quantity', 'Price', 'ExpiresInSeconds', 'DataScrapingu',
+                 'ExpiresAt']
+
+# Parametrów w jednym zapytaniu SQL Server może być najwyżej 2100
+NAME_CHUNK_SIZE = 1000
+
+
+def bootstrap_normalized_schema(conn, event_names, columnstore=False):
+    """Tworzy tabele schematu znormalizowanego, indeks i wpisuje znane eventy."""
+    with conn.cursor() as cursor:
+        for statement in NORMALIZED_SCHEMA_SQL:
+            cursor.execute(statement)
+        cursor.execute(COLUMNSTORE_INDEX_SQL if columnstore else ROWSTORE_INDEX_SQL)
+        cursor.execute(EXPIRES_INDEX_SQL)
+        merge_names(cursor, 'events', event_names)
+    conn.commit()
+
+
+def load_name_cache(conn, table):
+    """Wczytuje cały słownik nazwa -> id (jedno zapytanie na starcie)."""
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT name, id FROM {table}")
+        return {name: name_id for name, name_id in cursor.fetchall()}
+
+
+def merge_names(cursor, table, names):
+    """
+    Dopisuje brakujące nazwy do tabeli słownikowej i zwraca {nazwa: id} dla wszystkich podanych nazw.
+    Kluczami są nazwy w pisowni podanej przez wywołującego: przy domyślnym kolacjonowaniu (bez rozróżniania
+    wielkości liter i spacji na końcu) nazwa może pasować do istniejącego wiersza zapisanego inaczej.
+    DISTINCT w źródle MERGE (w tym samym kolacjonowaniu) nie dopuszcza dwóch takich nazw w jednej paczce.
+    """
+    names = list(dict.fromkeys(names))
+    resolved = {}
+    for start in range(0, len(names), NAME_CHUNK_SIZE):
+        chunk = names[start:start + NAME_CHUNK_SIZE]
+        placeholders = ', '.join('(?)' for _ in chunk)
+        cursor.execute(f"""
+        MERGE INTO {table} WITH (HOLDLOCK) AS target
+        USING (SELECT DISTINCT name FROM (VALUES {placeholders}) AS v (name)) AS source (name)
+        ON target.name = source.name
+        WHEN NOT MATCHED THEN INSERT (name) VALUES (source.name);
+        """, chunk)
+        cursor.execute(f"""
+        SELECT source.name, target.id
+        FROM (VALUES {placeholders}) AS source (name)
+        JOIN {table} AS target ON target.name = source.name
+        """, chunk)
+        resolved.update({name: name_id for name, name_id in cursor.fetchall()})
+    return resolved
+
+
+def migrate_legacy_items(conn, default_event='Brak Eventu'):
+    """
+    Przenosi wiersze ze starej tabeli 'items' do offer_snapshots (set-based, wznawialne).
+    Postęp jest zapisywany w schema_migrations, więc kolejne uruchomienia przenoszą tylko nowe wiersze.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT last_source_id FROM schema_migrations WHERE name = 'items_to_offer_snapshots'")
+        result = cursor.fetchone()
+        last_id = result[0] if result else 0
+
+        cursor.execute("SELECT MAX(id) FROM items")
+        max_id = cursor.fetchone()[0]
+        if max_id is None or max_id <= last_id:
+            logging.info("Migracja 'items' -> 'offer_snapshots': brak nowych wierszy.")
+            return 0
+
+        cursor.execute("""
+        INSERT INTO item_names (name)
+        SELECT DISTINCT i.Name FROM items i
+        WHERE i.id > ? AND i.id <= ? AND NOT EXISTS (SELECT 1 FROM item_names n WHERE n.name = i.Name)
+        """, (last_id, max_id))
+        cursor.execute("""
+        INSERT INTO events (name)
+        SELECT DISTINCT ISNULL(i.Event, ?) FROM items i
+        WHERE i.id > ? AND i.id <= ? AND NOT EXISTS (SELECT 1 FROM events e WHERE e.name = ISNULL(i.Event, ?))
+        """, (default_event, last_id, max_id, default_event))
+        # Stary TimeRemaining jest tekstem - sekundy zostają NULL dla zmigrowanych wierszy
+        cursor.execute("""
+        INSERT INTO offer_snapshots (ItemID, SubCategoryID, EventID, Quantity, Price, ExpiresInSeconds, DataScrapingu)
+        SELECT n.id, i.SubCategoryID, e.id, i.Quantity, i.Price, NULL, i.DataScrapingu
+        FROM items i
+        JOIN item_names n ON n.name = i.Name
+        JOIN events e ON e.name = ISNULL(i.Event, ?)
+        WHERE i.id > ? AND i.id <= ?
+        """, (default_event, last_id, max_id))
+        migrated = cursor.rowcount
+        cursor.execute("""
+        MERGE INTO schema_migrations AS target
+        USING (VALUES ('items_to_offer_snapshots', ?)) AS source (name, last_source_id)
+        ON target.name = source.name
+        WHEN MATCHED THEN UPDATE SET last_source_id = source.last_source_id
+        WHEN NOT MATCHED THEN INSERT (name, last_source_id) VALUES (source.name, source.last_source_id);
+        """, max_id)
+    conn.commit()
+    logging.info(f"Migracja 'items' -> 'offer_snapshots': przeniesiono {migrated} wierszy (id {last_id + 1}-{max_id}).")
+    return migrated
+
+
+class NormalizedLoader:
+    """
+    Zapisuje paczki wierszy ITEM_COLUMNS do offer_snapshots. Nazwy przedmiotów i eventów są zamieniane
+    na klucze z pamięci podręcznej; do bazy idzie dodatkowe zapytanie tylko dla nowych nazw w paczce.
+    """
+
+    def __init__(self, conn_str, columns, item_ids, event_ids):
+        self.conn_str = conn_str
+        self.item_ids = item_ids
+        self.event_ids = event_ids
+        self._index = {name: position for position, name in enumerate(columns)}
+        self._insert_sql = (f"INSERT INTO offer_snapshots ({', '.join(OFFER_COLUMNS)}) "
+                            f"VALUES ({', '.join('?' for _ in OFFER_COLUMNS)})")
+        self._conn = None
+
+    def load(self, batch):
+        if self._conn is None:
+            self._conn = pyodbc.connect(self.conn_str, autocommit=False)
+
+        values = batch.values
+        names = values[self._index['Name']]
+        events = values[self._index['Event']]
+
+        try:
+            with self._conn.cursor() as cursor:
+                # Nowe id trafiają do cache dopiero po commicie, żeby rollback nie zostawił w nim nieistniejących kluczy
+                new_item_ids = merge_names(cursor, 'item_names', {n for n in names if n not in self.item_ids})
+                new_event_ids = merge_names(cursor, 'events', {e for e in events if e not in self.event_ids})
+                item_ids = self.item_ids
+                event_ids = self.event_ids
+
+                # Sekundy i wygaśnięcie są już policzone przy czyszczeniu strony
+                rows = []
+                unresolved = set()
+                for name, subcategory_id, event, quantity, price, expires_in_seconds, scraped_at, expires_at in zip(
+                        names, values[self._index['SubCategoryID']], events, values[self._index['Quantity']],
+                        values[self._index['Price']], values[self._index['ExpiresInSeconds']],
+                        values[self._index['DataScrapingu']], values[self._index['ExpiresAt']]):
+                    item_id = item_ids.get(name) or new_item_ids.get(name)
+                    event_id = event_ids.get(event) or new_event_ids.get(event)
+                    if item_id is None or event_id is None:
+                        unresolved.add(name if item_id is None else event)
+                        continue
+                    rows.append((item_id, subcategory_id, event_id, quantity, price, expires_in_seconds, scraped_at,
+                                 expires_at))
+                # Nazwa bez id (nie powinna się zdarzyć) pomija tylko swoje wiersze, a nie całą paczkę
+                if unresolved:
+                    logging.error(f"Schemat znormalizowany: brak id dla nazw {sorted(unresolved)} - pominięto "
+                                  f"{len(names) - len(rows)} wierszy.")
+                cursor.fast_executemany = True
+                if rows:
+                    cursor.executemany(self._insert_sql, rows)
+            self._conn.commit()
+        except Exception:
+            try:
+                self._conn.rollback()
+                self._conn.close()
+            except Exception as e:
+                logging.warning(f"Błąd podczas zamykania połączenia ładowania ofert: {e}")
+            self._conn = None
+            raise
+
+        self.item_ids.update(new_item_ids)
+        self.event_ids.update(new_event_ids)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
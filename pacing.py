@@ -0,0 +1,137 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Tempo pracy: czekanie na gotowość strony + konfigurowalny "ludzki" jitter ---
+# Zakresy (min, max) w sekundach dla rodzajów pauz; nadpisywane w sekcji [Pacing] pliku config.ini.
+DEFAULT_JITTER = {
+    'hover': (0.02, 0.08),  # między najechaniem a kliknięciem
+    'click': (0.05, 0.2),  # po kliknięciu
+    'select': (0.2, 0.6),  # po wyborze z listy rozwijanej
+    'page': (0.2, 0.8),  # po załadowaniu strony z wynikami
+    'cloudflare': (1.0, 3.0),  # po pojawieniu się bazaru za Cloudflare
+    'retry': (0.5, 1.0),  # przed ponowieniem odczytu nieaktualnego elementu
+}
+
+# Obserwator zmian kontenera z wynikami; instalowany PRZED kliknięciem, żeby nie przegapić szybkiej zmiany
+ARM_OBSERVER_JS = """
+var first = document.querySelector('.item');
+var target = (first && first.parentElement) || document.body;
+if (window.__nsObserver) { window.__nsObserver.disconnect(); }
+window.__nsMutations = {count: 0, last: 0};
+window.__nsObserver = new MutationObserver(function (mutations) {
+    window.__nsMutations.count += mutations.length;
+    window.__nsMutations.last = Date.now();
+});
+window.__nsObserver.observe(target, {childList: true, subtree: true, characterData: true});
+"""
+
+# Czeka, aż po pierwszej zmianie DOM będzie cisza przez quietMs; zwraca true albo false po timeoutMs bez zmian
+WAIT_SETTLED_JS = """
+var quietMs = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+var started = Date.now();
+(function check() {
+    var state = window.__nsMutations || {count: 0, last: 0};
+    var now = Date.now();
+    if (state.count > 0 && now - state.last >= quietMs) {
+        if (window.__nsObserver) { window.__nsObserver.disconnect(); }
+        done(true);
+    } else if (now - started >= timeoutMs) {
+        done(state.count > 0);
+    } else {
+        setTimeout(check, 25);
+    }
+})();
+"""
+
+
+class Pacer:
+    """
+    Zastępuje stałe time.sleep: czeka na sygnały gotowości (MutationObserver) i dodaje tylko jitter z konfiguracji.
+    Zlicza czas uśpienia, czas oczekiwania na gotowość i czas pracy wątków, żeby można było stroić tempo.
+    """
+
+    def __init__(self, jitter_ranges=None, quiet_ms=300):
+        self.jitter_ranges = dict(DEFAULT_JITTER)
+        self.jitter_ranges.update(jitter_ranges or {})
+        self.quiet_ms = quiet_ms
+        self._lock = threading.Lock()
+        self.sleep_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.job_seconds = 0.0
+
+    def jitter(self, kind):
+        """
+        Losuje długość pauzy dla rodzaju akcji i wlicza ją do czasu uśpienia.
+        Dla pauz wykonywanych po stronie przeglądarki (np. ActionChains.pause).
+        """
+        low, high = self.jitter_ranges[kind]
+        delay = random.uniform(low, high) if high > 0 else 0.0
+        with self._lock:
+            self.sleep_seconds += delay
+        return delay
+
+    def pause(self, kind):
+        """Losowa pauza z zakresu dla danego rodzaju akcji."""
+        delay = self.jitter(kind)
+        if delay > 0:
+            time.sleep(delay)
+
+    def sleep(self, seconds):
+        """Pauza o zadanej długości (liczona do czasu uśpienia)."""
+        if seconds > 0:
+            time.sleep(seconds)
+            with self._lock:
+                self.sleep_seconds += seconds
+
+    @contextmanager
+    def waiting(self):
+        """Liczy czas bloku jako oczekiwanie na gotowość strony (np. WebDriverWait)."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.wait_seconds += time.monotonic() - started
+
+    def add_job_time(self, seconds):
+        """Dolicza czas całego zadania wątku."""
+        with self._lock:
+            self.job_seconds += seconds
+
+    def arm_results_observer(self, driver):
+        """Zaczyna obserwować kontener z wynikami (wołać tuż przed kliknięciem)."""
+        driver.execute_script(ARM_OBSERVER_JS)
+
+    def wait_results_settled(self, driver, timeout):
+        """Czeka, aż wyniki się zmienią i DOM się uspokoi. Zwraca False, jeśli nic się nie zmieniło."""
+        driver.set_script_timeout(timeout + 5)
+        with self.waiting():
+            return bool(driver.execute_async_script(WAIT_SETTLED_JS, self.quiet_ms, int(timeout * 1000)))
+
+    def report(self):
+        """Loguje i zwraca podział czasu pracy wątków na uśpienie, oczekiwanie na stronę i resztę."""
+        with self._lock:
+            job_seconds, sleep_seconds, wait_seconds = self.job_seconds, self.sleep_seconds, self.wait_seconds
+        working = max(0.0, job_seconds - sleep_seconds - wait_seconds)
+        summary = (f"Czas wątków: {job_seconds:.1f} s, uśpienie (jitter): {sleep_seconds:.1f} s "
+                   f"({_percent(sleep_seconds, job_seconds)}), oczekiwanie na stronę: {wait_seconds:.1f} s "
+                   f"({_percent(wait_seconds, job_seconds)}), praca: {working:.1f} s ({_percent(working, job_seconds)}).")
+        logging.info(summary)
+        return summary
+
+
+def _percent(part, total):
+    return f"{part / total * 100:.0f}%" if total else "0%"
+
+
+def parse_jitter_ranges(section):
+    """Czyta zakresy 'min, max' z sekcji konfiguracji (np. config['Pacing'])."""
+    ranges = {}
+    for kind in DEFAULT_JITTER:
+        if kind in section:
+            low, high = (float(value) for value in section[kind].split(','))
+            ranges[kind] = (low, high)
+    return ranges
@@ -0,0 +1,350 @@
+import argparse
+import json
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+# --- Agregaty cen aktualizowane przyrostowo po każdej zapisanej stronie (lokalny plik SQLite) ---
+# Jeden wiersz na (okno czasowe, subkategoria, przedmiot): min/mediana/max ceny, suma ilości, liczba ofert i event.
+# Mediana jest szacowana algorytmem P² (Jain, Chlamtac), więc aktualizacja kosztuje O(strona), bez czytania historii.
+# Okno subkategorii odpowiada jej najnowszemu scrapowaniu: strony tego samego scrapowania są doliczane (każda raz),
+# a pierwsza strona nowego scrapowania kasuje agregaty okna, więc oferty nie są liczone dwa razy.
+AGGREGATES_SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS price_aggregates (
+        snapshot TEXT NOT NULL,
+        subcategory_id INTEGER NOT NULL,
+        item_name TEXT NOT NULL,
+        subcategory_name TEXT,
+        event TEXT,
+        offer_count INTEGER NOT NULL,
+        total_quantity INTEGER NOT NULL,
+        min_price INTEGER,
+        median_price REAL,
+        max_price INTEGER,
+        min_price_quantity INTEGER,
+        min_price_expires_at TEXT,
+        median_state TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (snapshot, subcategory_id, item_name)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_price_aggregates_item ON price_aggregates (item_name, snapshot)",
+    # Scrapowanie, z którego pochodzą agregaty okna, i jego strony już doliczone (lista JSON)
+    """
+    CREATE TABLE IF NOT EXISTS price_aggregate_scrapes (
+        snapshot TEXT NOT NULL,
+        subcategory_id INTEGER NOT NULL,
+        scrape_id TEXT,
+        pages TEXT NOT NULL,
+        PRIMARY KEY (snapshot, subcategory_id)
+    )
+    """,
+]
+
+UPSERT_SQL = """
+INSERT INTO price_aggregates (snapshot, subcategory_id, item_name, subcategory_name, event, offer_count,
+                              total_quantity, min_price, median_price, max_price, min_price_quantity,
+                              min_price_expires_at, median_state, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (snapshot, subcategory_id, item_name) DO UPDATE SET
+    subcategory_name = excluded.subcategory_name,
+    event = excluded.event,
+    offer_count = excluded.offer_count,
+    total_quantity = excluded.total_quantity,
+    min_price = excluded.min_price,
+    median_price = excluded.median_price,
+    max_price = excluded.max_price,
+    min_price_quantity = excluded.min_price_quantity,
+    min_price_expires_at = excluded.min_price_expires_at,
+    median_state = excluded.median_state,
+    updated_at = excluded.updated_at
+"""
+
+PriceSnapshot = namedtuple('PriceSnapshot', [
+    'snapshot', 'subcategory_name', 'item_name', 'event', 'offer_count', 'total_quantity', 'min_price',
+    'median_price', 'max_price', 'min_price_quantity', 'min_price_expires_at'])
+
+_SNAPSHOT_COLUMNS = ('snapshot, subcategory_name, item_name, event, offer_count, total_quantity, min_price, '
+                     'median_price, max_price, min_price_quantity, min_price_expires_at')
+
+
+class P2Median:
+    """
+    Przybliżona mediana strumienia w stałej pamięci (algorytm P², pięć znaczników).
+    Do pięciu obserwacji mediana jest dokładna. Stan da się zapisać (to_json) i odtworzyć (from_json).
+    """
+
+    _INCREMENTS = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+    def __init__(self):
+        self.samples = []
+        self.heights = None
+        self.positions = None
+        self.desired = None
+
+    @classmethod
+    def from_json(cls, text):
+        estimator = cls()
+        state = json.loads(text)
+        if 'samples' in state:
+            estimator.samples = state['samples']
+        else:
+            estimator.heights, estimator.positions, estimator.desired = state['q'], state['n'], state['d']
+        return estimator
+
+    def to_json(self):
+        if self.heights is None:
+            return json.dumps({'samples': self.samples})
+        return json.dumps({'q': self.heights, 'n': self.positions, 'd': self.desired})
+
+    def add(self, value):
+        if self.heights is None:
+            self.samples.append(value)
+            if len(self.samples) == 5:
+                self.heights = sorted(self.samples)
+                self.positions = [1, 2, 3, 4, 5]
+                self.desired = [1.0, 2.0, 3.0, 4.0, 5.0]
+                self.samples = []
+            return
+
+        q, n = self.heights, self.positions
+        if value < q[0]:
+            q[0] = value
+            cell = 0
+        elif value >= q[4]:
+            q[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if q[i] <= value < q[i + 1])
+        for i in range(cell + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self._INCREMENTS[i]
+
+        # Środkowe znaczniki są przesuwane w stronę pożądanych pozycji (parabolicznie albo liniowo)
+        for i in range(1, 4):
+            offset = self.desired[i] - n[i]
+            if (offset >= 1 and n[i + 1] - n[i] > 1) or (offset <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = q[i] + step / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = height
+                n[i] += step
+
+    def value(self):
+        if self.heights is not None:
+            return self.heights[2]
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        middle = len(ordered) // 2
+        return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+class PriceAggregates:
+    """
+    Agregaty cen w oknach snapshot_minutes (okno liczone od DataScrapingu wiersza). update() jest wołane
+    po zapisie strony; odczyt i zapis stanu odbywa się w jednej transakcji IMMEDIATE, więc kilka procesów
+    roboczych może aktualizować ten sam plik. Ponowne update() tej samej strony tego samego scrapowania
+    niczego nie zmienia. Zapytania (price_history, cheapest_offers) nie czytają surowych wierszy.
+    """
+
+    def __init__(self, path, columns=None, snapshot_minutes=60):
+        self.path = path
+        self.snapshot_minutes = snapshot_minutes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in AGGREGATES_SCHEMA_SQL:
+            self._conn.execute(statement)
+        if columns is not None:
+            index = {name: position for position, name in enumerate(columns)}
+            self._fields = [index[name] for name in ('SubCategoryID', 'SubCategoryName', 'Name', 'Quantity', 'Price',
+                                                     'DataScrapingu', 'Event', 'ExpiresAt')]
+
+    def snapshot_of(self, scraped_at):
+        """Początek okna, do którego należy znacznik czasu (tekst 'RRRR-MM-DD GG:MM')."""
+        minutes = scraped_at.hour * 60 + scraped_at.minute
+        minutes -= minutes % self.snapshot_minutes
+        return f"{scraped_at:%Y-%m-%d} {minutes // 60:02d}:{minutes % 60:02d}"
+
+    def update(self, rows, scrape_id=None, page=None):
+        """
+        Dolicza stronę page scrapowania scrape_id (wiersze - krotki w kolejności columns) do agregatów jej okien.
+        Strona już doliczona jest pomijana; strona innego scrapowania niż to, z którego pochodzi okno
+        subkategorii, najpierw je czyści (okno przedstawia najnowsze scrapowanie).
+        """
+        if not rows:
+            return
+        groups = {}
+        for row in rows:
+            (subcategory_id, subcategory_name, name, quantity, price, scraped_at, event,
+             expires_at) = (row[i] for i in self._fields)
+            groups.setdefault((self.snapshot_of(scraped_at), subcategory_id, name),
+                              [subcategory_name, event, []])[2].append((quantity, price, expires_at))
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                skipped = self._claim_page(groups, None if scrape_id is None else str(scrape_id), page)
+                groups = {key: group for key, group in groups.items() if key[:2] not in skipped}
+                stored = self._load_states(groups)
+                updated_at = datetime.now().isoformat(sep=' ', timespec='seconds')
+                self._conn.executemany(UPSERT_SQL, [
+                    _merge(key, subcategory_name, event, offers, stored.get(key), updated_at)
+                    for key, (subcategory_name, event, offers) in groups.items()])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _claim_page(self, groups, scrape_id, page):
+        """
+        Zapisuje stronę jako doliczoną do okien jej wierszy. Zwraca okna (snapshot, subcategory_id),
+        w których ta strona tego scrapowania była już doliczona.
+        """
+        skipped = set()
+        for snapshot, subcategory_id in {key[:2] for key in groups}:
+            row = self._conn.execute(
+                "SELECT scrape_id, pages FROM price_aggregate_scrapes WHERE snapshot = ? AND subcategory_id = ?",
+                (snapshot, subcategory_id)).fetchone()
+            if row is not None and row[0] == scrape_id:
+                pages = json.loads(row[1])
+                if page in pages:
+                    skipped.add((snapshot, subcategory_id))
+                    continue
+            else:
+                # Nowe scrapowanie zastępuje agregaty okna zamiast do nich doliczać
+                self._conn.execute("DELETE FROM price_aggregates WHERE snapshot = ? AND subcategory_id = ?",
+                                   (snapshot, subcategory_id))
+                pages = []
+            pages.append(page)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO price_aggregate_scrapes (snapshot, subcategory_id, scrape_id, pages) "
+                "VALUES (?, ?, ?, ?)", (snapshot, subcategory_id, scrape_id, json.dumps(pages)))
+        return skipped
+
+    def _load_states(self, groups):
+        """Bieżący stan agregatów dla kluczy paczki (po jednym zapytaniu na okno i subkategorię)."""
+        stored = {}
+        names_by_partition = {}
+        for snapshot, subcategory_id, name in groups:
+            names_by_partition.setdefault((snapshot, subcategory_id), []).append(name)
+        for (snapshot, subcategory_id), names in names_by_partition.items():
+            for start in range(0, len(names), 500):
+                chunk = names[start:start + 500]
+                for row in self._conn.execute(
+                        f"SELECT item_name, offer_count, total_quantity, min_price, max_price, min_price_quantity, "
+                        f"min_price_expires_at, median_state FROM price_aggregates "
+                        f"WHERE snapshot = ? AND subcategory_id = ? AND item_name IN ({', '.join('?' for _ in chunk)})",
+                        [snapshot, subcategory_id, *chunk]):
+                    stored[(snapshot, subcategory_id, row[0])] = row[1:]
+        return stored
+
+    def price_history(self, item_name, since=None, until=None):
+        """Historia cen przedmiotu: lista PriceSnapshot od najstarszego okna (since/until - datetime albo None)."""
+        query = f"SELECT {_SNAPSHOT_COLUMNS} FROM price_aggregates WHERE item_name = ?"
+        params = [item_name]
+        if since is not None:
+            query += " AND snapshot >= ?"
+            params.append(self.snapshot_of(since))
+        if until is not None:
+            query += " AND snapshot <= ?"
+            params.append(self.snapshot_of(until))
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY snapshot, subcategory_name", params).fetchall()
+        return [PriceSnapshot(*row) for row in rows]
+
+    def cheapest_offers(self, limit=20, subcategory_name=None, since=None):
+        """
+        Najtańsze aktualne oferty: dla każdego przedmiotu jego najnowsze okno, posortowane po cenie minimalnej.
+        since (datetime) pomija przedmioty niewidziane od tego czasu.
+        """
+        query = f"""
+        SELECT {', '.join(f'a.{column.strip()}' for column in _SNAPSHOT_COLUMNS.split(','))}
+        FROM price_aggregates a
+        JOIN (SELECT subcategory_id, item_name, MAX(snapshot) AS snapshot
+              FROM price_aggregates GROUP BY subcategory_id, item_name) latest
+          ON latest.subcategory_id = a.subcategory_id AND latest.item_name = a.item_name
+         AND latest.snapshot = a.snapshot
+        WHERE a.min_price IS NOT NULL
+        """
+        params = []
+        if subcategory_name is not None:
+            query += " AND a.subcategory_name = ?"
+            params.append(subcategory_name)
+        if since is not None:
+            query += " AND a.snapshot >= ?"
+            params.append(self.snapshot_of(since))
+        query += " ORDER BY a.min_price LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [PriceSnapshot(*row) for row in rows]
+
+    def close(self):
+        self._conn.close()
+
+
+def _merge(key, subcategory_name, event, offers, stored, updated_at):
+    """Łączy zapisany stan klucza z nowymi ofertami. Zwraca parametry UPSERT_SQL."""
+    snapshot, subcategory_id, name = key
+    if stored:
+        offer_count, total_quantity, min_price, max_price, min_price_quantity, min_price_expires_at, state = stored
+        median = P2Median.from_json(state)
+    else:
+        offer_count, total_quantity, min_price, max_price = 0, 0, None, None
+        min_price_quantity, min_price_expires_at = None, None
+        median = P2Median()
+
+    for quantity, price, expires_at in offers:
+        offer_count += 1
+        total_quantity += quantity or 0
+        if price is None:
+            continue
+        median.add(price)
+        if min_price is None or price < min_price:
+            min_price, min_price_quantity = price, quantity
+            min_price_expires_at = expires_at.isoformat(sep=' ', timespec='seconds') if expires_at else None
+        if max_price is None or price > max_price:
+            max_price = price
+
+    return (snapshot, subcategory_id, name, subcategory_name, event, offer_count, total_quantity, min_price,
+            median.value(), max_price, min_price_quantity, min_price_expires_at, median.to_json(), updated_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zapytania o agregaty cen (bez czytania tabeli items).")
+    parser.add_argument('--path', default='aggregates.sqlite')
+    commands = parser.add_subparsers(dest='command', required=True)
+    history = commands.add_parser('history', help="historia cen przedmiotu")
+    history.add_argument('item_name')
+    cheapest = commands.add_parser('cheapest', help="najtańsze aktualne oferty")
+    cheapest.add_argument('--subcategory')
+    cheapest.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    aggregates = PriceAggregates(args.path)
+    try:
+        if args.command == 'history':
+            snapshots = aggregates.price_history(args.item_name)
+        else:
+            snapshots = aggregates.cheapest_offers(args.limit, args.subcategory)
+    finally:
+        aggregates.close()
+    for snapshot in snapshots:
+        median = f"{snapshot.median_price:.0f}" if snapshot.median_price is not None else '-'
+        print(f"{snapshot.snapshot}  {snapshot.item_name} ({snapshot.subcategory_name}, {snapshot.event}): "
+              f"min {snapshot.min_price}, mediana {median}, max {snapshot.max_price}, "
+              f"ofert {snapshot.offer_count}, ilość {snapshot.total_quantity}")
+    if not snapshots:
+        print("Brak danych.")
+
+
+if __name__ == '__main__':
+    main()
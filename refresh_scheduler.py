@@ -0,0 +1,177 @@
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+# --- Harmonogram trybu ciągłego: częstotliwość odświeżania subkategorii według tempa zmian ofert ---
+# Zmiany traktujemy jak proces Poissona: oferta zmienia się z tempem rate (na godzinę), więc po t godzinach
+# od scrapowania nieaktualny jest ułamek 1 - exp(-rate * t). Odstępy są dobierane tak, żeby ten ułamek
+# (oczekiwana nieaktualność) był taki sam dla wszystkich subkategorii, a suma stron na godzinę mieściła się
+# w budżecie: interval_i = sum_j(cost_j * rate_j) / (budget * rate_i), w granicach [min_interval, max_interval].
+
+
+class SubcategoryState:
+    """Wyuczone tempo zmian (na godzinę), koszt scrapowania (strony) i czas ostatniego udanego scrapowania."""
+
+    def __init__(self, rate=None, cost=None, last_scraped=None):
+        self.rate = rate
+        self.cost = cost
+        self.last_scraped = last_scraped
+        self.fingerprints = None
+        # Czas scrapowania, z którego pochodzą fingerprints (tempo liczymy od niego, a nie od last_scraped)
+        self.fingerprints_at = None
+        # Po nieudanym scrapowaniu subkategoria czeka co najmniej min_interval
+        self.retry_at = None
+
+
+class RefreshScheduler:
+    """
+    Kolejka priorytetowa subkategorii według terminu odświeżenia. next_job() zwraca subkategorię, której
+    termin minął (albo czeka na nią), complete() uczy się z wyniku i przelicza terminy wszystkich subkategorii.
+    observe() zbiera odciski ofert z kolejnych stron bieżącego scrapowania. Stan jest zapisywany w state_path.
+    Klucze to krotki (kategoria, subkategoria) - nazwy subkategorii powtarzają się w różnych kategoriach.
+    """
+
+    def __init__(self, keys, pages_per_hour, min_interval, max_interval, default_rate=1.0, smoothing=0.3,
+                 state_path=None):
+        self.pages_per_hour = pages_per_hour
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_rate = default_rate
+        self.smoothing = smoothing
+        self.state_path = state_path
+        self._states = {key: SubcategoryState() for key in keys}
+        self._current = {}
+        self._pages = {}
+        self._in_flight = set()
+        self._heap = []
+        self._condition = threading.Condition()
+        if state_path:
+            self._load()
+        self._reschedule(time.time())
+
+    def _load(self):
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"Uszkodzony plik stanu harmonogramu {self.state_path}: {e}")
+            return
+        if not isinstance(saved, list):
+            logging.warning(f"Plik stanu harmonogramu {self.state_path} ma nieobsługiwany format - pomijam go.")
+            return
+        for entry in saved:
+            key = (entry['category'], entry['subcategory'])
+            if key in self._states:
+                self._states[key] = SubcategoryState(entry.get('rate'), entry.get('cost'), entry.get('last_scraped'))
+
+    def save(self):
+        if not self.state_path:
+            return
+        with self._condition:
+            saved = [{'category': category, 'subcategory': subcategory, 'rate': state.rate, 'cost': state.cost,
+                      'last_scraped': state.last_scraped}
+                     for (category, subcategory), state in self._states.items()]
+        with open(f"{self.state_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(saved, f, ensure_ascii=False, indent=2)
+        os.replace(f"{self.state_path}.tmp", self.state_path)
+
+    def observe(self, key, fingerprints):
+        """Dolicza odciski ofert jednej strony do bieżącego scrapowania subkategorii."""
+        with self._condition:
+            self._current.setdefault(key, set()).update(fingerprints)
+            self._pages[key] = self._pages.get(key, 0) + 1
+
+    def next_job(self, stop_event):
+        """Zwraca subkategorię do odświeżenia (czekając na jej termin) albo None po ustawieniu stop_event."""
+        with self._condition:
+            while not stop_event.is_set():
+                if self._heap:
+                    due, key = self._heap[0]
+                    wait = due - time.time()
+                    if wait <= 0:
+                        heapq.heappop(self._heap)
+                        self._in_flight.add(key)
+                        self._current.pop(key, None)
+                        self._pages.pop(key, None)
+                        return key
+                else:
+                    wait = 1.0
+                # Krótkie oczekiwanie, żeby szybko zauważyć stop_event
+                self._condition.wait(min(wait, 1.0))
+            return None
+
+    def complete(self, key, ok):
+        """
+        Kończy scrapowanie subkategorii: aktualizuje tempo zmian i koszt, przelicza terminy.
+        Udane scrapowanie bez żadnej strony z ofertami przesuwa termin, ale tempo i koszt zmienia tylko wtedy,
+        gdy poprzednie też było puste - pusta pierwsza strona bywa timeoutem, a nie wyprzedaną subkategorią.
+        """
+        now = time.time()
+        with self._condition:
+            self._in_flight.discard(key)
+            state = self._states[key]
+            current = self._current.pop(key, set())
+            pages = self._pages.pop(key, 0)
+            if ok and not current and state.fingerprints:
+                logging.info(f"Harmonogram - {key[1]} ({key[0]}): brak ofert po niepustym scrapowaniu - "
+                             f"tempo zmian bez zmian.")
+                state.last_scraped = now
+                state.retry_at = None
+            elif ok:
+                if state.fingerprints is not None and state.fingerprints_at is not None:
+                    hours = max((now - state.fingerprints_at) / 3600, 1 / 3600)
+                    union = len(current | state.fingerprints)
+                    changed = 1 - len(current & state.fingerprints) / union if union else 0.0
+                    # Odwrotność 1 - exp(-rate * t); pełna wymiana ofert jest ograniczona, żeby nie dać nieskończoności
+                    observed = -math.log(max(1.0 - changed, 1e-3)) / hours
+                    state.rate = observed if state.rate is None else \
+                        (1 - self.smoothing) * state.rate + self.smoothing * observed
+                state.cost = pages if state.cost is None else (1 - self.smoothing) * state.cost + self.smoothing * pages
+                state.fingerprints = current
+                state.fingerprints_at = now
+                state.last_scraped = now
+                state.retry_at = None
+            else:
+                state.retry_at = now + self.min_interval
+            self._reschedule(now)
+            self._condition.notify_all()
+
+    def _interval(self, state, scale):
+        rate = state.rate if state.rate is not None else self.default_rate
+        if rate <= 0:
+            return self.max_interval
+        return min(self.max_interval, max(self.min_interval, scale / rate * 3600))
+
+    def _scale(self):
+        """Wspólny czynnik odstępów sum_j(cost_j * rate_j) / budżet (odstęp subkategorii = czynnik / jej tempo)."""
+        demand = sum((state.cost or 1.0) * (state.rate if state.rate is not None else self.default_rate)
+                     for state in self._states.values())
+        return demand / self.pages_per_hour
+
+    def _reschedule(self, now):
+        scale = self._scale()
+        self._heap = []
+        for key, state in self._states.items():
+            if key in self._in_flight:
+                continue
+            due = now if state.last_scraped is None else state.last_scraped + self._interval(state, scale)
+            if state.retry_at is not None:
+                due = max(due, state.retry_at)
+            self._heap.append((due, key))
+        heapq.heapify(self._heap)
+
+    def describe(self, key):
+        """Opis stanu subkategorii do logu: tempo zmian, odstęp i oczekiwana nieaktualność w chwili odświeżenia."""
+        with self._condition:
+            state = self._states[key]
+            interval = self._interval(state, self._scale())
+            rate = state.rate if state.rate is not None else self.default_rate
+            staleness = 1 - math.exp(-rate * interval / 3600)
+            return (f"tempo zmian {rate:.2f}/h, koszt {state.cost or 0:.1f} str., następne odświeżenie za "
+                    f"{interval / 60:.0f} min (nieaktualność {staleness:.0%})")
@@ -0,0 +1,78 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from urllib.parse import urlparse
+
+# --- Harmonogram wieloprocesowy: wspólny limit zapytań i osobne sterowniki dla procesów ---
+
+
+class TokenBucket:
+    """
+    Wiadro żetonów współdzielone między wątkami i procesami (stan w pamięci współdzielonej multiprocessing).
+    rate - żetony na sekundę (> 0), burst - maksymalna liczba żetonów zebranych na zapas.
+    """
+
+    def __init__(self, rate, burst):
+        if rate <= 0:
+            raise ValueError(f"Tempo wiadra żetonów musi być dodatnie (podano {rate}).")
+        self.rate = rate
+        self.burst = burst
+        self._lock = multiprocessing.Lock()
+        self._tokens = multiprocessing.Value('d', float(burst), lock=False)
+        self._updated = multiprocessing.Value('d', time.time(), lock=False)
+
+    def acquire(self):
+        """Pobiera jeden żeton, czekając, aż się uzbiera. Zwraca czas oczekiwania w sekundach."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.time()
+                self._tokens.value = min(self.burst, self._tokens.value + (now - self._updated.value) * self.rate)
+                self._updated.value = now
+                if self._tokens.value >= 1.0:
+                    self._tokens.value -= 1.0
+                    return waited
+                wait = (1.0 - self._tokens.value) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class HostRateLimiter:
+    """Osobne wiadro żetonów dla każdego hosta docelowego."""
+
+    def __init__(self, rates):
+        # rates: {host: (żetony na sekundę, burst)}; tempo 0 oznacza host bez limitu
+        self._buckets = {host: TokenBucket(rate, burst) for host, (rate, burst) in rates.items() if rate != 0}
+
+    def acquire(self, url):
+        """Czeka na zgodę na zapytanie do hosta z url; hosty bez limitu przechodzą od razu."""
+        bucket = self._buckets.get(urlparse(url).netloc)
+        if bucket is None:
+            return 0.0
+        return bucket.acquire()
+
+
+def prepare_worker_drivers(worker_count, directory):
+    """
+    Łata chromedrivera raz w procesie głównym i kopiuje go do osobnego katalogu dla każdego procesu.
+    Dzięki temu procesy nie łatają wspólnego pliku jednocześnie (WinError 183) i mogą startować równolegle.
+    Zwraca listę ścieżek do sterowników.
+    """
+    from undetected_chromedriver.patcher import Patcher
+
+    patcher = Patcher()
+    patcher.auto()
+    source_path = patcher.executable_path
+    driver_name = os.path.basename(source_path)
+
+    paths = []
+    for worker_index in range(worker_count):
+        worker_dir = os.path.abspath(os.path.join(directory, f"worker_{worker_index}"))
+        os.makedirs(worker_dir, exist_ok=True)
+        worker_path = os.path.join(worker_dir, driver_name)
+        shutil.copy2(source_path, worker_path)
+        paths.append(worker_path)
+    logging.info(f"Przygotowano {worker_count} kopii załatanego sterownika w katalogu {directory}.")
+    return paths
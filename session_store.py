@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+# --- Magazyn sesji: ciasteczka Cloudflare, localStorage i profile Chrome między uruchomieniami ---
+CLEARANCE_COOKIE = 'cf_clearance'
+# Plik tworzony przez Chrome w user-data-dir - jego obecność oznacza profil z poprzedniego uruchomienia
+CHROME_PROFILE_MARKER = 'Local State'
+# Ciasteczko musi być ważne jeszcze co najmniej tyle sekund, żeby opłacało się z niego skorzystać
+EXPIRY_MARGIN_SECONDS = 300
+
+
+class SessionStore:
+    """
+    Przechowuje stan przeglądarki po udanym przejściu Cloudflare, osobno dla każdego profilu.
+    Profil = indeks User-Agenta (cf_clearance jest powiązane z UA) + opcjonalny katalog user-data-dir.
+    """
+
+    def __init__(self, directory, profile_count, max_age_seconds, use_profiles=True):
+        self.directory = directory
+        self.profile_count = profile_count
+        self.max_age_seconds = max_age_seconds
+        self.use_profiles = use_profiles
+        self._lock = threading.Lock()
+        self._leased = set()
+        # profil -> czy katalog Chrome istniał, zanim profile_dir() przekazało go nowej przeglądarce
+        self._had_chrome_profile = {}
+
+    def _state_path(self, profile):
+        return os.path.join(self.directory, f"profile_{profile}.json")
+
+    def profile_dir(self, profile):
+        """
+        Katalog user-data-dir Chrome dla profilu albo None, gdy profile są wyłączone.
+        Wołane przed uruchomieniem przeglądarki - zapamiętuje, czy profil ma dane z wcześniejszego uruchomienia.
+        """
+        if not self.use_profiles:
+            return None
+        # Katalog magazynu powstaje dopiero przy pierwszym użyciu, a nie przy imporcie nbv2
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.abspath(os.path.join(self.directory, f"chrome_profile_{profile}"))
+        with self._lock:
+            self._had_chrome_profile[profile] = os.path.exists(os.path.join(path, CHROME_PROFILE_MARKER))
+        return path
+
+    def had_chrome_profile(self, profile):
+        """Czy przeglądarka profilu wystartowała z istniejącym katalogiem Chrome (mogą w nim być ciasteczka)."""
+        with self._lock:
+            return self._had_chrome_profile.get(profile, False)
+
+    def acquire_profile(self):
+        """Wypożycza wolny profil (dwie przeglądarki nie mogą używać jednego user-data-dir)."""
+        with self._lock:
+            free = [profile for profile in range(self.profile_count) if profile not in self._leased]
+            if free:
+                # Preferujemy profile z ważnymi ciasteczkami
+                valid = [profile for profile in free if self._read_valid_state(profile) is not None]
+                profile = random.choice(valid or free)
+            else:
+                # Więcej przeglądarek niż User-Agentów - dodatkowe profile współdzielą UA (profil % liczba UA)
+                profile = self.profile_count
+                while profile in self._leased:
+                    profile += 1
+            self._leased.add(profile)
+            return profile
+
+    def release_profile(self, profile):
+        with self._lock:
+            self._leased.discard(profile)
+
+    def _read_valid_state(self, profile):
+        path = self._state_path(profile)
+        try:
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Profil {profile} - Uszkodzony plik sesji {path}: {e}")
+            return None
+
+        if state.get('expires_at', 0) - EXPIRY_MARGIN_SECONDS <= time.time():
+            return None
+        return state
+
+    def load(self, profile):
+        """Zwraca zapisany stan profilu, jeśli ciasteczka są jeszcze ważne; przeterminowany stan usuwa."""
+        state = self._read_valid_state(profile)
+        if state is None and os.path.exists(self._state_path(profile)):
+            logging.info(f"Profil {profile} - Zapisane ciasteczka Cloudflare wygasły.")
+            self.invalidate(profile)
+        return state
+
+    def save(self, profile, driver):
+        """Zapisuje ciasteczka i localStorage po udanym przejściu wyzwania Cloudflare."""
+        cookies = driver.get_cookies()
+        local_storage = driver.execute_script(
+            "var items = {}; for (var i = 0; i < localStorage.length; i++) {"
+            " var key = localStorage.key(i); items[key] = localStorage.getItem(key); } return items;")
+
+        saved_at = time.time()
+        expires_at = saved_at + self.max_age_seconds
+        for cookie in cookies:
+            if cookie.get('name') == CLEARANCE_COOKIE and cookie.get('expiry'):
+                expires_at = min(expires_at, cookie['expiry'])
+
+        state = {
+            'saved_at': saved_at,
+            'expires_at': expires_at,
+            'cookies': cookies,
+            'local_storage': local_storage or {},
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._state_path(profile)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        logging.info(f"Profil {profile} - Zapisano sesję Cloudflare (ważna do {time.ctime(expires_at)}).")
+
+    def invalidate(self, profile):
+        try:
+            os.remove(self._state_path(profile))
+        except FileNotFoundError:
+            pass
+
+
+def apply_cookies(driver, state):
+    """Ustawia zapisane ciasteczka przez CDP, jeszcze przed pierwszym wejściem na stronę."""
+    cdp_cookies = []
+    for cookie in state.get('cookies', []):
+        cdp_cookie = {
+            'name': cookie['name'],
+            'value': cookie['value'],
+            'domain': cookie.get('domain'),
+            'path': cookie.get('path', '/'),
+            'secure': cookie.get('secure', False),
+            'httpOnly': cookie.get('httpOnly', False),
+        }
+        if cookie.get('expiry'):
+            cdp_cookie['expires'] = cookie['expiry']
+        if cookie.get('sameSite'):
+            cdp_cookie['sameSite'] = cookie['sameSite']
+        cdp_cookies.append(cdp_cookie)
+    if cdp_cookies:
+        driver.execute_cdp_cmd('Network.setCookies', {'cookies': cdp_cookies})
+
+
+def apply_local_storage(driver, state):
+    """Odtwarza localStorage na aktualnie załadowanej stronie."""
+    local_storage = state.get('local_storage') or {}
+    if local_storage:
+        driver.execute_script(
+            "var items = arguments[0]; for (var key in items) { localStorage.setItem(key, items[key]); }",
+            local_storage)
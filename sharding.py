@@ -0,0 +1,114 @@
+import logging
+import re
+import threading
+from collections import Counter
+
+# --- Podział paginacji dużej subkategorii na zakresy stron obsługiwane przez kilka przeglądarek ---
+_PAGE_INFO_PATTERN = re.compile(r'(\d+)\s*/\s*(\d+)')
+
+
+def parse_page_info(text):
+    """Zamienia tekst pagera (np. '1 / 12') na (bieżąca strona, liczba stron) albo None."""
+    match = _PAGE_INFO_PATTERN.search(text or '')
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def split_page_ranges(total_pages, shard_count):
+    """Dzieli strony 1..total_pages na shard_count rozłącznych, możliwie równych zakresów (start, koniec)."""
+    shard_count = max(1, min(shard_count, total_pages))
+    base, extra = divmod(total_pages, shard_count)
+    ranges = []
+    start = 1
+    for index in range(shard_count):
+        end = start + base - 1 + (1 if index < extra else 0)
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+
+def boundary_overlap(tail_keys, head_keys):
+    """
+    Liczba ofert przesuniętych przez granicę stron: największe k, dla którego ostatnie k kluczy strony p
+    i pierwsze k kluczy strony p+1 to te same klucze policzone z krotnością (kolejność w obrębie k bywa inna).
+    Oferty równe innym wierszom sąsiedniej strony, ale nie leżące na styku, nie są liczone.
+    """
+    for count in range(min(len(tail_keys), len(head_keys)), 0, -1):
+        if Counter(tail_keys[-count:]) == Counter(head_keys[:count]):
+            return count
+    return 0
+
+
+class Shard:
+    """Zakres stron jednej subkategorii przydzielony jednej sesji przeglądarki."""
+
+    def __init__(self, group, index, start_page, end_page):
+        self.group = group
+        self.index = index
+        self.start_page = start_page
+        self.end_page = end_page
+
+
+class ShardGroup:
+    """
+    Wspólny stan shardów jednej subkategorii: scalanie stron na granicach zakresów i rozliczenie zakończenia.
+    Gdy w trakcie scrapowania przybywa (albo ubywa) ofert, oferty z końca ostatniej strony zakresu i z początku
+    pierwszej strony następnego zakresu - czytanych w różnym czasie - się pokrywają. Strona, która przychodzi
+    druga, traci pokrywające się wiersze (boundary_overlap); pierwsza jest już przekazana do zapisu.
+    offers_url to przechwycone zapytanie o oferty, które shardy powtarzają z numerem swojej strony.
+    """
+
+    def __init__(self, subcategory_name, total_pages, shard_count, key_fields, offers_url, scrape_id):
+        self.subcategory_name = subcategory_name
+        self.total_pages = total_pages
+        self.shards = [Shard(self, index, start, end)
+                       for index, (start, end) in enumerate(split_page_ranges(total_pages, shard_count))]
+        self.key_fields = key_fields
+        self.offers_url = offers_url
+        self.scrape_id = scrape_id
+        self.duplicates_dropped = 0
+        self._lock = threading.Lock()
+        # Ostatnie strony zakresów (poza ostatnim) - granica jest między stroną a następną
+        self._tail_pages = {shard.end_page for shard in self.shards[:-1]}
+        # strona graniczna -> klucze jej zapisanych wierszy
+        self._edge_keys = {}
+        self._pages_submitted = set()
+        self._pages_stored = set()
+        self._running = len(self.shards)
+        self._failed = False
+
+    def merge_page(self, page, rows):
+        """Zwraca wiersze strony bez ofert, które przesunęły się z sąsiedniego zakresu i już są zapisane."""
+        keys = [tuple(row[i] for i in self.key_fields) for row in rows]
+        first, last = 0, len(rows)
+        with self._lock:
+            if page - 1 in self._tail_pages and page - 1 in self._edge_keys:
+                first = boundary_overlap(self._edge_keys[page - 1], keys)
+            if page in self._tail_pages and page + 1 in self._edge_keys:
+                last -= boundary_overlap(keys[first:], self._edge_keys[page + 1])
+            if page in self._tail_pages or page - 1 in self._tail_pages:
+                self._edge_keys[page] = keys[first:last]
+            self._pages_submitted.add(page)
+            self.duplicates_dropped += len(rows) - (last - first)
+
+        if first or last < len(rows):
+            logging.info(f"Shardy '{self.subcategory_name}': strona {page} - odrzucono {len(rows) - (last - first)} "
+                         f"ofert przesuniętych z sąsiedniego zakresu stron.")
+        return rows[first:last]
+
+    def page_stored(self, page):
+        """Potwierdzenie zapisu strony (wołane przez wątek zapisu)."""
+        with self._lock:
+            self._pages_stored.add(page)
+
+    def all_pages_stored(self):
+        with self._lock:
+            return not self._failed and self._pages_stored >= self._pages_submitted
+
+    def finish_shard(self, ok):
+        """Rozlicza zakończenie shardu. Zwraca (czy to ostatni shard, czy wszystkie się udały)."""
+        with self._lock:
+            self._running -= 1
+            self._failed = self._failed or not ok
+            return self._running == 0, not self._failed
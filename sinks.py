@@ -0,0 +1,294 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- Wymienne miejsca zapisu (sink) poza SQL Server: SQLite, DuckDB i Parquet ---
+# Każdy sink ma ten sam interfejs co BulkLoader: load(batch) zapisuje paczkę ColumnBatch, close() zamyka.
+# Dodatkowo resolve_ids() nadaje id kategoriom i subkategoriom (odpowiednik tabel categories/subcategories).
+# Żaden sink nie wymaga sterownika ODBC; duckdb i pyarrow są opcjonalne i importowane dopiero przy użyciu.
+SINK_KINDS = ('sqlserver', 'sqlite', 'duckdb', 'parquet')
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+
+
+def _assign_ids(known, keys):
+    """Nadaje kolejne id kluczom, których nie ma w słowniku known (i dopisuje je). Zwraca nowe pary (klucz, id)."""
+    next_id = max(known.values(), default=0) + 1
+    added = []
+    for key in keys:
+        if key not in known:
+            known[key] = next_id
+            added.append((key, next_id))
+            next_id += 1
+    return added
+
+
+def _catalog_keys(categories, subcategories):
+    category_names = list(categories)
+    subcategory_keys = [(category_name, subcategory_name)
+                        for category_name in category_names
+                        for subcategory_name, _ in subcategories.get(category_name, [])]
+    return category_names, subcategory_keys
+
+
+class _CatalogTablesMixin:
+    """resolve_ids() na tabelach categories/subcategories w bazie z DB-API i parametrami '?' (SQLite, DuckDB)."""
+
+    CATALOG_SCHEMA_SQL = [
+        "CREATE TABLE IF NOT EXISTS categories (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL UNIQUE)",
+        "CREATE TABLE IF NOT EXISTS subcategories (id INTEGER PRIMARY KEY, category_id INTEGER NOT NULL, "
+        "name VARCHAR NOT NULL, UNIQUE (category_id, name))",
+    ]
+
+    def resolve_ids(self, categories, subcategories):
+        """Zwraca (category_ids, subcategory_ids) jak resolve_category_ids() w nbv2, dopisując brakujące."""
+        category_names, subcategory_keys = _catalog_keys(categories, subcategories)
+        with self._lock, self._transaction():
+            category_ids = dict(self._conn.execute("SELECT name, id FROM categories").fetchall())
+            new_categories = _assign_ids(category_ids, category_names)
+            if new_categories:
+                self._conn.executemany("INSERT INTO categories (name, id) VALUES (?, ?)", new_categories)
+
+            names_by_id = {category_id: name for name, category_id in category_ids.items()}
+            subcategory_ids = {(names_by_id[category_id], name): subcategory_id for subcategory_id, category_id, name
+                               in self._conn.execute("SELECT id, category_id, name FROM subcategories").fetchall()
+                               if category_id in names_by_id}
+            new_subcategories = _assign_ids(subcategory_ids, subcategory_keys)
+            if new_subcategories:
+                self._conn.executemany(
+                    "INSERT INTO subcategories (category_id, name, id) VALUES (?, ?, ?)",
+                    [(category_ids[category_name], subcategory_name, subcategory_id)
+                     for (category_name, subcategory_name), subcategory_id in new_subcategories])
+        return ({name: category_ids[name] for name in category_names},
+                {key: subcategory_ids[key] for key in subcategory_keys})
+
+
+class SqliteSink(_CatalogTablesMixin):
+    """
+    Zapis paczek do tabeli items w SQLite (domyślnie w pamięci). Plik jest otwierany w trybie WAL, więc kilka
+    procesów roboczych może pisać do tej samej bazy (zapisy są kolejkowane przez busy timeout).
+    rows i seconds mierzą sam zapis (benchmark).
+    """
+
+    def __init__(self, columns, path=':memory:', table='items', timeout=30.0):
+        self.table = table
+        self.rows = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        if path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            for statement in self.CATALOG_SCHEMA_SQL:
+                self._conn.execute(statement)
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                               f"({', '.join(f'{name} {sql_type}' for name, sql_type in columns)})")
+        self._insert_sql = (f"INSERT INTO {table} ({', '.join(name for name, _ in columns)}) "
+                            f"VALUES ({', '.join('?' for _ in columns)})")
+
+    @contextmanager
+    def _transaction(self):
+        with self._conn:
+            yield
+
+    def load(self, batch):
+        started = time.perf_counter()
+        with self._lock, self._conn:
+            self._conn.executemany(self._insert_sql, batch.rows())
+        self.seconds += time.perf_counter() - started
+        self.rows += len(batch)
+
+    def close(self):
+        self._conn.close()
+
+
+class DuckDbSink(_CatalogTablesMixin):
+    """
+    Zapis paczek do tabeli items w pliku DuckDB (kolumnowo, z kompresją). Z pakietem pyarrow paczka trafia
+    do bazy jako jedna tabela Arrow (INSERT ... SELECT), bez niego przez executemany.
+    DuckDB dopuszcza tylko jeden proces piszący, więc nie nadaje się do scheduler_mode = processes.
+    """
+
+    def __init__(self, columns, path='nostale.duckdb', table='items'):
+        try:
+            import duckdb
+        except ImportError:
+            raise RuntimeError("Sink 'duckdb' wymaga pakietu duckdb (pip install duckdb).") from None
+        self.table = table
+        self.columns = columns
+        self.rows = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+        self._conn = duckdb.connect(path)
+        for statement in self.CATALOG_SCHEMA_SQL:
+            self._conn.execute(statement)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                           f"({', '.join(f'{name} {_duckdb_type(sql_type)}' for name, sql_type in columns)})")
+        self._insert_sql = (f"INSERT INTO {table} ({', '.join(name for name, _ in columns)}) "
+                            f"VALUES ({', '.join('?' for _ in columns)})")
+        try:
+            import pyarrow
+            self._arrow_schema = _arrow_schema(pyarrow, columns)
+        except ImportError:
+            self._arrow_schema = None
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.begin()
+        try:
+            yield
+        except Exception:
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+
+    def load(self, batch):
+        started = time.perf_counter()
+        with self._lock, self._transaction():
+            if self._arrow_schema is not None:
+                import pyarrow
+                arrow_batch = pyarrow.Table.from_arrays(
+                    [pyarrow.array(values, type=field.type) for values, field in zip(batch.values, self._arrow_schema)],
+                    schema=self._arrow_schema)
+                self._conn.register('incoming_batch', arrow_batch)
+                try:
+                    self._conn.execute(f"INSERT INTO {self.table} SELECT * FROM incoming_batch")
+                finally:
+                    self._conn.unregister('incoming_batch')
+            else:
+                self._conn.executemany(self._insert_sql, batch.rows())
+        self.seconds += time.perf_counter() - started
+        self.rows += len(batch)
+
+    def close(self):
+        self._conn.close()
+
+
+class ParquetSink:
+    """
+    Zapis paczek do plików Parquet (kompresja zstd) w katalogu partycjonowanym po dacie scrapowania
+    i subkategorii: root/scrape_date=RRRR-MM-DD/subcategory=<SubCategoryID>/part-....parquet.
+    Plik powstaje pod nazwą tymczasową i jest przemianowywany po zapisaniu, więc czytelnicy nie widzą
+    niedokończonych plików. Id kategorii i subkategorii są trzymane w root/_catalog.json.
+    """
+
+    def __init__(self, columns, root='parquet', compression='zstd', date_column='DataScrapingu',
+                 subcategory_column='SubCategoryID'):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Sink 'parquet' wymaga pakietu pyarrow (pip install pyarrow).") from None
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self.root = root
+        self.compression = compression
+        self.columns = columns
+        self.rows = 0
+        self.seconds = 0.0
+        self._schema = _arrow_schema(pyarrow, columns)
+        names = [name for name, _ in columns]
+        self._date_index = names.index(date_column)
+        self._subcategory_index = names.index(subcategory_column)
+        self._catalog_path = os.path.join(root, '_catalog.json')
+        self._lock = threading.Lock()
+        self._file_prefix = f"part-{datetime.now():%Y%m%d%H%M%S}-{os.getpid()}"
+        self._file_counter = 0
+        os.makedirs(root, exist_ok=True)
+
+    def resolve_ids(self, categories, subcategories):
+        """Zwraca (category_ids, subcategory_ids), dopisując brakujące do root/_catalog.json."""
+        category_names, subcategory_keys = _catalog_keys(categories, subcategories)
+        with self._lock:
+            catalog = {'categories': {}, 'subcategories': []}
+            if os.path.exists(self._catalog_path):
+                with open(self._catalog_path, encoding='utf-8') as f:
+                    catalog = json.load(f)
+            category_ids = dict(catalog['categories'])
+            subcategory_ids = {(category_name, subcategory_name): subcategory_id
+                               for category_name, subcategory_name, subcategory_id in catalog['subcategories']}
+            if _assign_ids(category_ids, category_names) + _assign_ids(subcategory_ids, subcategory_keys):
+                catalog = {'categories': category_ids,
+                           'subcategories': [[category_name, subcategory_name, subcategory_id]
+                                             for (category_name, subcategory_name), subcategory_id
+                                             in subcategory_ids.items()]}
+                temporary_path = f"{self._catalog_path}.tmp"
+                with open(temporary_path, 'w', encoding='utf-8') as f:
+                    json.dump(catalog, f, ensure_ascii=False, indent=2)
+                os.replace(temporary_path, self._catalog_path)
+        return ({name: category_ids[name] for name in category_names},
+                {key: subcategory_ids[key] for key in subcategory_keys})
+
+    def load(self, batch):
+        started = time.perf_counter()
+        # Wiersze paczki są rozdzielane na partycje (dzień, subkategoria) po indeksach
+        partitions = {}
+        for index, (scraped_at, subcategory_id) in enumerate(zip(batch.values[self._date_index],
+                                                                 batch.values[self._subcategory_index])):
+            partitions.setdefault((scraped_at.date(), subcategory_id), []).append(index)
+
+        pyarrow = self._pyarrow
+        for (scrape_date, subcategory_id), indexes in partitions.items():
+            if len(indexes) == len(batch):
+                arrays = [pyarrow.array(values, type=field.type) for values, field in zip(batch.values, self._schema)]
+            else:
+                arrays = [pyarrow.array([values[index] for index in indexes], type=field.type)
+                          for values, field in zip(batch.values, self._schema)]
+            table = pyarrow.Table.from_arrays(arrays, schema=self._schema)
+            directory = os.path.join(self.root, f"scrape_date={scrape_date.isoformat()}",
+                                     f"subcategory={subcategory_id}")
+            os.makedirs(directory, exist_ok=True)
+            with self._lock:
+                self._file_counter += 1
+                file_name = f"{self._file_prefix}-{self._file_counter:06d}.parquet"
+            path = os.path.join(directory, file_name)
+            self._parquet.write_table(table, f"{path}.tmp", compression=self.compression)
+            os.replace(f"{path}.tmp", path)
+        self.seconds += time.perf_counter() - started
+        self.rows += len(batch)
+
+    def close(self):
+        pass
+
+
+def _arrow_schema(pyarrow, columns):
+    """Schemat Arrow odpowiadający typom SQL z listy kolumn (INT, NVARCHAR(n), DATETIME...)."""
+    fields = []
+    for name, sql_type in columns:
+        sql_type = sql_type.upper()
+        if sql_type in ('INT', 'INTEGER'):
+            arrow_type = pyarrow.int32()
+        elif sql_type == 'BIGINT':
+            arrow_type = pyarrow.int64()
+        elif sql_type.startswith('DATETIME'):
+            arrow_type = pyarrow.timestamp('us')
+        else:
+            arrow_type = pyarrow.string()
+        fields.append(pyarrow.field(name, arrow_type))
+    return pyarrow.schema(fields)
+
+
+def _duckdb_type(sql_type):
+    sql_type = sql_type.upper()
+    if sql_type.startswith('NVARCHAR'):
+        return 'VARCHAR'
+    if sql_type.startswith('DATETIME'):
+        return 'TIMESTAMP'
+    return sql_type
+
+
+def create_sink(kind, columns, config):
+    """Tworzy sink wskazany w [Storage] sink (poza 'sqlserver', który obsługuje nbv2.py) z opcjami z config.ini."""
+    if kind == 'sqlite':
+        return SqliteSink(columns, config.get('Storage', 'sqlite_path', fallback='nostale.sqlite'))
+    if kind == 'duckdb':
+        return DuckDbSink(columns, config.get('Storage', 'duckdb_path', fallback='nostale.duckdb'))
+    if kind == 'parquet':
+        return ParquetSink(columns, config.get('Storage', 'parquet_dir', fallback='parquet'),
+                           compression=config.get('Storage', 'parquet_compression', fallback='zstd'))
+    raise ValueError(f"Nieznany sink: {kind} (dostępne: {', '.join(SINK_KINDS)})")
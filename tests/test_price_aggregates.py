@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from price_aggregates import PriceAggregates
+
+COLUMNS = ['SubCategoryID', 'SubCategoryName', 'Name', 'Quantity', 'Price', 'DataScrapingu', 'Event', 'ExpiresAt']
+SCRAPED_AT = datetime(2024, 5, 1, 12, 10)
+
+
+def offer(name, quantity, price, scraped_at=SCRAPED_AT):
+    return (7, 'Składniki', name, quantity, price, scraped_at, 'Brak', None)
+
+
+def snapshot_rows(aggregates):
+    return aggregates.price_history('Kryształ') + aggregates.price_history('Pióro')
+
+
+def test_same_page_twice_in_one_window_changes_nothing():
+    aggregates = PriceAggregates(':memory:', COLUMNS)
+    rows = [offer('Kryształ', 10, 500), offer('Kryształ', 3, 450), offer('Pióro', 1, 90)]
+    aggregates.update(rows, 'run-1', 1)
+    before = snapshot_rows(aggregates)
+    aggregates.update(rows, 'run-1', 1)
+    assert snapshot_rows(aggregates) == before
+    crystal, = aggregates.price_history('Kryształ')
+    assert (crystal.offer_count, crystal.total_quantity, crystal.min_price) == (2, 13, 450)
+
+
+def test_next_scrape_in_same_window_replaces_previous_one():
+    aggregates = PriceAggregates(':memory:', COLUMNS)
+    aggregates.update([offer('Kryształ', 10, 500), offer('Kryształ', 3, 450)], 'run-1', 1)
+    # Tańsza oferta zniknęła przed kolejnym scrapowaniem w tym samym oknie
+    aggregates.update([offer('Kryształ', 10, 500, SCRAPED_AT.replace(minute=15))], 'run-2', 1)
+    crystal, = aggregates.price_history('Kryształ')
+    assert (crystal.offer_count, crystal.total_quantity, crystal.min_price) == (1, 10, 500)
+
+
+def test_pages_of_one_scrape_are_added_up():
+    aggregates = PriceAggregates(':memory:', COLUMNS)
+    aggregates.update([offer('Kryształ', 10, 500)], 'run-1', 1)
+    aggregates.update([offer('Kryształ', 2, 520)], 'run-1', 2)
+    crystal, = aggregates.price_history('Kryształ')
+    assert (crystal.offer_count, crystal.total_quantity, crystal.min_price, crystal.max_price) == (2, 12, 500, 520)
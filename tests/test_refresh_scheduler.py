@@ -0,0 +1,45 @@
+from refresh_scheduler import RefreshScheduler
+
+KEY = ('Akcesoria', 'Naszyjniki')
+
+
+def scheduler_after_first_scrape(fingerprints):
+    scheduler = RefreshScheduler([KEY], pages_per_hour=100, min_interval=60, max_interval=3600)
+    scheduler.observe(KEY, fingerprints)
+    scheduler.complete(KEY, True)
+    return scheduler
+
+
+def test_empty_scrape_after_offers_keeps_rate_and_fingerprints():
+    scheduler = scheduler_after_first_scrape({'a', 'b', 'c'})
+    state = scheduler._states[KEY]
+    state.rate, state.cost = 2.0, 3.0
+    scraped_at = state.last_scraped
+
+    scheduler.complete(KEY, True)
+
+    assert (state.rate, state.cost, state.fingerprints) == (2.0, 3.0, {'a', 'b', 'c'})
+    assert state.last_scraped >= scraped_at
+    assert state.retry_at is None
+
+
+def test_empty_scrape_after_empty_one_updates_rate():
+    scheduler = scheduler_after_first_scrape(set())
+    state = scheduler._states[KEY]
+    state.rate = 2.0
+
+    scheduler.complete(KEY, True)
+
+    assert state.rate < 2.0
+
+
+def test_failed_scrape_only_delays_retry():
+    scheduler = scheduler_after_first_scrape({'a'})
+    state = scheduler._states[KEY]
+    state.rate = 2.0
+    scheduler.observe(KEY, {'x', 'y'})
+
+    scheduler.complete(KEY, False)
+
+    assert (state.rate, state.fingerprints) == (2.0, {'a'})
+    assert state.retry_at is not None
@@ -0,0 +1,46 @@
+from sharding import ShardGroup, boundary_overlap, split_page_ranges
+
+KEY_FIELDS = [0, 1, 2]
+
+
+def offer(name, quantity=1, price=100, time_remaining='2h'):
+    return (name, quantity, price, time_remaining)
+
+
+def two_shard_group():
+    # Zakresy 1-2 i 3-4: granica między stronami 2 i 3
+    return ShardGroup('Przedmioty specjalne', 4, 2, KEY_FIELDS, 'http://localhost/api/offers?page=1', 'run-1')
+
+
+def test_split_page_ranges_covers_all_pages():
+    assert split_page_ranges(10, 3) == [(1, 4), (5, 7), (8, 10)]
+    assert split_page_ranges(2, 5) == [(1, 1), (2, 2)]
+
+
+def test_shifted_offers_are_dropped_from_later_page():
+    group = two_shard_group()
+    # Strona 3 przeczytana na starcie, strona 2 później - po dodaniu dwóch ofert przed nią
+    assert group.merge_page(3, [offer('C'), offer('D'), offer('E')]) == [offer('C'), offer('D'), offer('E')]
+    page_two = [offer('Z'), offer('A'), offer('B'), offer('C', time_remaining='1h'), offer('D')]
+    assert group.merge_page(2, page_two) == page_two[:3]
+    assert group.duplicates_dropped == 2
+
+
+def test_identical_listings_away_from_boundary_are_kept():
+    group = two_shard_group()
+    group.merge_page(2, [offer('A'), offer('A'), offer('B')])
+    page_three = [offer('C'), offer('A'), offer('A')]
+    assert group.merge_page(3, page_three) == page_three
+    assert group.duplicates_dropped == 0
+
+
+def test_pages_inside_a_range_are_not_merged():
+    group = two_shard_group()
+    group.merge_page(1, [offer('A'), offer('B')])
+    assert group.merge_page(2, [offer('B'), offer('C')]) == [offer('B'), offer('C')]
+
+
+def test_boundary_overlap_counts_multiplicity():
+    assert boundary_overlap([('A',), ('B',), ('B',)], [('B',), ('B',), ('C',)]) == 2
+    assert boundary_overlap([('A',), ('B',)], [('B',), ('B',), ('C',)]) == 1
+    assert boundary_overlap([('A',)], [('C',)]) == 0